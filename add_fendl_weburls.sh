@@ -18,7 +18,11 @@
 #     COMMIT-ID:    the commit id of FENDL-Processed whose
 #                   files should be associated with the
 #                   corresponding urls on the webserver
-#                   
+#
+#     Optional environment variables:
+#
+#       FENDL_ANNEX_JOBS - number of urls processed in parallel
+#
 ############################################################
 #!/bin/bash
 
@@ -47,57 +51,10 @@ if [ ! "$?" -eq 0 ]; then
     echo "ERROR: Updating submodules failed"
 fi
 
-scandirs=(
-    # atom
-    "fendl-endf/general-purpose/atom"
-    "general-purpose/atom/group"
-    # neutron
-    "fendl-endf/general-purpose/neutron"
-    "general-purpose/neutron/ace"
-    "general-purpose/neutron/group"
-    "general-purpose/neutron/njoy"
-    "general-purpose/neutron/plot"
-    # deuteron
-    "fendl-endf/general-purpose/deuteron"
-    "general-purpose/deuteron/ace"
-    # proton
-    "fendl-endf/general-purpose/proton"
-    "general-purpose/proton/ace"
-    "general-purpose/proton/njoy"
-    "general-purpose/proton/plot"
-)
-
-scanurls=(
-    # atom
-    "atom/endf"
-    "atom/group"
-    # neutron
-    "neutron/endf"
-    "neutron/ace"
-    "neutron/group"
-    "neutron/njoy"
-    "neutron/plot"
-    # deuteron
-    "deuteron/endf"
-    "deuteron/ace"
-    # proton
-    "proton/endf"
-    "proton/ace"
-    "proton/njoy"
-    "proton/plot"
-)
-
-
-for cidx in $(seq "${#scandirs[@]}"); do
-    let "idx=cidx-1"
-    curdir="${scandirs[$idx]}"
-    curdir2="${scanurls[$idx]}"
-
-    cd "$gitroot"
-    cd "$curdir"
-
-    for curfile in $(ls); do
-        cururl="$urlbase/$curdir2/$curfile"
-        git annex addurl --file="$curfile" "$cururl"
-    done
-done
+# the association between repository directories and
+# website directories is defined in utils/fendl_layout.py
+# and all urls are registered by a single git-annex process
+codedir="$(cd "$(dirname "$0")" && pwd)"
+cd "$gitroot"
+python "$codedir/register_fendl_webfiles.py" --mode verify \
+    --jobs "${FENDL_ANNEX_JOBS:-1}" --fendl-dirs "$urlbase"
@@ -0,0 +1,103 @@
+############################################################
+#
+# Date:         2026/10/17
+# Institution:  IAEA
+#
+# Creates the html file with the differences between two
+# versions of an ENDF file in a git-annex repository.
+# Unlike the dtwdiff pipeline formerly used by annexdiff.sh,
+# the files are compared section by section and only the
+# MAT/MF/MT sections that changed are compared line by line.
+# The html file starts with a table summarizing the changes
+# in all sections.
+#
+# The arguments are the same as for annexdiff.sh in mode
+# difffile so that the script can be registered as git
+# difftool. annexdiff.sh delegates to this script in mode
+# difffile. The html file is written to
+# diffdir/<relfilepath>.diff.html in the current directory.
+#
+# Usage:
+#     python annexdiff.py difffile <relfilepath> <file1> <file2>
+#
+#     <relfilepath>: path of the file relative to the repository
+#     <file1>:       old version, i.e., the symbolic link
+#                    (or a file with its target) or /dev/null
+#     <file2>:       new version, analogous to <file1>
+#
+#     Optional environment variables:
+#
+#       GIT_WORK_TREE - root of the repository, set by git difftool
+#
+############################################################
+
+import argparse
+import os
+import time
+from utils.endf_diff import write_diff_html
+
+
+def resolve_version(reffile, relfilepath):
+    """Return the path to the content of a file version given by git.
+
+    git difftool passes symbolic links as files containing the
+    link target, which is relative to the directory of the file.
+    """
+    if reffile == '/dev/null':
+        return None
+    if os.path.islink(reffile):
+        return os.path.realpath(reffile)
+    # annex links are tiny; ordinary files are compared directly
+    if os.path.getsize(reffile) < 1024:
+        with open(reffile, 'r', errors='replace') as f:
+            rawpath = f.read()
+        if '\n' not in rawpath:
+            worktree = os.environ.get('GIT_WORK_TREE', '.')
+            dirpath = os.path.dirname(os.path.join(worktree, relfilepath))
+            truefile = os.path.join(dirpath, rawpath)
+            if os.path.isfile(truefile):
+                return truefile
+    return reffile
+
+
+def create_difffile(relfilepath, reffile1, reffile2, diffdir='diffdir'):
+    """Write the html file with the differences of the two versions"""
+    truefile1 = resolve_version(reffile1, relfilepath)
+    truefile2 = resolve_version(reffile2, relfilepath)
+    if truefile1 is None:
+        print('only in #2')
+        return None
+    if truefile2 is None:
+        print('only in #1')
+        return None
+    print('working on ' + relfilepath)
+    difffile = os.path.join(diffdir, relfilepath + '.diff.html')
+    os.makedirs(os.path.dirname(difffile), exist_ok=True)
+    return write_diff_html(truefile1, truefile2, difffile,
+                           title=relfilepath)
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Create html file with differences')
+    parser.add_argument('mode', choices=('difffile',))
+    parser.add_argument('relfilepath', help='path relative to the repository')
+    parser.add_argument('file1', help='old version of the file')
+    parser.add_argument('file2', help='new version of the file')
+    parser.add_argument('--diffdir', help='output directory', default='diffdir')
+    parser.add_argument('--timing', help='print the time needed', action='store_true')
+    args = parser.parse_args()
+
+    if os.path.isdir(args.file1) or os.path.isdir(args.file2):
+        raise SystemExit(0)
+    if not os.path.isdir(args.diffdir):
+        print('ERROR: ' + args.diffdir + ' does not exist')
+        raise SystemExit(0)
+
+    starttime = time.time()
+    results = create_difffile(args.relfilepath, args.file1, args.file2,
+                              args.diffdir)
+    if results is not None and args.timing:
+        nchanged = sum(1 for r in results if r['status'] != 'identical')
+        print('{} of {} sections changed, {:.2f} s'.format(
+              nchanged, len(results), time.time() - starttime))
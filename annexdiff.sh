@@ -7,6 +7,12 @@ if [ "$diffmode" != "onlynames" ] && [ "$diffmode" != "full" ] \
     exit 1
 fi
 
+if [ "$diffmode" = "difffile" ]; then
+    # section-wise comparison without temporary copies
+    scriptdir="$(dirname "$(readlink -f "$0")")"
+    exec python "$scriptdir/annexdiff.py" "$@"
+fi
+
 relfilepath="$2"
 reffile1="$3"
 reffile2="$4"
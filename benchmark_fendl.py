@@ -0,0 +1,78 @@
+############################################################
+#
+# Date:         2026/10/17
+# Institution:  IAEA
+#
+# Times the import, metadata and website stages on a tree
+# created by make_synthetic_fendl.py and reports the
+# throughput in files/s and MB/s and the peak resident set
+# size of each stage (see utils/fendl_benchmark.py). The
+# results can be stored and compared with a baseline; the
+# exit status is 1 if a stage is slower or uses more memory
+# than the baseline by more than the tolerance.
+#
+# Usage:
+#     python benchmark_fendl.py <root> [--workdir DIR] [--stages S1,S2,...] \
+#         [--jobs N] [--repeat N] [--save FILE] [--baseline FILE] \
+#         [--tolerance T]
+#
+#     <root>:      synthetic tree created by make_synthetic_fendl.py
+#     --workdir:   directory for the output of the stages,
+#                  by default <root>/benchmark
+#     --stages:    comma-separated list of stages, by default all of
+#                  is_endf_file, get_endf_metadata,
+#                  get_endf_metadata_many, fort_read, fort_read_many,
+#                  decode_real_fields, copy_endf_files,
+#                  create_sublib_html,
+#                  get_fendl_sublib_table_from_htmlfile,
+#                  get_fendl_sublib_table_from_htmlfile_bs4 (the
+#                  previous BeautifulSoup implementation, skipped if
+#                  bs4 or html5lib is missing), hashstore
+#     --jobs:      number of workers of copy_endf_files and hashstore
+#     --repeat:    number of runs of each stage, the fastest is kept
+#     --save:      JSON file to store the results, e.g., as new baseline
+#     --baseline:  JSON file with results of a previous run
+#     --tolerance: allowed relative decrease of the throughput and
+#                  increase of the peak RSS (default 0.2)
+#
+############################################################
+
+import argparse
+import json
+import os
+import sys
+from utils.fendl_benchmark import (BENCHMARK_STAGES, run_benchmark,
+                                   compare_with_baseline, print_benchmark_results)
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Benchmark the stages on a synthetic tree')
+    parser.add_argument('root', help='directory of the synthetic tree')
+    parser.add_argument('--workdir', help='directory for the output of the stages')
+    parser.add_argument('--stages', help='comma-separated list of stages',
+                        default=','.join(BENCHMARK_STAGES))
+    parser.add_argument('--jobs', help='number of workers', type=int, default=1)
+    parser.add_argument('--repeat', help='number of runs of each stage',
+                        type=int, default=1)
+    parser.add_argument('--save', help='file to store the results')
+    parser.add_argument('--baseline', help='file with the results of a previous run')
+    parser.add_argument('--tolerance', help='allowed relative regression',
+                        type=float, default=0.2)
+    args = parser.parse_args()
+
+    workdir = args.workdir or os.path.join(args.root, 'benchmark')
+    results = run_benchmark(args.root, workdir, args.stages.split(','),
+                            jobs=args.jobs, repeat=args.repeat)
+    comparison = None
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        comparison = compare_with_baseline(results, baseline, args.tolerance)
+    print_benchmark_results(results, comparison)
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2)
+    if comparison is not None and comparison['regressions']:
+        print('ERROR: regressions in ' + ', '.join(comparison['regressions']))
+        sys.exit(1)
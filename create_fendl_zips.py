@@ -0,0 +1,62 @@
+############################################################
+#
+# Date:         2026/10/17
+# Institution:  IAEA
+#
+# Creates the zip files with the ENDF, ACE, GENDF and
+# MATXS files of the sublibraries in the data directory
+# of the FENDL website. The files are read directly from
+# the data directory, the members of the archives are
+# compressed in parallel and an archive is only created
+# again if its members changed since the last run.
+#
+# Usage:
+#     python create_fendl_zips.py [--jobs N] [--level L] [--force]
+#
+#     --jobs:  number of threads for the compression
+#     --level: compression level between 0 and 9 (default: 6)
+#     --force: create all zip files even if unchanged
+#
+#     These environment variables must be set:
+#       FENDL_DATA_DIR - path to data directory of FENDL website
+#       FENDL_VERSION  - version of the FENDL library
+#
+#     Optional environment variables:
+#       FENDL_STATE_DIR - directory of the member manifests,
+#                         by default $XDG_CACHE_HOME/fendl-code
+#
+############################################################
+
+import argparse
+import os
+import time
+from utils.fendl_layout import get_website_zip_bundles
+from utils.zip_bundle import build_zip
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Create the zip files of the sublibraries')
+    parser.add_argument('--jobs', help='number of compression threads',
+                        type=int, default=os.cpu_count())
+    parser.add_argument('--level', help='compression level', type=int, default=6)
+    parser.add_argument('--force', help='create unchanged zip files again',
+                        action='store_true')
+    args = parser.parse_args()
+
+    website_data_dir = os.environ['FENDL_DATA_DIR']
+    fendl_version = os.environ['FENDL_VERSION']
+
+    starttime = time.time()
+    bundles = get_website_zip_bundles(website_data_dir, fendl_version)
+    for zippath, members in bundles:
+        if not members:
+            print('skipped ' + zippath + ' (no files)')
+            continue
+        curtime = time.time()
+        created = build_zip(zippath, members, level=args.level,
+                            jobs=args.jobs, force=args.force)
+        status = 'created' if created else 'unchanged'
+        print('{} {} ({} files, {:.1f} s)'.format(
+              status, zippath, len(members), time.time() - curtime))
+    print('total time {:.1f} s'.format(time.time() - starttime))
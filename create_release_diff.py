@@ -0,0 +1,92 @@
+############################################################
+#
+# Date:         2026/10/17
+# Institution:  IAEA
+#
+# Creates in one run all files of the diffdir directory
+# for the comparison of two commits of the FENDL-ENDF
+# repository. The changed files are determined from the
+# git trees of both commits (see utils/git_changes.py),
+# the html files <endf-file>.diff.html with the differences
+# of the modified files are created by a pool of worker
+# processes, and for each directory with changed files
+# the files changes.txt and diff.html are written.
+# This replaces the sequence of 'git difftool -t annexdiff'
+# and create_sublib_difftable.py described in README.md.
+#
+# Usage:
+#     python create_release_diff.py [--jobs N] [--diffdir DIR] \
+#         <earlier-commit> <later-commit> [<path> ...]
+#
+#     <earlier-commit>: commit id or tag of the earlier version
+#     <later-commit>:   commit id or tag of the later version
+#     <path>:           restrict the comparison to these paths,
+#                       e.g., general-purpose/neutron
+#     --jobs:           number of worker processes (default: 1)
+#     --diffdir:        output directory (default: diffdir)
+#
+#     The script must be run in the root directory of the
+#     FENDL-ENDF repository. The content of the files must
+#     be available locally, e.g., via 'git annex get'.
+#
+#     Following environment variables must be set:
+#
+#       FENDL_TEMPLATE_DIR - folder with html templates
+#       FENDL_VERSION - version of FENDL library
+#       FENDL_OLD_VERSION - previous version of FENDL library
+#
+############################################################
+
+import argparse
+import os
+import time
+from utils.git_changes import get_tree_changes
+from utils.release_diff import (create_difffiles, group_by_directory,
+                                write_changes_file)
+from create_sublib_difftable import create_diff_table, write_diff_table
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Create all diff pages of a release')
+    parser.add_argument('commit1', help='earlier commit')
+    parser.add_argument('commit2', help='later commit')
+    parser.add_argument('paths', nargs='*', help='restrict comparison to paths')
+    parser.add_argument('--jobs', help='number of worker processes',
+                        type=int, default=1)
+    parser.add_argument('--diffdir', help='output directory', default='diffdir')
+    args = parser.parse_args()
+
+    fendl_version = os.environ['FENDL_VERSION']
+    fendl_old_version = os.environ['FENDL_OLD_VERSION']
+    template_dir = os.environ['FENDL_TEMPLATE_DIR']
+
+    starttime = time.time()
+    changes = get_tree_changes(args.commit1, args.commit2, args.paths)
+    counts = {s: sum(1 for c in changes if c['status'] == s) for s in 'AMDR'}
+    print('{} added, {} modified, {} deleted, {} renamed files ({:.1f} s)'.format(
+          counts['A'], counts['M'], counts['D'], counts['R'],
+          time.time() - starttime))
+
+    os.makedirs(args.diffdir, exist_ok=True)
+    results = create_difffiles(changes, args.diffdir, jobs=args.jobs)
+    difftime = time.time() - starttime
+
+    for dirname, curchanges in sorted(group_by_directory(changes).items()):
+        outdir = os.path.join(args.diffdir, dirname)
+        os.makedirs(outdir, exist_ok=True)
+        write_changes_file(curchanges, os.path.join(outdir, 'changes.txt'))
+        diff_table = create_diff_table(curchanges)
+        write_diff_table(diff_table, os.path.join(outdir, 'diff.html'),
+                         template_dir, fendl_version, fendl_old_version)
+        print('created ' + os.path.join(outdir, 'diff.html'))
+
+    failed = [r for r in results if r['error'] is not None]
+    slowest = sorted(results, key=lambda r: r['elapsed'], reverse=True)[:5]
+    if slowest:
+        print('slowest files:')
+        for res in slowest:
+            print('    {:.2f} s  {}'.format(res['elapsed'], res['filename']))
+    print('{} diff files in {:.1f} s, total time {:.1f} s, {} failed'.format(
+          len(results) - len(failed), difftime, time.time() - starttime,
+          len(failed)))
@@ -9,16 +9,24 @@
 # difference files with names <endf-file>.diff.html.
 # The file changes.txt contains the output of
 # 'git diff --name-status commit1 commit2', thus the first
-# column contains the modification type ((A)dded, (M)odified, (D)eleted)
-# and the second column the <endf-file> names relative to the root
+# column contains the modification type ((A)dded, (M)odified, (D)eleted,
+# (R)enamed) and the second column the <endf-file> names relative to the root
 # of the fendl-endf repository. This result of this script is an
-# output file diff.html with an html-table with links to the 
+# output file diff.html with an html-table with links to the
 # <endf-file>.diff.html files.
-# 
+#
+# Instead of reading changes.txt, the changes can be determined
+# from two commits with --commits, which must be run from the
+# root directory of the fendl-endf repository. The size changes
+# are then taken from the git-annex keys.
+#
 # Usage:
 #     python create_sublib_difftable.py <dir>
+#     python create_sublib_difftable.py <dir> --commits <commit1> <commit2> --path <path>
 #
-#     <dir>: directory with changes.txt and differences files 
+#     <dir>:  directory with changes.txt and differences files
+#     <path>: directory of the sublibrary in the repository,
+#             e.g., general-purpose/neutron
 #
 #     Following environment variables must be set:
 #
@@ -28,33 +36,79 @@
 #
 ############################################################
 
-import pandas as pd
+import argparse
 from jinja2 import Environment, FileSystemLoader
-import sys
 import os
+from utils.git_changes import get_tree_changes, format_size_delta, STATUS_NAMES
+
+
+def read_changes_file(diff_inpfile):
+    """Return the list of changes in changes.txt.
+
+    Each change is a dictionary with the keys status,
+    filename and oldfilename (only set for renamed files).
+    """
+    changes = []
+    with open(diff_inpfile, 'r') as f:
+        for line in f:
+            fields = line.rstrip('\n').split('\t')
+            if len(fields) < 2:
+                continue
+            changes.append({'status': fields[0][0], 'filename': fields[-1],
+                            'oldfilename': fields[1] if len(fields) > 2 else None})
+    return changes
+
+
+def create_diff_table(changes):
+    """Return the rows of the table in the template from a list of changes"""
+    diff_table = []
+    for change in changes:
+        diff_table.append({
+            'status': STATUS_NAMES.get(change['status'], change['status']),
+            'filename': change['filename'],
+            'oldfilename': change.get('oldfilename'),
+            'link': os.path.basename(change['filename']) + '.diff.html',
+            'size_change': format_size_delta(change.get('size_delta'))})
+    return diff_table
+
+
+def write_diff_table(diff_table, html_outfile, template_dir,
+                     fendl_version, fendl_old_version):
+    """Render the table with the template and write it to html_outfile"""
+    env = Environment(loader=FileSystemLoader(template_dir))
+    tmpl = env.get_template('diff_table.jinja')
+    html_output = tmpl.render(change_list=diff_table,
+            fendl_version=fendl_version, fendl_old_version=fendl_old_version)
+    with open(html_outfile, 'w+') as f:
+        f.write(html_output)
+
+
+if __name__ == '__main__':
 
-# path to data directory of FENDL website
-if len(sys.argv) != 2:
-    raise ValueError('Please provide path to diffdir')
+    parser = argparse.ArgumentParser(description='Create html table with changed files')
+    parser.add_argument('diffdir', help='directory with changes.txt and difference files')
+    parser.add_argument('--commits', nargs=2, help='determine changes from two commits')
+    parser.add_argument('--path', help='restrict the changes to this path', default=None)
+    args = parser.parse_args()
 
-fendl_version = os.environ['FENDL_VERSION']
-fendl_old_version = os.environ['FENDL_OLD_VERSION']
+    fendl_version = os.environ['FENDL_VERSION']
+    fendl_old_version = os.environ['FENDL_OLD_VERSION']
 
-diffdir = sys.argv[1]
-# path to folder with jinja html templates
-env = Environment(loader=FileSystemLoader(os.environ['FENDL_TEMPLATE_DIR']))
-tmpl = env.get_template('diff_table.jinja')
+    diffdir = args.diffdir
+    # path to folder with jinja html templates
+    template_dir = os.environ['FENDL_TEMPLATE_DIR']
 
-diff_inpfile = os.path.join(diffdir, 'changes.txt')
-html_outfile = os.path.join(diffdir, 'diff.html')
+    if args.commits is not None:
+        paths = [args.path] if args.path is not None else []
+        changes = get_tree_changes(args.commits[0], args.commits[1], paths)
+    else:
+        diff_inpfile = os.path.join(diffdir, 'changes.txt')
+        changes = read_changes_file(diff_inpfile)
+    html_outfile = os.path.join(diffdir, 'diff.html')
 
-diff_table = pd.read_table(diff_inpfile, header=None)
-diff_table.columns = ['status', 'filename']
-diff_table['status'] = diff_table['status'].replace({'A': 'added', 'M': 'modified', 'D': 'deleted'})
-diff_table['link'] = [os.path.basename(fname) + '.diff.html' for fname in diff_table['filename']]
-print(diff_table)
+    diff_table = create_diff_table(changes)
+    for row in diff_table:
+        print('{:<10} {:<60} {}'.format(row['status'], row['filename'], row['size_change']))
 
-html_output = tmpl.render(change_df=diff_table,
-        fendl_version=fendl_version, fendl_old_version=fendl_old_version)
-with open(html_outfile, 'w+') as f:
-    f.write(html_output)
+    write_diff_table(diff_table, html_outfile, template_dir,
+                     fendl_version, fendl_old_version)
@@ -14,8 +14,25 @@
 # to these files will be inserted on the html sites of the sublibraries.
 # This script makes use of jinja templates for the html files.
 #
+# In incremental mode, a manifest with fingerprints of all
+# inputs of each sublibrary page is compared with the one of
+# the previous run: the ENDF files, the listings of the
+# directories with derived files, the template and the
+# environment variables below. Only pages whose inputs changed
+# are recreated and only the metadata of changed ENDF files
+# is extracted again.
+#
 # Usage:
-#     python create_sublib_table_websites.py
+#     python create_sublib_table_websites.py [--incremental] [--manifest FILE]
+#                                            [--catalog FILE]
+#
+#     --incremental: only recreate pages whose inputs changed
+#     --manifest:    manifest file, by default in FENDL_STATE_DIR
+#                    or $XDG_CACHE_HOME/fendl-code, outside of
+#                    FENDL_DATA_DIR
+#     --catalog:     catalog created by fendl_catalog.py, the
+#                    metadata of ENDF files found there is
+#                    not extracted again
 #
 #     Following environment variables must be set:
 #
@@ -26,15 +43,31 @@
 #       FENDL_VERSION  - new version of the FENDL library
 #       FENDL_OLD_VERSION - old version of library
 #
+#     Optional environment variables:
+#
+#       FENDL_METADATA_CACHE - path to an SQLite file to cache
+#                              the metadata of the ENDF files
+#       FENDL_RUN_REPORT     - path of a JSON file (or directory)
+#                              for a report with timings and I/O
+#                              statistics
+#       FENDL_STATE_DIR      - directory of the manifest file
+#
 ############################################################
 
 from utils.endf_metadata import get_endf_metadata
-from utils.rename_endf import rename_endf_files
+from utils.rename_endf import EndfNamingContext
+from utils.metadata_cache import get_active_cache
+from utils.site_manifest import (get_entry_signature, get_state_path, hash_items,
+                                 load_manifest, save_manifest)
+from utils.dir_index import DirectoryIndex
+from utils.endf_catalog import EndfCatalog
+from utils.instrumentation import stage, count
 
 from jinja2 import Environment, FileSystemLoader
 from os import walk, environ
-from os.path import join, isfile, basename, dirname
-import glob
+from os.path import join, isfile, basename, dirname, getsize
+import argparse
+import json
 
 # path to data directory of FENDL website
 data_dir = environ['FENDL_DATA_DIR']
@@ -102,8 +135,60 @@ sublib_dic = {
 
 # utility functions
 
-def create_sublib_html(sublib_spec):
-    """take a dic with paths and create html file"""
+def list_endf_files(endf_dir):
+    """return the names of the files in endf_dir"""
+    endf_file_paths = []
+    for (dirpath, dirnames, filenames) in walk(endf_dir):
+        endf_file_paths.extend(filenames)
+        break
+    return endf_file_paths
+
+
+def get_derived_file_index(sublib_spec):
+    """list all directories with derived files once"""
+    derived_dirs = set(dirname(p) for p in sublib_spec.get('derived_files', {}).values())
+    return DirectoryIndex(sublib_spec['html_dir'], sorted(derived_dirs))
+
+
+def get_sublib_fingerprint(sublib_spec, endf_file_paths, derived_index=None):
+    """return the signatures of the ENDF files and a digest of all inputs"""
+    endf_dir = sublib_spec['endf_dir']
+    if derived_index is None:
+        derived_index = get_derived_file_index(sublib_spec)
+    signatures = {f: get_entry_signature(join(endf_dir, f)) for f in endf_file_paths}
+    changepath = join(data_dir, sublib_spec['diff_dir'], 'diff.html')
+    with open(sublib_spec['template'].filename, 'r') as f:
+        template_source = f.read()
+    items = ['FENDL_VERSION=' + fendl_version,
+             'FENDL_OLD_VERSION=' + fendl_old_version,
+             'FENDL_DIFF_DIR=' + reldiff_dir,
+             'diff.html=' + str(isfile(changepath)),
+             'template=' + template_source,
+             'patterns=' + json.dumps(sublib_spec.get('derived_files', {}), sort_keys=True)]
+    items.extend('endf=' + f + ':' + signatures[f] for f in sorted(signatures))
+    for curdir in sorted(derived_index.names):
+        fnames = derived_index.listdir(curdir)
+        items.extend('derived=' + curdir + '/' + f for f in fnames)
+    return signatures, hash_items(items)
+
+
+def create_sublib_html(sublib_spec, endf_file_paths=None, signatures=None,
+                       prev_files=None, derived_index=None, catalog=None):
+    """take a dic with paths and create html file
+
+    The metadata of ENDF files whose signature matches the one
+    in prev_files (from the manifest) is reused. Otherwise, it
+    is taken from the catalog if given and the file is found
+    there. Return a dictionary with signature and metadata
+    of each ENDF file.
+    """
+    with stage('create_sublib_html'):
+        return _create_sublib_html(sublib_spec, endf_file_paths, signatures,
+                                   prev_files, derived_index, catalog)
+
+
+def _create_sublib_html(sublib_spec, endf_file_paths, signatures,
+                        prev_files, derived_index, catalog):
     endf_dir = sublib_spec['endf_dir']
     template = sublib_spec['template']
     html_dir = sublib_spec['html_dir']
@@ -114,27 +199,43 @@ def create_sublib_html(sublib_spec):
     changefile_url = join('..', changefile) if isfile(changepath) else None
 
     # get all endf files
-    endf_file_paths = []
-    endf_metadata_list = []
-    for (dirpath, dirnames, filenames) in walk(endf_dir):
-        endf_file_paths.extend(filenames)
-        break
+    if endf_file_paths is None:
+        endf_file_paths = list_endf_files(endf_dir)
+    if signatures is None:
+        signatures = {}
+    if prev_files is None:
+        prev_files = {}
+    if derived_index is None:
+        derived_index = get_derived_file_index(sublib_spec)
+    file_entries = {}
+    nreused = 0
     # get the metadata
     endf_metadata_list = []
     for curf in endf_file_paths:
         curpath = join(endf_dir, curf)
-        cur_metadata = get_endf_metadata(curpath)
+        prev = prev_files.get(curf)
+        if prev is not None and prev['signature'] == signatures.get(curf):
+            cur_metadata = dict(prev['metadata'])
+            nreused += 1
+        else:
+            cur_metadata = catalog.lookup(curpath) if catalog is not None else None
+            if cur_metadata is None:
+                cur_metadata = get_endf_metadata(curpath)
+        if curf in signatures:
+            file_entries[curf] = {'signature': signatures[curf],
+                                  'metadata': dict(cur_metadata)}
+        # derive all names from a single read of the header
+        naming = EndfNamingContext(cur_metadata, orig_fpath=curpath)
         cur_metadata['filename'] = curf
         # find associated derived files
         if 'derived_files' in sublib_spec:
             cur_metadata['derived_files'] = {}
             dfiles = cur_metadata['derived_files']
             for ftype, fpat in sublib_spec['derived_files'].items():
-                fapp_path = rename_endf_files([curpath], name_template=fpat,
-                                              name_only=True)
+                fapp_path = naming.render(fpat)
                 if '?' in fapp_path or '*' in fapp_path:
-                    dfiles[ftype] = get_gendf_gam_list(html_dir, fapp_path)
-                elif isfile(join(html_dir, fapp_path)):
+                    dfiles[ftype] = get_gendf_gam_list(derived_index, fapp_path)
+                elif derived_index.isfile(fapp_path):
                     dfiles[ftype] = fapp_path
                 else:
                     print('WARNING: could not find ' + join(html_dir, fapp_path))
@@ -154,18 +255,23 @@ def create_sublib_html(sublib_spec):
         metadata_el['idx'] = idx
         metadata_el['EMAX_STR'] = '{:.2e}'.format(metadata_el['EMAX'])
 
-    html_output = template.render(changefile_url=changefile_url, endf_metadata_list=endf_metadata_list,
-            fendl_version=fendl_version, fendl_old_version=fendl_old_version)
-    with open(html_outfile, 'w+') as f:
+    with stage('render'):
+        html_output = template.render(changefile_url=changefile_url, endf_metadata_list=endf_metadata_list,
+                fendl_version=fendl_version, fendl_old_version=fendl_old_version)
+    count('files_opened')
+    with open(html_outfile, 'w') as f:
         f.write(html_output)
+    count('bytes_written', getsize(html_outfile))
+    if nreused > 0:
+        print('reused metadata of {} of {} ENDF files'.format(nreused, len(endf_file_paths)))
+    count('metadata_reused', nreused)
+    return file_entries
 
 
-def get_gendf_gam_list(dir, template):
+def get_gendf_gam_list(derived_index, template):
     """Get isotopes of photo-atomic library"""
     subdir = dirname(template)
-    full_template = join(dir, template)
-    fpaths = glob.glob(full_template)
-    fpaths = sorted(fpaths)
+    fpaths = derived_index.glob(template)
     items = [
         {
           'name': basename(p)[4:7],
@@ -179,5 +285,36 @@ def get_gendf_gam_list(dir, template):
 # main routine
 if __name__ == '__main__':
 
+    parser = argparse.ArgumentParser(description='Create html index files of the sublibraries')
+    parser.add_argument('--incremental', help='only recreate pages whose inputs changed',
+                        action='store_true')
+    parser.add_argument('--manifest', help='file with fingerprints of the inputs',
+                        default=get_state_path(data_dir, '.sublib_manifest.json'))
+    parser.add_argument('--catalog', help='catalog with the metadata of the ENDF files')
+    args = parser.parse_args()
+
+    catalog = EndfCatalog(args.catalog) if args.catalog else None
+
+    manifest = load_manifest(args.manifest)
+    sublib_entries = manifest.setdefault('sublibs', {})
     for sublib in sublib_dic:
-        create_sublib_html(sublib_dic[sublib])
+        sublib_spec = sublib_dic[sublib]
+        endf_file_paths = list_endf_files(sublib_spec['endf_dir'])
+        derived_index = get_derived_file_index(sublib_spec)
+        signatures, digest = get_sublib_fingerprint(sublib_spec, endf_file_paths,
+                                                    derived_index)
+        prev = sublib_entries.get(sublib) if args.incremental else None
+        html_outfile = join(sublib_spec['html_dir'], 'index.html')
+        if prev is not None and prev['digest'] == digest and isfile(html_outfile):
+            print('skipping ' + sublib + ' because its inputs did not change')
+            continue
+        print('creating ' + html_outfile)
+        prev_files = prev['files'] if prev is not None else None
+        file_entries = create_sublib_html(sublib_spec, endf_file_paths,
+                                          signatures, prev_files, derived_index,
+                                          catalog)
+        sublib_entries[sublib] = {'digest': digest, 'files': file_entries}
+        save_manifest(args.manifest, manifest)
+
+    if get_active_cache() is not None:
+        get_active_cache().print_stats()
@@ -0,0 +1,89 @@
+############################################################
+#
+# Date:         2026/10/17
+# Institution:  IAEA
+#
+# Builds and queries a catalog with the header information
+# of the ENDF files of several sublibraries and library
+# versions (see utils/endf_catalog.py).
+#
+# Usage:
+#     python fendl_catalog.py build <catalog> <endf-dir> [<endf-dir> ...] \
+#         [--version V] [--sublib NAME] [--jobs N]
+#     python fendl_catalog.py query <catalog> [<condition> ...] \
+#         [--version V] [--sublib NAME] [--fields F1,F2,...] [--count]
+#
+#     <catalog>:   SQLite file with the catalog
+#     <endf-dir>:  directory with the ENDF files of a sublibrary
+#     <condition>: comparison of a column with a value, e.g.,
+#                  'EMAX>1.5e8', 'NLIB=33' or 'EVAL_DATE>=2019-01'
+#     --version:   label of the library version, e.g., 3.2
+#     --sublib:    name of the sublibrary, by default the name of
+#                  the directory (or its parent for <sublib>/endf)
+#     --jobs:      number of processes to extract the metadata
+#     --fields:    columns to print (default: sublib,MAT,ZSYMAM,filename)
+#     --count:     only print the number of matching entries
+#
+#     Columns are the header fields returned by get_endf_metadata,
+#     e.g., ZA, MAT, NLIB, NSUB, EMAX, EDATE, and version, sublib,
+#     path, filename, size, annex_key and EVAL_DATE (EDATE as YYYY-MM).
+#
+#     Optional environment variables:
+#
+#       FENDL_METADATA_CACHE - path to an SQLite file to cache
+#                              the metadata of the ENDF files
+#
+############################################################
+
+import argparse
+import os
+import time
+from utils.endf_catalog import EndfCatalog, get_sublib_name
+from utils.fendl_layout import list_dir_files
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Build and query a catalog of ENDF files')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build_parser = subparsers.add_parser('build', help='add directories to the catalog')
+    build_parser.add_argument('catalog', help='catalog file')
+    build_parser.add_argument('endf_dirs', nargs='+', help='directories with ENDF files')
+    build_parser.add_argument('--version', help='library version', default='')
+    build_parser.add_argument('--sublib', help='name of the sublibrary')
+    build_parser.add_argument('--jobs', help='number of worker processes',
+                              type=int, default=1)
+    query_parser = subparsers.add_parser('query', help='print matching entries')
+    query_parser.add_argument('catalog', help='catalog file')
+    query_parser.add_argument('conditions', nargs='*', help='conditions, e.g., NLIB=33')
+    query_parser.add_argument('--version', help='library version')
+    query_parser.add_argument('--sublib', help='name of the sublibrary')
+    query_parser.add_argument('--fields', help='comma-separated columns to print',
+                              default='sublib,MAT,ZSYMAM,filename')
+    query_parser.add_argument('--count', help='print the number of entries only',
+                              action='store_true')
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        if args.sublib is not None and len(args.endf_dirs) > 1:
+            raise ValueError('--sublib can only be used with a single directory')
+        with EndfCatalog(args.catalog) as catalog:
+            for endf_dir in args.endf_dirs:
+                starttime = time.time()
+                sublib = args.sublib or get_sublib_name(endf_dir)
+                fpaths = [os.path.join(endf_dir, f) for f in list_dir_files(endf_dir)]
+                counts = catalog.update(fpaths, sublib, args.version, jobs=args.jobs)
+                print('{}: {} added, {} unchanged, {} removed, {} skipped ({:.1f} s)'.format(
+                      sublib, counts['added'], counts['unchanged'], counts['removed'],
+                      counts['skipped'], time.time() - starttime))
+    else:
+        fields = args.fields.split(',')
+        with EndfCatalog(args.catalog) as catalog:
+            rows = catalog.query(args.conditions, sublib=args.sublib,
+                                 version=args.version)
+        if args.count:
+            print(len(rows))
+        else:
+            print('\t'.join(fields))
+            for row in rows:
+                print('\t'.join(str(row[f]) for f in fields))
@@ -0,0 +1,88 @@
+############################################################
+#
+# Date:         2026/10/17
+# Institution:  IAEA
+#
+# Python counterpart of hash_store_ops.sh for many files.
+# It can do the same things:
+#
+# (1) It can store files in a directory with their names
+#     changed to the sha256 cryptographic hash of their
+#     content. Only files not yet in the directory are
+#     copied. With --trust-keys, the hash in the name of
+#     git-annex objects is used.
+#
+# (2) It can associate symbolic links in a git-annex
+#     repository with weburls that point to a directory
+#     with files as created in (1).
+#
+# Directories given as <path> are searched recursively,
+# for regular files in mode 'store' and for symbolic
+# links in the other modes.
+#
+# Usage:
+#     python hash_store_ops.py store [--trust-keys] [--jobs N] <hashstore-dir> <path> ...
+#     python hash_store_ops.py associate [--jobs N] <weburl> <path> ...
+#     python hash_store_ops.py print_association <weburl> <path> ...
+#
+#     <hashstore-dir>: directory to be used as hashstore
+#     <weburl>:        url pointing to a directory with a hashstore
+#     <path>:          files or directories to be processed
+#
+# Example:
+#     python hash_store_ops.py store --trust-keys \
+#         <path-to-hashstore> .git/annex/objects
+#
+############################################################
+
+import argparse
+import os
+from utils.hashstore import store_files, get_hashstore_url
+from utils.annex_utils import register_urls, print_register_stats
+
+
+def find_paths(paths, want_links):
+    """Return the files (or symbolic links) in paths and their subdirectories"""
+    found = []
+    for path in paths:
+        if not os.path.isdir(path) or os.path.islink(path):
+            found.append(path)
+            continue
+        for root, dirs, files in os.walk(path):
+            links = [d for d in dirs if os.path.islink(os.path.join(root, d))]
+            dirs[:] = sorted(d for d in dirs if d != '.git' and d not in links)
+            for fname in sorted(files + links):
+                fpath = os.path.join(root, fname)
+                if os.path.islink(fpath) == want_links:
+                    found.append(fpath)
+    return found
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Store files in a hashstore')
+    parser.add_argument('mode', choices=('store', 'associate', 'print_association'))
+    parser.add_argument('hashdir', help='hashstore directory or url', type=str)
+    parser.add_argument('paths', help='files or directories', nargs='+')
+    parser.add_argument('--trust-keys', help='use the hash in git-annex keys',
+                        action='store_true')
+    parser.add_argument('--jobs', help='number of parallel threads',
+                        type=int, default=4)
+    args = parser.parse_args()
+
+    if args.mode == 'store':
+        if not os.path.isdir(args.hashdir):
+            raise ValueError('hashstore directory ' + args.hashdir + ' does not exist')
+        fpaths = find_paths(args.paths, want_links=False)
+        counts = store_files(args.hashdir, fpaths, trust_keys=args.trust_keys,
+                             jobs=args.jobs)
+        print('{stored} stored, {skipped} skipped, {failed} failed'.format(**counts))
+    else:
+        fpaths = find_paths(args.paths, want_links=True)
+        url_file_pairs = [(get_hashstore_url(args.hashdir, f), f) for f in fpaths]
+        if args.mode == 'print_association':
+            for url, fpath in url_file_pairs:
+                print(url + ' ' + fpath)
+        else:
+            stats = register_urls(url_file_pairs, mode='verify', jobs=args.jobs)
+            print_register_stats(stats)
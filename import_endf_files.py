@@ -21,16 +21,23 @@
 #  renaming functionality from the command line..
 #
 # Usage:
-#     python import_endf_files.py <inp-dir> <out-dir>
+#     python import_endf_files.py [--jobs N] [--report FILE] [--formats F1,F2]
+#                                 <inp-dir> <out-dir>
 #
 #     <inp-dir>: path to data directory of FENDL library
 #     <out-dir>: path to data directory of FENDL repository
+#     --jobs:    number of worker processes
+#     --report:  write the outcome for each file as JSON to FILE
+#     --formats: formats of the files to copy as determined from
+#                their content (default: endf,pendf,gendf)
 #
 ############################################################
 
 import argparse
+import json
 import os
 from utils.import_endf_files import copy_endf_files
+from utils.file_sniffer import ENDF_FORMATS
 
 if __name__ == "__main__":
 
@@ -42,6 +49,11 @@ if __name__ == "__main__":
     parser.add_argument('--template', help='template for new names of ENDF files in output directory',
                         nargs='?', type=str, default='[proj]_[matcode]_[fullsym].endf')
     parser.add_argument('-n', help='print information without copying', action='store_true')
+    parser.add_argument('--jobs', help='number of worker processes', type=int, default=1)
+    parser.add_argument('--report', help='write the result for each file as JSON to this file',
+                        type=str, default=None)
+    parser.add_argument('--formats', help='comma-separated formats of the files to copy',
+                        type=str, default=','.join(ENDF_FORMATS))
     args = parser.parse_args()
 
     inpdir = args.inpdir
@@ -50,5 +62,9 @@ if __name__ == "__main__":
     pattern = args.pat
     dry_run = args.n
 
-    copy_endf_files(inpdir, outdir, pattern=pattern,
-            name_template=template, dry_run=dry_run)
+    results = copy_endf_files(inpdir, outdir, pattern=pattern,
+            name_template=template, dry_run=dry_run, jobs=args.jobs,
+            formats=tuple(args.formats.split(',')))
+    if args.report is not None:
+        with open(args.report, 'w') as f:
+            json.dump(results, f, indent=2)
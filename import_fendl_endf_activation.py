@@ -11,10 +11,16 @@
 # directories for compliance with YODA principles [1].
 #
 # Usage:
-#     python import_endf.py <inp-dir> <out-dir>
+#     python import_fendl_endf_activation.py [-n] [--jobs N] <inp-dir> <out-dir>
 #
-#     <inp-dir>: path to data directory of FENDL library
-#     <out-dir>: path to data directory of FENDL repository
+#     <inp-dir>:     path to data directory of FENDL library
+#     <out-dir>:     path to data directory of FENDL repository
+#     -n, --dry-run: print the planned changes without applying them
+#     -j, --jobs:    number of worker processes (default: 1)
+#
+# Files in the repository whose normalized content is
+# unchanged are not written again, so that a second import
+# of the same data does not modify the repository.
 #
 # NOTE:
 #     This script in its current form is not useful
@@ -28,20 +34,27 @@
 #
 ############################################################
 
+import argparse
 import os
-import sys
-import shutil
-from utils.endf_metadata import is_endf_file
-from utils.import_endf_files import copy_endf_files
+from utils.import_endf_files import (import_endf_files, print_import_stats,
+                                     remove_stale_dirs)
+from utils.file_sniffer import ENDF_FORMATS
 
 
 def main():
 
-    if (len(sys.argv) < 3):
-        raise ValueError
+    parser = argparse.ArgumentParser(
+        description='Import the activation ENDF files of the FENDL library')
+    parser.add_argument('inpdir', help='path to data directory of FENDL library', type=str)
+    parser.add_argument('outdir', help='path to data directory of FENDL repository', type=str)
+    parser.add_argument('-n', '--dry-run', help='print the planned changes without applying them',
+                        action='store_true')
+    parser.add_argument('-j', '--jobs', help='number of worker processes', type=int, default=1)
+    args = parser.parse_args()
 
-    inpdir = os.path.normpath(sys.argv[1])
-    outdir = os.path.normpath(sys.argv[2])
+    dry_run = args.dry_run
+    inpdir = os.path.normpath(args.inpdir)
+    outdir = os.path.normpath(args.outdir)
 
     if inpdir == outdir:
         print('input and output directory cannot be the same')
@@ -79,19 +92,18 @@ def main():
 
     # check that all required input directories are available
     check_if_dirs_exist(activ_lib_inpdirs)
-    # clean existing output directories
-    shutil.rmtree(activ_lib_outdir, ignore_errors=True)
-
-    # create the output directories
-    os.mkdir(activ_lib_outdir)
-    for k, curpath in activ_lib_outdirs.items():
-        os.makedirs(curpath)
+    # remove output directories of libraries no longer imported
+    if os.path.isdir(activ_lib_outdir):
+        remove_stale_dirs(activ_lib_outdir, activ_lib_outdirs.values(), dry_run)
 
-    # traverse input dirs and transfer endf files
-    # to output directories in repository
+    # traverse input dirs and bring the output directories
+    # in the repository up to date with the endf files
     for cur_inpdir, cur_outdir in activ_lib_outdirs.items():
-        copy_endf_files(cur_inpdir, cur_outdir,
-            name_template='[fbase]_[proj]_[matcode]_[fullsym].endf')
+        plan, stats = import_endf_files(cur_inpdir, cur_outdir,
+            name_template='[fbase]_[proj]_[matcode]_[fullsym].endf',
+            dry_run=dry_run, jobs=args.jobs, formats=(os.path.basename(cur_inpdir),))
+        print_import_stats(stats, dry_run)
+        check_formats(plan, os.path.basename(cur_inpdir))
 
 
 ##################################################
@@ -106,6 +118,14 @@ def check_if_dirs_exist(dirs):
             raise ValueError
 
 
+def check_formats(results, expected):
+    """Warn about files skipped because they are not in the expected format"""
+    for res in results:
+        if res['status'] == 'skipped' and res['format'] in ENDF_FORMATS:
+            print('WARNING: ' + res['source'] + ' is a ' + res['format'] +
+                  ' file instead of a ' + expected + ' file and is not imported')
+
+
 ##################################################
 #  start up
 ##################################################
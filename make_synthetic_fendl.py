@@ -0,0 +1,83 @@
+############################################################
+#
+# Date:         2026/10/17
+# Institution:  IAEA
+#
+# Creates a synthetic FENDL tree for benchmarks without
+# access to the real library (see utils/synthetic_fendl.py):
+#
+#     <root>/raw/<sublib>/         ENDF files as received
+#     <root>/data/<sublib>/        website data directory with
+#                                  ENDF and derived files
+#     <root>/legacy/<sublib>.html  tables of the previous website
+#
+# Usage:
+#     python make_synthetic_fendl.py <root> [--materials N] \
+#         [--sublibs neutron,proton,deuteron,atom] \
+#         [--min-size SIZE] [--max-size SIZE] [--derived-size SIZE] \
+#         [--crlf-fraction F] [--blank-fraction F] [--junk-files N] \
+#         [--seed N] [--jobs N]
+#
+#     <root>:           directory to be created
+#     --materials:      number of materials per sublibrary
+#     --sublibs:        comma-separated list of sublibraries
+#     --min-size:       minimal size of the ENDF files, e.g., 64k
+#     --max-size:       maximal size of the ENDF files, e.g., 200M
+#     --derived-size:   size of each derived file
+#     --crlf-fraction:  fraction of raw files with CRLF line endings
+#     --blank-fraction: fraction of raw files with blank lines
+#     --junk-files:     number of files per sublibrary that are
+#                       not ENDF files
+#     --seed:           seed of the random content
+#     --jobs:           number of worker processes
+#
+############################################################
+
+import argparse
+import os
+import time
+from utils.synthetic_fendl import create_synthetic_fendl, parse_size
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Create a synthetic FENDL tree')
+    parser.add_argument('root', help='directory of the synthetic tree')
+    parser.add_argument('--materials', help='number of materials per sublibrary',
+                        type=int, default=20)
+    parser.add_argument('--sublibs', help='comma-separated list of sublibraries',
+                        default='neutron,proton,deuteron,atom')
+    parser.add_argument('--min-size', help='minimal size of the ENDF files',
+                        default='64k')
+    parser.add_argument('--max-size', help='maximal size of the ENDF files',
+                        default='4M')
+    parser.add_argument('--derived-size', help='size of each derived file',
+                        default='4k')
+    parser.add_argument('--crlf-fraction', help='fraction of files with CRLF',
+                        type=float, default=0.25)
+    parser.add_argument('--blank-fraction', help='fraction of files with blank lines',
+                        type=float, default=0.25)
+    parser.add_argument('--junk-files', help='number of files that are not ENDF files',
+                        type=int, default=2)
+    parser.add_argument('--seed', help='seed of the random content',
+                        type=int, default=0)
+    parser.add_argument('--jobs', help='number of worker processes',
+                        type=int, default=1)
+    args = parser.parse_args()
+
+    if os.path.exists(args.root) and os.listdir(args.root):
+        raise ValueError('directory ' + args.root + ' is not empty')
+    starttime = time.time()
+    info = create_synthetic_fendl(args.root, materials=args.materials,
+                                  sublibs=args.sublibs.split(','),
+                                  min_size=parse_size(args.min_size),
+                                  max_size=parse_size(args.max_size),
+                                  derived_size=parse_size(args.derived_size),
+                                  crlf_fraction=args.crlf_fraction,
+                                  blank_fraction=args.blank_fraction,
+                                  junk_files=args.junk_files,
+                                  seed=args.seed, jobs=args.jobs)
+    for sublib, entry in info['sublibs'].items():
+        nbytes = sum(res['size'] for res in entry['files'])
+        print('{}: {} ENDF files with {:,} bytes'.format(sublib, len(entry['files']), nbytes))
+    print('created {} in {:.1f} s'.format(args.root, time.time() - starttime))
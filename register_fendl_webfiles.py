@@ -12,14 +12,37 @@
 # It registers all the website file as external special remote
 # in git-annex.
 #
+# Alternatively, with --fendl-dirs, the files in the
+# directories of the FENDL-Processed repository are associated
+# with the corresponding directories below the website url.
+# The script must then be run from the root directory of
+# the repository.
+#
+# All urls are passed to a single git-annex process in
+# batch mode. Urls already registered for a file are skipped
+# so that the script can be run again after an interruption.
+#
 # Usage:
-#     python register_fendl_webfiles.py <website-url> <data-dir> <copy-log-file>
+#     python register_fendl_webfiles.py [options] <website-url> <data-dir> <copy-log-file>
+#     python register_fendl_webfiles.py [options] --fendl-dirs <website-url>
 #
 #     <website-url>:   website url to the FENDL library version
 #     <data-dir>:      directory under git-annex control with ENDF files
 #     <copy-log-file>: file containing the file associations between
 #                      FENDL website and local directory
 #
+#     Options:
+#       --mode:  fast (default), relaxed or verify; verify
+#                downloads the files to check their content
+#       --jobs:  number of urls processed in parallel by git-annex
+#       -n:      only print the urls that would be registered
+#
+#     Optional environment variables:
+#
+#       FENDL_RUN_REPORT - path of a JSON file (or directory) for
+#                          a report with timings and subprocess
+#                          statistics
+#
 # Example:
 #     python register_fendl_webfiles.py \
 #        https://www-nds.iaea.org/fendl31/data/ \
@@ -27,29 +50,113 @@
 #
 ############################################################
 
-import sys
+import argparse
+import os
 import re
 import subprocess
+import time
+from utils.annex_utils import register_urls, print_register_stats
+from utils.instrumentation import stage, run_subprocess
+from utils.fendl_layout import FENDL_WEB_DIRS, list_dir_files
+
+
+def read_copy_log(copyfile, website_root, data_dir):
+    """Return the tuples (url, filepath) listed in a copy log"""
+    with open(copyfile, 'r') as f:
+        lines = f.read().splitlines()
+        lines = [l for l in lines if not re.match(r'^ *#', l)]
+        file_assoc = [tuple(l.split('\t')) for l in lines]
+    return [(website_root + webfile, data_dir + datafile)
+            for webfile, datafile in file_assoc]
+
+
+def scan_fendl_dirs(website_root, dir_assoc=FENDL_WEB_DIRS):
+    """Return the tuples (url, filepath) of the files in the repository"""
+    website_root = website_root.rstrip('/')
+    url_file_pairs = []
+    for curdir, weburl in dir_assoc:
+        if not os.path.isdir(curdir):
+            print('skipping missing directory ' + curdir)
+            continue
+        for fname in list_dir_files(curdir):
+            url_file_pairs.append((website_root + '/' + weburl + '/' + fname,
+                                   os.path.join(curdir, fname)))
+    return url_file_pairs
+
+
+def _find_repository_root(curdir):
+    """Return the nearest directory above curdir containing .git or None"""
+    curdir = os.path.abspath(curdir)
+    while not os.path.lexists(os.path.join(curdir, '.git')):
+        parent = os.path.dirname(curdir)
+        if parent == curdir:
+            return None
+        curdir = parent
+    return curdir
+
 
-if len(sys.argv) != 4:
-    raise ValueError('Expecting three arguments: <website-url> <data-dir> <copy-log-file>')
+def split_by_repository(url_file_pairs):
+    """Group the tuples (url, filepath) by the git repository of the file.
 
-website_root = sys.argv[1]
-data_dir = sys.argv[2]
-copyfile = sys.argv[3]
+    Files in submodules belong to a different git-annex repository.
+    The repository of a directory is the nearest one containing .git,
+    so that git rev-parse is only run once per repository.
+    Return a dictionary mapping the root directory of each repository
+    to the tuples with file paths relative to it.
+    """
+    roots = {}
+    toplevels = {}
+    groups = {}
+    for url, fpath in url_file_pairs:
+        curdir = os.path.dirname(fpath) or '.'
+        if curdir not in roots:
+            roots[curdir] = _find_repository_root(curdir) or curdir
+        root = roots[curdir]
+        if root not in toplevels:
+            toplevels[root] = run_subprocess(
+                ['git', 'rev-parse', '--show-toplevel'], cwd=root,
+                check=True, stdout=subprocess.PIPE, text=True).stdout.strip()
+        toplevel = toplevels[root]
+        relpath = os.path.relpath(os.path.abspath(fpath), toplevel)
+        groups.setdefault(toplevel, []).append((url, relpath))
+    return groups
 
-# read the file associations
-with open(copyfile, 'r') as f:
-    lines = f.read().splitlines()
-    lines = [l for l in lines if not re.match(r'^ *#', l)]
-    file_assoc = [tuple(l.split('\t')) for l in lines]
 
+if __name__ == '__main__':
 
-for cur_file_assoc in file_assoc:
+    parser = argparse.ArgumentParser(description='Register website urls in git-annex')
+    parser.add_argument('website_url', help='website url to the FENDL library version')
+    parser.add_argument('data_dir', nargs='?', help='directory under git-annex control')
+    parser.add_argument('copy_log', nargs='?', help='file with the file associations')
+    parser.add_argument('--fendl-dirs', help='scan the directories of FENDL-Processed',
+                        action='store_true')
+    parser.add_argument('--mode', help='fast, relaxed or verify', type=str,
+                        choices=('fast', 'relaxed', 'verify'), default='fast')
+    parser.add_argument('--jobs', help='number of urls processed in parallel',
+                        type=int, default=1)
+    parser.add_argument('-n', help='print urls without registering them', action='store_true')
+    args = parser.parse_args()
 
-    webfile = website_root + cur_file_assoc[0]
-    datafile = data_dir + cur_file_assoc[1]
+    if args.fendl_dirs:
+        if args.data_dir is not None:
+            raise ValueError('Expecting only the argument <website-url> with --fendl-dirs')
+        url_file_pairs = scan_fendl_dirs(args.website_url)
+    else:
+        if args.copy_log is None:
+            raise ValueError('Expecting three arguments: <website-url> <data-dir> <copy-log-file>')
+        url_file_pairs = read_copy_log(args.copy_log, args.website_url, args.data_dir)
 
-    print('\nAttaching remote source ' + webfile + ' to ' + datafile)
-    subprocess.run(['git-annex', 'addurl', '--fast', '--file', datafile, webfile],
-                   check=True)
+    print('Attaching remote sources to {} files'.format(len(url_file_pairs)))
+    starttime = time.time()
+    total_stats = {'registered': 0, 'skipped': 0, 'failed': 0, 'not_annexed': 0}
+    with stage('split_by_repository'):
+        groups = split_by_repository(url_file_pairs)
+    for repodir, curpairs in groups.items():
+        print('Processing repository ' + repodir)
+        with stage('register_urls'):
+            stats = register_urls(curpairs, mode=args.mode, jobs=args.jobs,
+                                  cwd=repodir, dry_run=args.n)
+        for k in total_stats:
+            total_stats[k] += stats[k]
+    total_stats['elapsed'] = time.time() - starttime
+    print_register_stats(total_stats)
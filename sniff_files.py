@@ -0,0 +1,53 @@
+############################################################
+#
+# Date:         2026/10/17
+# Institution:  IAEA
+#
+# Determines the format of ENDF and derived files from
+# their content, e.g., ENDF, PENDF, GENDF, ACE (type 1 or
+# type 2), xsdir, MATXS, NJOY input and output, and prints
+# it for each file (see utils/file_sniffer.py).
+#
+# Usage:
+#     python sniff_files.py [--jobs N] [--summary] [-r] <path> [<path> ...]
+#
+#     <path>:    file or directory
+#     --jobs:    number of worker processes
+#     --summary: only print the number of files of each format
+#     -r:        include the files in subdirectories
+#
+############################################################
+
+import argparse
+import os
+from utils.file_sniffer import sniff_directory, sniff_files
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Determine the format of files')
+    parser.add_argument('paths', nargs='+', help='files or directories')
+    parser.add_argument('--jobs', help='number of worker processes', type=int, default=1)
+    parser.add_argument('--summary', help='print the number of files of each format',
+                        action='store_true')
+    parser.add_argument('-r', help='include subdirectories', action='store_true')
+    args = parser.parse_args()
+
+    results = []
+    fpaths = [p for p in args.paths if not os.path.isdir(p)]
+    results.extend(sniff_files(fpaths, jobs=args.jobs))
+    for path in args.paths:
+        if os.path.isdir(path):
+            results.extend(sniff_directory(path, jobs=args.jobs, recursive=args.r))
+
+    if args.summary:
+        counts = {}
+        for res in results:
+            label = res.format + ('/' + res.variant if res.variant else '')
+            counts[label] = counts.get(label, 0) + 1
+        for label in sorted(counts):
+            print('{:>8} {}'.format(counts[label], label))
+    else:
+        for res in results:
+            label = res.format + ('/' + res.variant if res.variant else '')
+            print('{:<16} {}'.format(label, res.path))
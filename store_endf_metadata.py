@@ -11,29 +11,105 @@
 # as metadata via git-annex metadata. The search works
 # recursively and descends into subdirectories.
 #
+# A single git-annex process in batch mode is used for all
+# files. The metadata already stored in git-annex is
+# compared with the metadata in the ENDF header and only
+# fields with changed values are written.
+#
 # Usage:
-#     python store_endf_metadata.py <data-dir>
+#     python store_endf_metadata.py [--jobs N] [-n] <data-dir>
 #
 #     <data-dir>: directory with ENDF files
+#     --jobs:     number of processes to extract the metadata
+#     -n:         print the changes without writing them
+#
+#     Optional environment variables:
 #
-############################################################import subprocess
+#       FENDL_METADATA_CACHE - path to an SQLite file to cache
+#                              the metadata of the ENDF files
+#       FENDL_RUN_REPORT     - path of a JSON file (or directory)
+#                              for a report with timings, I/O
+#                              and subprocess statistics
+#
+############################################################
+
+import argparse
 import os
-import sys
-import subprocess
+from concurrent.futures import ProcessPoolExecutor
 from utils.endf_metadata import get_endf_metadata
+from utils.metadata_cache import get_active_cache
+from utils.instrumentation import stage, executor_map
+from utils.annex_utils import (AnnexMetadataBatch, metadata_to_annex_fields,
+                               diff_annex_fields)
+
+
+def find_files(data_dir):
+    """Return the paths of all files in data_dir and its subdirectories"""
+    fpaths = []
+    for root, dirs, files in os.walk(data_dir):
+        dirs.sort()
+        for fname in sorted(files):
+            fpaths.append(os.path.join(root, fname))
+    return fpaths
+
+
+def store_endf_metadata(fpaths, jobs=1, dry_run=False):
+    """Write the ENDF metadata of files to git-annex if changed.
+
+    The headers are read by jobs worker processes while
+    the results are passed to git-annex in the original order.
+    Return a dictionary with the number of updated, unchanged
+    and skipped files.
+    """
+    counts = {'updated': 0, 'unchanged': 0, 'skipped': 0}
+    if jobs == 1:
+        meta_iter = map(get_endf_metadata, fpaths)
+        executor = None
+    else:
+        executor = ProcessPoolExecutor(max_workers=jobs)
+        meta_iter = executor_map(executor, get_endf_metadata, fpaths, chunksize=16)
+    try:
+        with AnnexMetadataBatch() as annex:
+            for fpath, meta_dic in zip(fpaths, meta_iter):
+                if meta_dic is None:
+                    counts['skipped'] += 1
+                    continue
+                current = annex.get_fields(fpath)
+                if current is None:
+                    print('skipping ' + fpath + ' because not annexed')
+                    counts['skipped'] += 1
+                    continue
+                desired = metadata_to_annex_fields(meta_dic)
+                changes = diff_annex_fields(desired, current)
+                if not changes:
+                    counts['unchanged'] += 1
+                    continue
+                print('adding metadata for ' + fpath + ' (' +
+                      ', '.join(sorted(changes)) + ')')
+                if not dry_run:
+                    annex.set_fields(fpath, changes)
+                counts['updated'] += 1
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return counts
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Store ENDF metadata in git-annex')
+    parser.add_argument('datadir', help='directory with ENDF files', type=str)
+    parser.add_argument('--jobs', help='number of processes to read ENDF headers',
+                        type=int, default=1)
+    parser.add_argument('-n', help='print changes without writing them', action='store_true')
+    args = parser.parse_args()
+
+    data_dir = os.path.normpath(args.datadir)
+    with stage('find_files'):
+        fpaths = find_files(data_dir)
+    with stage('store_endf_metadata'):
+        counts = store_endf_metadata(fpaths, jobs=args.jobs, dry_run=args.n)
+    print('{updated} updated, {unchanged} unchanged, {skipped} skipped'.format(**counts))
 
-if (len(sys.argv) != 2):
-    raise ValueError('Expecting one argument being the path to ENDF directory')
-
-data_dir = os.path.normpath(sys.argv[1])
-for root, dirs, files in os.walk(data_dir):
-    for fname in files:
-        fpath = os.path.join(root, fname)
-        meta_dic = get_endf_metadata(fpath)
-        # add the metadata to the annex
-        if meta_dic is not None:
-            print('adding metadata for ' + fpath)
-            annex_args = ['-s{}={}'.format(k, v) for k, v in meta_dic.items()]
-            annex_cmd = ['git-annex', 'metadata', fpath]
-            annex_cmd.extend(annex_args)
-            subprocess.run(annex_cmd)
+    if get_active_cache() is not None:
+        get_active_cache().print_stats()
@@ -0,0 +1,50 @@
+############################################################
+#
+# Date:         2026/10/17
+# Institution:  IAEA
+#
+# Transfers the ENDF and derived files of the repository
+# to the data directory of the FENDL website using the
+# directory layout of the website. Only files that changed
+# since the last run are transferred and only files that
+# no longer exist in the repository are deleted.
+#
+# Usage:
+#     python sync_website_data.py [--method M] [-n]
+#
+#     --method: copy (default), hardlink or reflink
+#     -n:       print the planned actions without executing them
+#
+#     These environment variables must be set:
+#       FENDL_DATA_DIR - path to data directory of FENDL website
+#       FENDL_REPO_DIR - path to FENDL repository
+#
+#     Optional environment variables:
+#       FENDL_STATE_DIR - directory of the state file,
+#                         by default $XDG_CACHE_HOME/fendl-code
+#
+############################################################
+
+import argparse
+import os
+import time
+from utils.website_sync import (SYNC_METHODS, sync_website_data,
+                                print_sync_stats)
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Update the website data directory')
+    parser.add_argument('--method', help='copy, hardlink or reflink',
+                        choices=SYNC_METHODS, default='copy')
+    parser.add_argument('-n', help='print the planned actions only', action='store_true')
+    args = parser.parse_args()
+
+    website_data_dir = os.environ['FENDL_DATA_DIR']
+    repo_dir = os.environ['FENDL_REPO_DIR']
+
+    starttime = time.time()
+    stats = sync_website_data(repo_dir, website_data_dir,
+                              method=args.method, dry_run=args.n)
+    print_sync_stats(stats, dry_run=args.n)
+    print('total time {:.1f} s'.format(time.time() - starttime))
@@ -8,8 +8,9 @@
 # Utility functions to retrieve the information of ENDF
 # files stored in their header or to retrieve the same
 # information from a html website with a table of a particle
-# sublibrary, and functions to compare these differences.
-# 
+# sublibrary or from a catalog created by fendl_catalog.py,
+# and functions to compare these differences.
+#
 #
 # Usage:
 #     <command-call>
@@ -19,65 +20,178 @@
 ############################################################
 
 
-from utils import rename_endf, endf_metadata
-from bs4 import BeautifulSoup
-import html5lib
-import re
+from utils import endf_metadata
+from html.parser import HTMLParser
 import os
 import argparse
 
 
-def get_fendl_sublib_table_from_dir(endf_dir):
+def _get_table_entry(fname, meta_data):
+    return {
+        'FILE': fname,
+        'MAT': meta_data['MAT'],
+        'ZSYMAM': meta_data['ZSYMAM'],
+        'ALAB': meta_data['ALAB'],
+        'EDATE': meta_data['EDATE'],
+        'AUTH': meta_data['AUTH'].replace(' and ',',').replace(' ',''),
+        'HSUB_LIB': meta_data['HSUB_LIB'],
+        'EMAX': '{:e}'.format(float(meta_data['EMAX']))
+    }
+
+
+def get_fendl_sublib_table_from_dir(endf_dir, catalog=None):
     file_list = []
     for root, dirs, files in os.walk(endf_dir):
         for file in files:
             file_list.append(os.path.join(root, file))
     isolist = {}
-    for file in file_list:
-        meta_data = endf_metadata.get_endf_metadata(file)
+    if catalog is not None:
+        # only read the headers of files missing in the catalog
+        meta_data_list = [catalog.lookup(f) for f in file_list]
+        missing = [i for i, m in enumerate(meta_data_list) if m is None]
+        extracted = endf_metadata.get_endf_metadata_many([file_list[i] for i in missing])
+        for i, meta_data in zip(missing, extracted):
+            meta_data_list[i] = meta_data
+    else:
+        meta_data_list = endf_metadata.get_endf_metadata_many(file_list)
+    for file, meta_data in zip(file_list, meta_data_list):
         if file.endswith('_.txt'):
             continue
         if meta_data is None:
             print('problem with ' + str(file))
         else:
-            isolist[meta_data['MAT']] = {
-                'FILE': os.path.basename(file),
-                'MAT': meta_data['MAT'],
-                'ZSYMAM': meta_data['ZSYMAM'],
-                'ALAB': meta_data['ALAB'],
-                'EDATE': meta_data['EDATE'],
-                'AUTH': meta_data['AUTH'].replace(' and ',',').replace(' ',''),
-                'HSUB_LIB': meta_data['HSUB_LIB'],
-                'EMAX': '{:e}'.format(float(meta_data['EMAX']))
-            }
+            isolist[meta_data['MAT']] = _get_table_entry(os.path.basename(file), meta_data)
+    return isolist
+
+
+def get_fendl_sublib_table_from_catalog(catalog, sublib, version=None):
+    isolist = {}
+    for row in catalog.query(sublib=sublib, version=version):
+        meta_data = catalog.get_metadata(row)
+        isolist[meta_data['MAT']] = _get_table_entry(row['filename'], meta_data)
     return isolist
 
 
-def get_fendl_sublib_table_from_htmlfile(endf_table_file):
+class _SublibTableParser(HTMLParser):
+    """Collect the td texts of the rows in the first tbody element.
+
+    Only rows with a bgcolor attribute are collected. Like html5lib,
+    rows of a table without tbody element are treated as part of
+    an implicit tbody element and omitted end tags of td and tr
+    elements are tolerated. The flag done is set as soon as the
+    first tbody element has ended.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.rows = []
+        self.done = False
+        self._table_depth = 0
+        self._body_depth = None
+        self._in_section = False
+        self._row = None
+        self._cell = None
+
+    def _end_cell(self):
+        if self._cell is not None:
+            self._row.append(''.join(self._cell))
+            self._cell = None
+
+    def _end_row(self):
+        self._end_cell()
+        if self._row is not None:
+            self.rows.append(self._row)
+            self._row = None
+
+    def _end_body(self):
+        self._end_row()
+        self.done = True
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        if tag == 'table':
+            self._table_depth += 1
+            return
+        if self._table_depth == 0:
+            return
+        if self._body_depth is None:
+            if tag in ('thead', 'tfoot'):
+                self._in_section = True
+            elif tag == 'tbody' or (tag == 'tr' and not self._in_section):
+                self._body_depth = self._table_depth
+                self._in_section = False
+            if tag != 'tr' or self._body_depth is None:
+                return
+        if self._table_depth != self._body_depth:
+            return
+        if tag in ('tbody', 'thead', 'tfoot'):
+            self._end_body()
+        elif tag == 'tr':
+            self._end_row()
+            if any(name == 'bgcolor' for name, _ in attrs):
+                self._row = []
+        elif tag in ('td', 'th'):
+            self._end_cell()
+            if tag == 'td' and self._row is not None:
+                self._cell = []
+
+    def handle_endtag(self, tag):
+        if self.done:
+            return
+        if tag == 'table':
+            if self._table_depth == self._body_depth:
+                self._end_body()
+            self._table_depth = max(self._table_depth - 1, 0)
+        elif self._body_depth is None:
+            if tag in ('thead', 'tfoot'):
+                self._in_section = False
+        elif self._table_depth == self._body_depth:
+            if tag == 'tbody':
+                self._end_body()
+            elif tag == 'tr':
+                self._end_row()
+            elif tag in ('td', 'th'):
+                self._end_cell()
+
+    def handle_data(self, data):
+        if self._cell is not None:
+            self._cell.append(data)
+
+
+def _get_html_table_entry(cells):
+    """Return the table entry of the td texts of a row"""
+    cur_info = {}
+    for idx, text in enumerate(cells):
+        if idx == 1:
+            cur_info['MAT'] = text.strip()
+        elif idx == 2:
+            cur_info['ZSYMAM'] = text.strip()
+        elif idx == 3:
+            cur_info['ALAB'] = text.strip()
+        elif idx == 4:
+            cur_info['EDATE'] = text.strip()
+        elif idx == 5:
+            cur_info['AUTH'] = text.strip().replace(' and ',',').replace(' ','')
+        elif idx == 6:
+            cur_info['HSUB_LIB'] = text.strip()
+        elif idx == 7:
+            cur_info['EMAX'] = '{:e}'.format(float(text.strip()))
+    return cur_info
+
+
+def get_fendl_sublib_table_from_htmlfile(endf_table_file, chunksize=2**16):
+    parser = _SublibTableParser()
     with open(endf_table_file) as f:
-            content = f.read()
-            soup = BeautifulSoup(content, 'html5lib')
-    tbody_el = soup.find('tbody')
-    tr_els = tbody_el.find_all('tr', {'bgcolor': re.compile(r'.*')})
-    isolist = {} 
-    for tr_el in tr_els:
-        td_els = tr_el.find_all('td')
-        cur_info = {}
-        for idx, td_el in enumerate(td_els):
-            if idx == 1:
-                cur_info['MAT'] = td_el.text.strip()
-            elif idx == 2:
-                cur_info['ZSYMAM'] = td_el.text.strip()
-            elif idx == 3:
-                cur_info['ALAB'] = td_el.text.strip()
-            elif idx == 4:
-                cur_info['EDATE'] = td_el.text.strip()
-            elif idx == 5:
-                cur_info['AUTH'] = td_el.text.strip().replace(' and ',',').replace(' ','')
-            elif idx == 6:
-                cur_info['HSUB_LIB'] = td_el.text.strip()
-            elif idx == 7:
-                cur_info['EMAX'] = '{:e}'.format(float(td_el.text.strip()))
+        # stop reading as soon as the table has been parsed
+        for chunk in iter(lambda: f.read(chunksize), ''):
+            parser.feed(chunk)
+            if parser.done:
+                break
+    parser.close()
+    isolist = {}
+    for cells in parser.rows:
+        cur_info = _get_html_table_entry(cells)
         isolist[cur_info['MAT']] = cur_info
     return isolist
 
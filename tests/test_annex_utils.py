@@ -0,0 +1,158 @@
+############################################################
+#
+# Date:         2026/10/17
+# Institution:  IAEA
+#
+# Tests of the registration of urls in a git-annex
+# repository. If git-annex is not installed, a small
+# stand-in answering 'whereis' and 'addurl' in batch mode
+# is put on the PATH.
+#
+############################################################
+
+import hashlib
+import os
+import shutil
+import subprocess
+import sys
+import pytest
+import register_fendl_webfiles
+from utils.annex_utils import register_urls, get_registered_urls
+
+
+ANNEX_STANDIN = '''#!{python}
+import json
+import os
+import sys
+
+args = sys.argv[1:]
+statefile = os.path.join(os.environ['ANNEX_STANDIN_DIR'], 'urls.json')
+urls = {{}}
+if os.path.isfile(statefile):
+    with open(statefile) as f:
+        urls = json.load(f)
+
+def get_key(fpath):
+    if not os.path.islink(fpath):
+        return None
+    target = os.readlink(fpath)
+    return os.path.basename(target) if '.git/annex/objects' in target else None
+
+for line in sys.stdin:
+    line = line.rstrip('\\n')
+    if args[0] == 'whereis':
+        key = get_key(line)
+        if key is None:
+            print('', flush=True)
+            continue
+        response = {{'file': line, 'success': True, 'untrusted': [],
+                    'whereis': [{{'urls': urls.get(key, [])}}]}}
+    elif args[0] == 'addurl':
+        url, fpath = line.split(' ', 1)
+        key = get_key(fpath)
+        success = key is not None
+        if success and url.startswith('file://'):
+            success = os.path.isfile(url[len('file://'):])
+        if success:
+            urls.setdefault(key, []).append(url)
+            with open(statefile, 'w') as f:
+                json.dump(urls, f)
+        response = {{'command': 'addurl', 'file': fpath, 'success': success}}
+    print(json.dumps(response), flush=True)
+'''
+
+
+def _git(repodir, *args):
+    subprocess.run(['git', '-c', 'user.name=test', '-c', 'user.email=test@test',
+                    '-C', repodir] + list(args), check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def _make_annex(repodir, contents):
+    """Create a git-annex repository with the given files"""
+    os.makedirs(repodir)
+    _git(repodir, 'init', '-q')
+    real_annex = 'ANNEX_STANDIN_DIR' not in os.environ
+    if real_annex:
+        _git(repodir, 'annex', 'init', 'test')
+    for relpath, content in contents.items():
+        fpath = os.path.join(repodir, relpath)
+        os.makedirs(os.path.dirname(fpath), exist_ok=True)
+        if real_annex:
+            with open(fpath, 'wb') as f:
+                f.write(content)
+            _git(repodir, 'annex', 'add', relpath)
+            continue
+        key = 'SHA256E-s{}--{}.endf'.format(len(content),
+                                            hashlib.sha256(content).hexdigest())
+        objpath = os.path.join(repodir, '.git', 'annex', 'objects', key, key)
+        os.makedirs(os.path.dirname(objpath), exist_ok=True)
+        with open(objpath, 'wb') as f:
+            f.write(content)
+        os.symlink(os.path.relpath(objpath, os.path.dirname(fpath)), fpath)
+    _git(repodir, 'add', '-A')
+    _git(repodir, 'commit', '-q', '-m', 'add files')
+
+
+@pytest.fixture
+def annex_env(tmp_path, monkeypatch):
+    if shutil.which('git-annex') is None:
+        bindir = tmp_path / 'bin'
+        bindir.mkdir()
+        script = bindir / 'git-annex'
+        script.write_text(ANNEX_STANDIN.format(python=sys.executable))
+        script.chmod(0o755)
+        monkeypatch.setenv('PATH', str(bindir) + os.pathsep + os.environ['PATH'])
+        monkeypatch.setenv('ANNEX_STANDIN_DIR', str(tmp_path))
+    return tmp_path
+
+
+def test_register_file_urls(annex_env):
+    webdir = annex_env / 'web'
+    webdir.mkdir()
+    contents = {'neutron/a.endf': b'a\n', 'neutron/b.endf': b'b\n'}
+    for relpath, content in contents.items():
+        (webdir / os.path.basename(relpath)).write_bytes(content)
+    repodir = str(annex_env / 'repo')
+    _make_annex(repodir, contents)
+    with open(os.path.join(repodir, 'plain.txt'), 'w') as f:
+        f.write('not annexed\n')
+
+    pairs = [('file://' + str(webdir / os.path.basename(p)), p) for p in contents]
+    pairs.append(('file://' + str(webdir / 'plain.txt'), 'plain.txt'))
+    stats = register_urls(pairs, mode='relaxed', cwd=repodir)
+    assert (stats['registered'], stats['skipped'], stats['failed'],
+            stats['not_annexed']) == (2, 0, 0, 1)
+    urls = get_registered_urls(sorted(contents), cwd=repodir)
+    assert urls == {p: {u} for u, p in pairs[:2]}
+
+    stats = register_urls(pairs, mode='relaxed', cwd=repodir)
+    assert (stats['registered'], stats['skipped']) == (0, 2)
+
+
+def test_split_by_repository_runs_rev_parse_once_per_repository(tmp_path, monkeypatch):
+    repodir = tmp_path / 'repo'
+    subdir = repodir / 'sub'
+    (repodir / 'a' / 'b').mkdir(parents=True)
+    (subdir / 'c').mkdir(parents=True)
+    _git(str(repodir), 'init', '-q')
+    _git(str(subdir), 'init', '-q')
+    calls = []
+    run_subprocess = register_fendl_webfiles.run_subprocess
+
+    def counting_run_subprocess(cmd, **kwargs):
+        calls.append(kwargs['cwd'])
+        return run_subprocess(cmd, **kwargs)
+
+    monkeypatch.setattr(register_fendl_webfiles, 'run_subprocess',
+                        counting_run_subprocess)
+    fpaths = [repodir / 'x.endf', repodir / 'a' / 'y.endf',
+              repodir / 'a' / 'b' / 'z.endf', subdir / 'c' / 'w.endf']
+    pairs = [('url' + str(i), str(p)) for i, p in enumerate(fpaths)]
+    groups = register_fendl_webfiles.split_by_repository(pairs)
+    assert len(calls) == 2
+    toplevel = os.path.realpath(str(repodir))
+    subtoplevel = os.path.realpath(str(subdir))
+    assert groups[toplevel] == [('url0', 'x.endf'), ('url1', 'a/y.endf'),
+                                ('url2', 'a/b/z.endf')]
+    assert groups[subtoplevel] == [('url3', 'c/w.endf')]
@@ -0,0 +1,184 @@
+############################################################
+#
+# Date:         2026/10/17
+# Institution:  IAEA
+#
+# Round trips of ENDF records written by EndfRecordWriter
+# through EndfRecordReader, fort_read_many and fort_read.
+#
+############################################################
+
+import io
+import numpy as np
+import pytest
+from utils.endf_records import (EndfRecordReader, EndfRecordWriter,
+                                format_endf_floats)
+from utils.fortran_utils import fort_read, fort_read_many
+
+
+# values that are exactly representable in the ENDF fields
+EDGE_VALUES = [0.0, -0.0, 1.0, -1.0, 1.234567e5, -1.234567e5,
+               2.5e-3, -7.654321e-9, 1.234567e10, -1.23456e10,
+               9.87654e-10, -1.2345e-10, 1.23456e99, -1.2345e-100,
+               1.23456e100, 4.2e-300]
+
+CONT_FORMAT = '(2E11.0,4I11,I4,I2,I3,I5)'
+DATA_FORMAT = '(6E11.0,I4,I2,I3,I5)'
+
+
+def _write(func, start_line=1):
+    buf = io.StringIO()
+    writer = EndfRecordWriter(buf, 2625, 3, 1, start_line=start_line)
+    func(writer)
+    return buf.getvalue()
+
+
+def _read_data_lines(lines, nvalues):
+    """Return the first nvalues floats of data lines read by fort_read_many"""
+    data = fort_read_many(lines, DATA_FORMAT, as_dict=True)
+    values = np.column_stack([data['f{}'.format(i)] for i in range(6)]).ravel()
+    return values[:nvalues]
+
+
+def _fields(text):
+    return [f.tobytes().decode('ascii') for f in format_endf_floats(text)]
+
+
+@pytest.mark.parametrize('value, expected', [
+    (0.0, ' 0.000000+0'),
+    (-0.0, ' 0.000000+0'),
+    (1.0, ' 1.000000+0'),
+    (-1.5e-5, '-1.500000-5'),
+    (1.234567e10, '1.234567+10'),
+    (-1.234567e10, '-1.23457+10'),
+    (1.234567e-10, '1.234567-10'),
+    (-1.234567e-10, '-1.23457-10'),
+    (1.2345e100, '1.23450+100'),
+    (-1.2345e-100, '-1.2345-100'),
+    (9.9999999e9, '1.000000+10'),
+    (-9.9999999e9, '-1.00000+10'),
+    (9.99999996, ' 1.000000+1'),
+    (9.9999994e-10, '9.999999-10'),
+    (9.99999996e-10, ' 1.000000-9'),
+])
+def test_format_endf_floats(value, expected):
+    assert _fields([value]) == [expected]
+
+
+def test_format_endf_floats_rejects_invalid_values():
+    with pytest.raises(ValueError):
+        format_endf_floats([np.inf])
+    with pytest.raises(ValueError):
+        format_endf_floats([1.0, np.nan])
+
+
+def test_cont_round_trip():
+    text = _write(lambda w: w.write_cont(-1.234567e10, 0.0, 1, -2, 3, 99999))
+    assert len(text.splitlines()[0]) == 80
+    reader = EndfRecordReader(text)
+    assert reader.read_cont() == (-1.23457e10, 0.0, 1, -2, 3, 99999)
+    assert reader.at_end()
+    values = fort_read(text.splitlines()[0], CONT_FORMAT)
+    assert values == [-1.23457e10, 0.0, 1, -2, 3, 99999, 2625, 3, 1, 1]
+    values = fort_read_many(text, CONT_FORMAT)
+    assert values[0].tolist() == (-1.23457e10, 0.0, 1, -2, 3, 99999, 2625, 3, 1, 1)
+
+
+def test_fort_read_many_rejects_duplicate_names():
+    text = _write(lambda w: w.write_cont(1.0, 2.0, 1, 2, 3, 4))
+    varnames = ['C1', 'C2', 'L1', 'L2', 'N1', 'N2', 'MAT', 'MF', 'MT', 'MT']
+    with pytest.raises(ValueError):
+        fort_read_many(text, CONT_FORMAT, varnames=varnames)
+
+
+def test_list_round_trip():
+    text = _write(lambda w: w.write_list(1.0, 2.0, 0, 1, 7, EDGE_VALUES))
+    reader = EndfRecordReader(text)
+    cont, values = reader.read_list()
+    assert cont == (1.0, 2.0, 0, 1, len(EDGE_VALUES), 7)
+    np.testing.assert_allclose(values, EDGE_VALUES, rtol=1e-14, atol=0)
+    assert reader.at_end()
+    lines = text.splitlines()
+    read_back = []
+    for line in lines[1:]:
+        read_back.extend(v for v in fort_read(line, DATA_FORMAT)[:6] if v is not None)
+    np.testing.assert_allclose(read_back[:len(EDGE_VALUES)], EDGE_VALUES,
+                               rtol=1e-14, atol=0)
+    np.testing.assert_allclose(_read_data_lines(lines[1:], len(EDGE_VALUES)),
+                               EDGE_VALUES, rtol=1e-14, atol=0)
+
+
+def test_tab1_round_trip():
+    y = np.array(EDGE_VALUES)
+    x = 1.0e-5 * np.arange(1, len(y) + 1)
+    text = _write(lambda w: w.write_tab1(0.0, -1.0, 0, 0, [3, len(x)], [2, 5], x, y))
+    reader = EndfRecordReader(text)
+    cont, nbt, interp, xr, yr = reader.read_tab1()
+    assert cont == (0.0, -1.0, 0, 0, 2, len(x))
+    assert list(nbt) == [3, len(x)] and list(interp) == [2, 5]
+    np.testing.assert_allclose(xr, x, rtol=1e-14, atol=0)
+    np.testing.assert_allclose(yr, y, rtol=1e-14, atol=0)
+    assert reader.at_end()
+    lines = text.splitlines()
+    assert fort_read(lines[1], '(4I11)') == [3, 2, len(x), 5]
+    pairs = []
+    for line in lines[2:]:
+        pairs.extend(v for v in fort_read(line, DATA_FORMAT)[:6] if v is not None)
+    # blank fields after the last pair are read as zero
+    pairs = pairs[:2*len(x)]
+    np.testing.assert_allclose(pairs[1::2], yr, rtol=1e-14, atol=0)
+    np.testing.assert_allclose(pairs[0::2], xr, rtol=1e-14, atol=0)
+    pairs = _read_data_lines(lines[2:], 2*len(x))
+    np.testing.assert_allclose(pairs[1::2], y, rtol=1e-14, atol=0)
+    np.testing.assert_allclose(pairs[0::2], x, rtol=1e-14, atol=0)
+
+
+def test_tab2_round_trip():
+    def write(w):
+        w.write_tab2(0.0, 0.0, 0, 0, [2], [1], 2)
+        w.write_list(0.0, 1.0e-5, 0, 0, 0, [1.0, -2.0, 3.0])
+        w.write_list(0.0, 2.0e7, 0, 0, 0, [4.0, 5.0])
+    text = _write(write)
+    reader = EndfRecordReader(text)
+    cont, nbt, interp = reader.read_tab2()
+    assert cont == (0.0, 0.0, 0, 0, 1, 2)
+    assert list(nbt) == [2] and list(interp) == [1]
+    energies = []
+    for i in range(cont[5]):
+        subcont, values = reader.read_list()
+        energies.append(subcont[1])
+    assert energies == [1.0e-5, 2.0e7]
+    assert list(values) == [4.0, 5.0]
+    assert reader.at_end()
+    assert fort_read(text.splitlines()[0], CONT_FORMAT)[4:6] == [1, 2]
+
+
+def test_large_record_in_chunks():
+    values = np.linspace(-1.0e6, 1.0e6, 60001)
+    buf = io.BytesIO()
+    writer = EndfRecordWriter(buf, 125, 3, 2, chunk_lines=7)
+    writer.write_list(0.0, 0.0, 0, 0, 0, values)
+    reader = EndfRecordReader(buf.getvalue())
+    cont, read_back = reader.read_list()
+    np.testing.assert_allclose(read_back, values, rtol=5e-7, atol=0)
+    lines = buf.getvalue().decode('ascii').splitlines()[1:]
+    np.testing.assert_array_equal(_read_data_lines(lines, len(values)), read_back)
+    assert writer.line_number == 1 + 1 + 10001
+
+
+def test_line_numbers_wrap_around():
+    text = _write(lambda w: w.write_list(0.0, 0.0, 0, 0, 0, np.arange(18.0)),
+                  start_line=99998)
+    lines = text.splitlines()
+    assert [l[75:80] for l in lines] == ['99998', '99999', '    0', '    1']
+    assert [fort_read(l, '(66X,I4,I2,I3,I5)')[3] for l in lines] == [99998, 99999, 0, 1]
+    assert all(l[66:75] == '2625 3  1' for l in lines)
+
+
+def test_text_and_send_records():
+    def write(w):
+        w.write_text('synthetic material')
+        w.write_send()
+    lines = _write(write, start_line=5).splitlines()
+    assert lines[0] == '{:<66}2625 3  1    5'.format('synthetic material')
+    assert fort_read(lines[1], CONT_FORMAT) == [0.0, 0.0, 0, 0, 0, 0, 2625, 3, 0, 99999]
@@ -0,0 +1,53 @@
+############################################################
+#
+# Date:         2026/10/17
+# Institution:  IAEA
+#
+# Tests of the functions to store files in a hashstore.
+#
+############################################################
+
+import hashlib
+import os
+from utils.hashstore import store_files, HASH_PREFIX, HASHINFO_FILE
+
+
+def _write(path, content):
+    with open(path, 'wb') as f:
+        f.write(content)
+
+
+def test_store_files_skips_existing_without_copy(tmp_path):
+    hashdir = tmp_path / 'hashstore'
+    hashdir.mkdir()
+    fpath = str(tmp_path / 'a.endf')
+    _write(fpath, b'content a\n')
+    filehash = HASH_PREFIX + hashlib.sha256(b'content a\n').hexdigest()
+
+    counts = store_files(str(hashdir), [fpath], verbose=False)
+    assert counts == {'stored': 1, 'skipped': 0, 'failed': 0}
+    mtime = os.stat(hashdir / filehash).st_mtime_ns
+
+    counts = store_files(str(hashdir), [fpath], verbose=False)
+    assert counts == {'stored': 0, 'skipped': 1, 'failed': 0}
+    assert os.stat(hashdir / filehash).st_mtime_ns == mtime
+    assert sorted(os.listdir(hashdir)) == sorted([filehash, HASHINFO_FILE])
+    with open(hashdir / HASHINFO_FILE) as f:
+        assert f.read() == 2 * (filehash + ' a.endf\n')
+
+
+def test_store_files_counts_inconsistent_files(tmp_path):
+    hashdir = tmp_path / 'hashstore'
+    hashdir.mkdir()
+    fpath_a = str(tmp_path / 'a.endf')
+    fpath_b = str(tmp_path / 'b.endf')
+    _write(fpath_a, b'content a\n')
+    _write(fpath_b, b'content b\n')
+    filehash = HASH_PREFIX + hashlib.sha256(b'content a\n').hexdigest()
+    _write(str(hashdir / filehash), b'corrupted\n')
+
+    counts = store_files(str(hashdir), [fpath_a, fpath_b], verbose=False)
+    assert counts == {'stored': 1, 'skipped': 0, 'failed': 1}
+    with open(hashdir / HASHINFO_FILE) as f:
+        assert f.read().split() == [
+            HASH_PREFIX + hashlib.sha256(b'content b\n').hexdigest(), 'b.endf']
@@ -0,0 +1,91 @@
+############################################################
+#
+# Date:         2026/10/17
+# Institution:  IAEA
+#
+# Tests of the creation of deterministic zip archives.
+#
+############################################################
+
+import os
+import shutil
+import subprocess
+import zipfile
+import pytest
+from utils import zip_bundle
+from utils.fendl_layout import find_website_files, get_website_zip_bundles
+from utils.zip_bundle import build_zip
+
+
+def _make_data_dir(data_dir):
+    files = {
+        'neutron/endf/n_001-H-1.endf': b' 1.001000+3 9.991673-1\n' * 500,
+        'neutron/endf/sub/n_002-He-4.endf': b'incompressible',
+        'neutron/group/n_001-H-1.g': b'gendf\n' * 100,
+        'neutron/group/n_001-H-1.m': b'matxs\n' * 100,
+        'atom/group/p_001-H-0.gam': b'gam\n' * 100,
+    }
+    for relpath, content in files.items():
+        fpath = os.path.join(data_dir, relpath)
+        os.makedirs(os.path.dirname(fpath), exist_ok=True)
+        with open(fpath, 'wb') as f:
+            f.write(content)
+    os.makedirs(os.path.join(data_dir, 'neutron', 'endf', 'empty'))
+    return files
+
+
+def _check_zip(zippath, data_dir, names):
+    with zipfile.ZipFile(zippath) as zf:
+        assert zf.testzip() is None
+        assert sorted(zf.namelist()) == sorted(names)
+        for zinfo in zf.infolist():
+            fpath = os.path.join(data_dir, zinfo.filename)
+            if zinfo.is_dir():
+                assert os.path.isdir(fpath)
+                continue
+            with open(fpath, 'rb') as f:
+                assert zf.read(zinfo) == f.read()
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv('FENDL_STATE_DIR', str(tmp_path / 'state'))
+    data_dir = str(tmp_path / 'data')
+    _make_data_dir(data_dir)
+    return data_dir
+
+
+@pytest.mark.skipif(shutil.which('zip') is None, reason='zip not available')
+def test_build_zip_has_layout_of_zip_r(data_dir, tmp_path, monkeypatch):
+    # spill all compressed members to temporary files
+    monkeypatch.setattr(zip_bundle, '_SPILL_SIZE', 16)
+    refpath = str(tmp_path / 'ref.zip')
+    subprocess.run(['zip', '-qr', refpath, 'neutron/endf'],
+                   cwd=data_dir, check=True)
+    with zipfile.ZipFile(refpath) as zf:
+        refnames = zf.namelist()
+
+    zippath = str(tmp_path / 'endf.zip')
+    members = find_website_files(data_dir, 'neutron/endf', include_dirs=True)
+    assert build_zip(zippath, members, jobs=2)
+    _check_zip(zippath, data_dir, refnames)
+    assert not build_zip(zippath, members, jobs=2)
+
+
+def test_build_zip_of_website_bundles(data_dir, tmp_path):
+    bundles = dict(get_website_zip_bundles(data_dir, '3.2'))
+    zippath = os.path.join(data_dir, 'neutron', 'fendl-3.2-neutron-gendf.zip')
+    assert build_zip(zippath, bundles[zippath], jobs=2)
+    with zipfile.ZipFile(zippath) as zf:
+        assert zf.testzip() is None
+        assert zf.namelist() == ['neutron/group/', 'neutron/group/n_001-H-1.g',
+                                 'neutron/group/p_001-H-0.gam']
+
+
+def test_write_zip_zip64(data_dir, tmp_path):
+    members = find_website_files(data_dir, 'neutron', include_dirs=True)
+    zippath = str(tmp_path / 'zip64.zip')
+    with open(zippath, 'wb') as fout:
+        zip_bundle._write_zip(fout, sorted(members, key=lambda m: m[1]),
+                              6, 2, zip64=True)
+    _check_zip(zippath, data_dir, [m[1] for m in members])
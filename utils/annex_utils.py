@@ -0,0 +1,215 @@
+############################################################
+#
+# Date:         2026/10/17
+# Institution:  IAEA
+#
+# Helpers to talk to long-running git-annex processes
+# in batch mode. Instead of launching one git-annex
+# process per file, requests are written line by line
+# to the standard input of a single process and the
+# JSON responses are read from its standard output.
+#
+############################################################
+
+import json
+import subprocess
+import threading
+import time
+from .instrumentation import count, record_subprocess
+
+
+class AnnexBatch(object):
+    """A git-annex command running in batch mode with JSON output."""
+
+    def __init__(self, args, cwd=None):
+        self.cmd = ['git', 'annex'] + list(args) + ['--batch', '--json']
+        self._starttime = time.perf_counter()
+        self.proc = subprocess.Popen(self.cmd, cwd=cwd, text=True,
+                                     stdin=subprocess.PIPE,
+                                     stdout=subprocess.PIPE, bufsize=1)
+
+    def request(self, line):
+        """Send a line and return the decoded JSON response.
+
+        Return None if git-annex responds with an empty line,
+        which happens for files not under git-annex control.
+        """
+        count('annex_requests')
+        self.proc.stdin.write(line + '\n')
+        self.proc.stdin.flush()
+        response = self.proc.stdout.readline()
+        if not response:
+            raise RuntimeError('git-annex terminated unexpectedly: ' +
+                               ' '.join(self.cmd))
+        response = response.strip()
+        return json.loads(response) if response else None
+
+    def stream(self, lines):
+        """Send all lines and yield the decoded JSON responses.
+
+        A separate thread writes the input so that git-annex can
+        work on several requests at once, e.g., if started with -J.
+        Empty responses are yielded as None.
+        """
+        def write_lines():
+            try:
+                for line in lines:
+                    count('annex_requests')
+                    self.proc.stdin.write(line + '\n')
+            finally:
+                self.proc.stdin.close()
+
+        writer = threading.Thread(target=write_lines)
+        writer.start()
+        for response in self.proc.stdout:
+            response = response.strip()
+            yield json.loads(response) if response else None
+        writer.join()
+
+    def close(self):
+        """Close the input of git-annex and wait until it exits"""
+        if self.proc.stdin is not None and not self.proc.stdin.closed:
+            self.proc.stdin.close()
+        retcode = self.proc.wait()
+        self.proc.stdout.close()
+        record_subprocess(self.cmd, time.perf_counter() - self._starttime,
+                          retcode != 0)
+        return retcode
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class AnnexMetadataBatch(AnnexBatch):
+    """Read and write git-annex metadata of many files in one process."""
+
+    def __init__(self, cwd=None):
+        super().__init__(['metadata'], cwd=cwd)
+
+    def get_fields(self, fpath):
+        """Return the metadata fields of a file or None if not annexed"""
+        response = self.request(json.dumps({'file': fpath}))
+        if response is None:
+            return None
+        return response.get('fields', {})
+
+    def set_fields(self, fpath, fields):
+        """Set metadata fields given as a dictionary of value lists"""
+        response = self.request(json.dumps({'file': fpath,
+                                            'fields': fields}))
+        if response is None or not response.get('success', False):
+            raise RuntimeError('could not set metadata of ' + fpath)
+        return response
+
+
+def get_registered_urls(fpaths, cwd=None):
+    """Return a dictionary with the set of known urls for each file.
+
+    Files not under git-annex control are missing in the result.
+    """
+    urls = {}
+    batch = AnnexBatch(['whereis'], cwd=cwd)
+    responses = batch.stream(fpaths)
+    for fpath, response in zip(fpaths, responses):
+        if response is None:
+            continue
+        cururls = set()
+        for remote in response.get('whereis', []) + \
+                response.get('untrusted', []):
+            cururls.update(remote.get('urls', []))
+        urls[fpath] = cururls
+    # consume remaining output if git-annex printed more lines
+    for response in responses:
+        pass
+    batch.close()
+    return urls
+
+
+def register_urls(url_file_pairs, mode='fast', jobs=1, cwd=None,
+                  dry_run=False):
+    """Associate files in a git-annex repository with urls.
+
+    url_file_pairs is a list of tuples (url, filepath). Urls already
+    registered for a file are skipped. The remaining ones are passed
+    to a single 'git annex addurl --batch' process. The mode is one
+    of 'fast' (no download), 'relaxed' (no download, no size check)
+    and 'verify' (download and verify the content). With jobs > 1,
+    git-annex processes several urls in parallel.
+    Return a dictionary with counts and the elapsed time.
+    """
+    starttime = time.time()
+    fpaths = sorted(set(f for _, f in url_file_pairs))
+    known_urls = get_registered_urls(fpaths, cwd=cwd)
+    todo = []
+    stats = {'registered': 0, 'skipped': 0, 'failed': 0, 'not_annexed': 0}
+    for url, fpath in url_file_pairs:
+        if fpath not in known_urls:
+            print('skipping ' + fpath + ' because not annexed')
+            stats['not_annexed'] += 1
+        elif url in known_urls[fpath]:
+            stats['skipped'] += 1
+        else:
+            todo.append((url, fpath))
+
+    if todo and not dry_run:
+        args = ['addurl', '--with-files']
+        if mode == 'fast':
+            args.append('--fast')
+        elif mode == 'relaxed':
+            args.append('--relaxed')
+        elif mode != 'verify':
+            raise ValueError('unknown mode ' + mode)
+        if jobs > 1:
+            args.append('--jobs=' + str(jobs))
+        batch = AnnexBatch(args, cwd=cwd)
+        lines = [url + ' ' + fpath for url, fpath in todo]
+        for response in batch.stream(lines):
+            if response is not None and response.get('success', False):
+                stats['registered'] += 1
+            else:
+                stats['failed'] += 1
+                if response is not None:
+                    print('failed to register url for ' +
+                          str(response.get('file')))
+        batch.close()
+    elif todo:
+        for url, fpath in todo:
+            print('would attach ' + url + ' to ' + fpath)
+        stats['registered'] = len(todo)
+
+    stats['elapsed'] = time.time() - starttime
+    return stats
+
+
+def print_register_stats(stats):
+    """Print the counts and throughput returned by register_urls"""
+    elapsed = max(stats['elapsed'], 1e-9)
+    nfiles = stats['registered'] + stats['skipped'] + stats['failed']
+    print('{registered} registered, {skipped} already known, {failed} failed, '
+          '{not_annexed} not annexed'.format(**stats))
+    print('{:.1f} s elapsed, {:.1f} files/s'.format(elapsed, nfiles / elapsed))
+
+
+def metadata_to_annex_fields(meta_dic):
+    """Convert a metadata dictionary to git-annex metadata fields.
+
+    Empty strings are represented by an empty list of values
+    because git-annex cannot store empty values.
+    """
+    fields = {}
+    for k, v in meta_dic.items():
+        v = '{}'.format(v)
+        fields[k] = [v] if v != '' else []
+    return fields
+
+
+def diff_annex_fields(desired, current):
+    """Return the fields in desired whose values differ from current"""
+    changes = {}
+    for k, v in desired.items():
+        if sorted(current.get(k, [])) != sorted(v):
+            changes[k] = v
+    return changes
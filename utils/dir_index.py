@@ -0,0 +1,86 @@
+############################################################
+#
+# Date:         2026/10/17
+# Institution:  IAEA
+#
+# In-memory index of the files in a few directories. Each
+# directory is listed once with os.scandir, afterwards the
+# existence of files and glob patterns are resolved against
+# the index without further file system calls. This matters
+# on network file systems, where each stat or glob call is
+# expensive.
+#
+############################################################
+
+import bisect
+import fnmatch
+import os
+import re
+
+
+_WILDCARD_REGEX = re.compile(r'[*?\[]')
+
+
+class DirectoryIndex(object):
+    """Names of the files in subdirectories of a base directory."""
+
+    def __init__(self, base_dir, subdirs):
+        self.base_dir = base_dir
+        self.names = {}
+        self.files = set()
+        for subdir in subdirs:
+            self._scan(subdir)
+
+    def _scan(self, subdir):
+        names = []
+        curdir = os.path.join(self.base_dir, subdir)
+        try:
+            with os.scandir(curdir) as it:
+                for entry in it:
+                    names.append(entry.name)
+                    # is_file follows symbolic links like os.path.isfile
+                    if entry.is_file():
+                        self.files.add(os.path.normpath(
+                            os.path.join(subdir, entry.name)))
+        except FileNotFoundError:
+            pass
+        names.sort()
+        self.names[os.path.normpath(subdir)] = names
+
+    def listdir(self, subdir):
+        """Return the sorted names in a subdirectory"""
+        subdir = os.path.normpath(subdir)
+        if subdir not in self.names:
+            self._scan(subdir)
+        return self.names[subdir]
+
+    def isfile(self, relpath):
+        """Check whether relpath is a file, as os.path.isfile would"""
+        subdir = os.path.normpath(os.path.dirname(relpath))
+        if subdir not in self.names:
+            self._scan(subdir)
+        return os.path.normpath(relpath) in self.files
+
+    def glob(self, pattern):
+        """Return the sorted paths matching a pattern relative to base_dir.
+
+        Wildcards are only supported in the last path component.
+        Names are narrowed down by bisection on the literal prefix
+        of the pattern before they are matched with fnmatch.
+        """
+        subdir = os.path.dirname(pattern)
+        namepat = os.path.basename(pattern)
+        names = self.listdir(subdir)
+        m = _WILDCARD_REGEX.search(namepat)
+        prefix = namepat[:m.start()] if m else namepat
+        start = bisect.bisect_left(names, prefix)
+        result = []
+        for name in names[start:]:
+            if not name.startswith(prefix):
+                break
+            # glob.glob does not match hidden files with wildcards
+            if name.startswith('.') and not namepat.startswith('.'):
+                continue
+            if fnmatch.fnmatchcase(name, namepat):
+                result.append(os.path.join(subdir, name))
+        return result
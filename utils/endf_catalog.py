@@ -0,0 +1,233 @@
+############################################################
+#
+# Date:         2026/10/17
+# Institution:  IAEA
+#
+# Catalog of the ENDF files of several sublibraries and
+# library versions in an SQLite file. Each row contains
+# the header fields returned by get_endf_metadata in
+# separate columns, together with path, size and annex key
+# of the file, so that questions such as 'which materials
+# have EMAX > 150 MeV' can be answered with an indexed query
+# instead of reading all ENDF headers again. The catalog
+# is updated incrementally: files whose annex key (or size
+# and modification time) did not change are not read again.
+#
+############################################################
+
+import json
+import os
+import re
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from .endf_metadata import get_endf_metadata
+from .metadata_cache import get_annex_key
+from .site_manifest import get_entry_signature
+
+
+# header fields of get_endf_metadata and their column types
+HEADER_COLUMNS = (
+    ('ZA', 'INTEGER'), ('AWR', 'REAL'), ('LRP', 'INTEGER'),
+    ('LFI', 'INTEGER'), ('NLIB', 'INTEGER'), ('NMOD', 'INTEGER'),
+    ('ELIS', 'REAL'), ('STA', 'REAL'), ('LIS', 'INTEGER'),
+    ('LIS0', 'INTEGER'), ('NFOR', 'INTEGER'), ('AWI', 'REAL'),
+    ('EMAX', 'REAL'), ('LREL', 'INTEGER'), ('NSUB', 'INTEGER'),
+    ('NVER', 'INTEGER'), ('TEMP', 'REAL'), ('LDRV', 'INTEGER'),
+    ('NWD', 'INTEGER'), ('NXC', 'INTEGER'), ('ZSYMAM', 'TEXT'),
+    ('ALAB', 'TEXT'), ('EDATE', 'TEXT'), ('AUTH', 'TEXT'),
+    ('REF', 'TEXT'), ('DDATE', 'TEXT'), ('RDATE', 'TEXT'),
+    ('ENDATE', 'TEXT'), ('HSUB_LIB', 'TEXT'), ('HSUB_MAT', 'TEXT'),
+    ('HSUB_IREV', 'TEXT'), ('HSUB_SUBLIB', 'TEXT'), ('HSUB_NFOR', 'TEXT'),
+    ('MAT', 'TEXT')
+)
+# columns describing the file, EVAL_DATE is EDATE as YYYY-MM
+FILE_COLUMNS = (
+    ('version', 'TEXT'), ('sublib', 'TEXT'), ('path', 'TEXT'),
+    ('filename', 'TEXT'), ('size', 'INTEGER'), ('annex_key', 'TEXT'),
+    ('signature', 'TEXT'), ('EVAL_DATE', 'TEXT')
+)
+CATALOG_COLUMNS = FILE_COLUMNS + HEADER_COLUMNS
+INDEXED_COLUMNS = ('ZA', 'MAT', 'NSUB', 'NLIB', 'EMAX', 'EVAL_DATE')
+
+_COLUMN_TYPES = dict(CATALOG_COLUMNS)
+_CONDITION_REGEX = re.compile(r'^\s*(\w+)\s*(<=|>=|!=|=|<|>)\s*(.*?)\s*$')
+_EDATE_REGEX = re.compile(r'([A-Za-z]{3})-?([0-9]{2}|[0-9]{4})\s*$')
+_MONTHS = ('JAN', 'FEB', 'MAR', 'APR', 'MAY', 'JUN',
+           'JUL', 'AUG', 'SEP', 'OCT', 'NOV', 'DEC')
+
+
+def parse_edate(edate):
+    """Convert an evaluation date such as EVAL-DEC19 to 2019-12 or None"""
+    m = _EDATE_REGEX.search(edate or '')
+    if not m or m.group(1).upper() not in _MONTHS:
+        return None
+    month = _MONTHS.index(m.group(1).upper()) + 1
+    year = int(m.group(2))
+    if year < 100:
+        year += 1900 if year >= 50 else 2000
+    return '{:04d}-{:02d}'.format(year, month)
+
+
+def parse_condition(text):
+    """Convert a condition such as 'EMAX>1.5e8' to (column, operator, value)"""
+    m = _CONDITION_REGEX.match(text)
+    if not m:
+        raise ValueError('invalid condition ' + repr(text))
+    column, op, value = m.groups()
+    if column not in _COLUMN_TYPES:
+        raise ValueError('unknown column ' + column)
+    if _COLUMN_TYPES[column] == 'INTEGER':
+        value = int(value)
+    elif _COLUMN_TYPES[column] == 'REAL':
+        value = float(value)
+    return column, op, value
+
+
+def get_sublib_name(endf_dir):
+    """Return the sublibrary name of a directory.
+
+    For the website layout <sublib>/endf, this is the name of
+    the parent directory, otherwise the name of the directory.
+    """
+    endf_dir = os.path.normpath(os.path.abspath(endf_dir))
+    name = os.path.basename(endf_dir)
+    if name == 'endf':
+        name = os.path.basename(os.path.dirname(endf_dir))
+    return name
+
+
+class EndfCatalog(object):
+    """Catalog of ENDF files and their header fields in an SQLite file."""
+
+    def __init__(self, dbpath):
+        self.dbpath = dbpath
+        self._conn = sqlite3.connect(dbpath, timeout=60)
+        self._conn.row_factory = sqlite3.Row
+        coldefs = ', '.join('{} {}'.format(n, t) for n, t in CATALOG_COLUMNS)
+        self._conn.execute('CREATE TABLE IF NOT EXISTS entries ({}, metadata TEXT, '
+                           'PRIMARY KEY (version, path))'.format(coldefs))
+        for column in INDEXED_COLUMNS + ('annex_key',):
+            self._conn.execute('CREATE INDEX IF NOT EXISTS idx_{0} '
+                               'ON entries ({0})'.format(column))
+        self._conn.commit()
+
+    def update(self, fpaths, sublib, version='', jobs=1):
+        """Add or update the entries of the files of a sublibrary.
+
+        Entries of the same sublibrary and version whose files are
+        not in fpaths are removed. Files without MF1/MT451 section
+        are skipped. Return a dictionary with the number of added,
+        unchanged, removed and skipped files.
+        """
+        counts = {'added': 0, 'unchanged': 0, 'removed': 0, 'skipped': 0}
+        known = {row['path']: row['signature'] for row in self._conn.execute(
+                 'SELECT path, signature FROM entries WHERE version = ? '
+                 'AND sublib = ?', (version, sublib))}
+        todo = []
+        keep = set()
+        for fpath in fpaths:
+            path = os.path.abspath(fpath)
+            signature = get_entry_signature(fpath)
+            keep.add(path)
+            if known.get(path) == signature:
+                counts['unchanged'] += 1
+            else:
+                todo.append((fpath, path, signature))
+
+        if jobs == 1:
+            meta_iter = map(get_endf_metadata, [t[0] for t in todo])
+            executor = None
+        else:
+            executor = ProcessPoolExecutor(max_workers=jobs)
+            meta_iter = executor.map(get_endf_metadata, [t[0] for t in todo],
+                                     chunksize=16)
+        rows = []
+        try:
+            for (fpath, path, signature), meta_dic in zip(todo, meta_iter):
+                if meta_dic is None:
+                    print('skipping ' + fpath + ' because not an ENDF file')
+                    counts['skipped'] += 1
+                    keep.discard(path)
+                    continue
+                file_values = {'version': version, 'sublib': sublib,
+                               'path': path, 'filename': os.path.basename(fpath),
+                               'size': os.path.getsize(fpath),
+                               'annex_key': get_annex_key(fpath),
+                               'signature': signature,
+                               'EVAL_DATE': parse_edate(meta_dic.get('EDATE'))}
+                values = [file_values[n] for n, t in FILE_COLUMNS]
+                values += [meta_dic.get(n) for n, t in HEADER_COLUMNS]
+                values.append(json.dumps(meta_dic))
+                rows.append(values)
+                counts['added'] += 1
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        placeholders = ', '.join('?' * (len(CATALOG_COLUMNS) + 1))
+        self._conn.executemany('INSERT OR REPLACE INTO entries VALUES ({})'.format(
+                               placeholders), rows)
+        obsolete = [(version, p) for p in known if p not in keep]
+        self._conn.executemany('DELETE FROM entries WHERE version = ? AND path = ?',
+                               obsolete)
+        counts['removed'] = len(obsolete)
+        self._conn.commit()
+        return counts
+
+    def query(self, conditions=(), sublib=None, version=None, order_by='ZA'):
+        """Return the entries fulfilling all conditions as list of dicts.
+
+        Conditions are tuples (column, operator, value) as
+        returned by parse_condition or strings such as 'NLIB=33'.
+        """
+        clauses = []
+        params = []
+        conditions = [parse_condition(c) if isinstance(c, str) else c
+                      for c in conditions]
+        if sublib is not None:
+            conditions.append(('sublib', '=', sublib))
+        if version is not None:
+            conditions.append(('version', '=', version))
+        for column, op, value in conditions:
+            if column not in _COLUMN_TYPES or op not in ('<=', '>=', '!=', '=', '<', '>'):
+                raise ValueError('invalid condition {}{}{}'.format(column, op, value))
+            clauses.append('{} {} ?'.format(column, op))
+            params.append(value)
+        if order_by not in _COLUMN_TYPES:
+            raise ValueError('unknown column ' + order_by)
+        sql = 'SELECT * FROM entries'
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+        sql += ' ORDER BY {}, path'.format(order_by)
+        return [dict(row) for row in self._conn.execute(sql, params)]
+
+    def lookup(self, fpath):
+        """Return the metadata of a file stored in the catalog or None.
+
+        Files are identified by their annex key, so that any copy
+        of the same content matches, or otherwise by path, size
+        and modification time.
+        """
+        signature = get_entry_signature(fpath)
+        if get_annex_key(fpath) is not None:
+            row = self._conn.execute('SELECT metadata FROM entries WHERE '
+                                     'annex_key = ? LIMIT 1', (signature,)).fetchone()
+        else:
+            row = self._conn.execute('SELECT metadata FROM entries WHERE '
+                                     'path = ? AND signature = ? LIMIT 1',
+                                     (os.path.abspath(fpath), signature)).fetchone()
+        return json.loads(row['metadata']) if row is not None else None
+
+    def get_metadata(self, row):
+        """Return the metadata dictionary of an entry returned by query"""
+        return json.loads(row['metadata'])
+
+    def close(self):
+        """Close the catalog file"""
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,226 @@
+############################################################
+#
+# Date:         2026/10/17
+# Institution:  IAEA
+#
+# Comparison of two versions of an ENDF file section by
+# section. Both files are split into their MAT/MF/MT
+# sections with the section index of endf_index.py and
+# only sections whose hashes differ are compared line by
+# line. The lines outside of the sections, i.e., the tape
+# identification, the SEND, FEND, MEND and TEND records
+# and lines with invalid control fields, are compared as
+# well. If no section is found in one of the files, the
+# whole files are compared line by line instead.
+# Columns 76-80 with the line numbers are ignored.
+# The result is an html page with a summary table of all
+# sections followed by side-by-side views of the changes.
+#
+############################################################
+
+import difflib
+import hashlib
+import html
+from .endf_index import build_section_index, EndfSectionReader
+
+
+# sections with more lines are compared line by line
+# at the same positions instead of using difflib
+MAX_DIFFLIB_LINES = 20000
+
+
+def _normalize_lines(view):
+    """Return the lines of a section truncated to 75 columns"""
+    return [l[:75] for l in bytes(view).decode('latin-1').splitlines()]
+
+
+def _compare_lines(label, lines1, lines2):
+    """Return the comparison of lines that do not form a section"""
+    lines1 = [l[:75] for l in lines1]
+    lines2 = [l[:75] for l in lines2]
+    res = {'mat': None, 'mf': None, 'mt': None, 'label': label,
+           'nlines1': len(lines1), 'nlines2': len(lines2)}
+    if lines1 == lines2:
+        res['status'] = 'identical'
+    else:
+        res['status'] = 'modified'
+        res['lines1'] = lines1
+        res['lines2'] = lines2
+    return res
+
+
+def _read_lines(fpath):
+    with open(fpath, 'rb') as f:
+        return f.read().decode('latin-1').splitlines()
+
+
+def compare_sections(fpath1, fpath2):
+    """Compare the sections of two ENDF files.
+
+    Return a list of dictionaries, one per section, with the keys
+    mat, mf, mt, status ('identical', 'modified', 'added' or
+    'removed'), nlines1, nlines2 and, for modified sections,
+    lines1 and lines2 with the normalized content.
+    Sections with equal hashes of their bytes are not decoded.
+    The lines outside of the sections are compared in a last
+    entry with mat, mf and mt None and the label 'other lines'.
+    If one of the files has no sections, the result is a single
+    such entry with the label 'whole file'.
+    """
+    index1 = build_section_index(fpath1)
+    index2 = build_section_index(fpath2)
+    if len(index1) == 0 or len(index2) == 0:
+        return [_compare_lines('whole file', _read_lines(fpath1),
+                               _read_lines(fpath2))]
+    rows1 = {row[:3]: row for row in index1}
+    rows2 = {row[:3]: row for row in index2}
+    keys = list(rows1) + [k for k in rows2 if k not in rows1]
+    keys.sort(key=lambda k: (k[0], k[1], k[2]))
+
+    results = []
+    with EndfSectionReader(fpath1, index1) as r1, \
+            EndfSectionReader(fpath2, index2) as r2:
+        for key in keys:
+            res = {'mat': key[0], 'mf': key[1], 'mt': key[2],
+                   'nlines1': rows1[key][5] if key in rows1 else 0,
+                   'nlines2': rows2[key][5] if key in rows2 else 0}
+            if key not in rows2:
+                res['status'] = 'removed'
+            elif key not in rows1:
+                res['status'] = 'added'
+            else:
+                view1 = r1.get_section(key[1], key[2], key[0])
+                view2 = r2.get_section(key[1], key[2], key[0])
+                res['status'] = 'identical'
+                if (hashlib.sha1(view1).digest() !=
+                        hashlib.sha1(view2).digest()):
+                    lines1 = _normalize_lines(view1)
+                    lines2 = _normalize_lines(view2)
+                    if lines1 != lines2:
+                        res['status'] = 'modified'
+                        res['lines1'] = lines1
+                        res['lines2'] = lines2
+                view1.release()
+                view2.release()
+            results.append(res)
+        other1 = r1.get_other_lines()
+        other2 = r2.get_other_lines()
+    if other1 or other2:
+        results.append(_compare_lines('other lines', other1, other2))
+    return results
+
+
+def _count_changed_lines(lines1, lines2):
+    if max(len(lines1), len(lines2)) > MAX_DIFFLIB_LINES:
+        changed = sum(1 for l1, l2 in zip(lines1, lines2) if l1 != l2)
+        return changed + abs(len(lines1) - len(lines2))
+    sm = difflib.SequenceMatcher(None, lines1, lines2, autojunk=False)
+    return sum(max(i2 - i1, j2 - j1) for tag, i1, i2, j1, j2
+               in sm.get_opcodes() if tag != 'equal')
+
+
+def _render_positional_table(lines1, lines2):
+    """Table with the differing lines at the same positions"""
+    rows = []
+    for i in range(max(len(lines1), len(lines2))):
+        l1 = lines1[i] if i < len(lines1) else ''
+        l2 = lines2[i] if i < len(lines2) else ''
+        if l1 != l2:
+            rows.append('<tr><td class="diff_header">{0}</td>'
+                        '<td nowrap="nowrap"><span class="diff_sub">{1}</span></td>'
+                        '<td class="diff_header">{0}</td>'
+                        '<td nowrap="nowrap"><span class="diff_add">{2}</span></td>'
+                        '</tr>'.format(i+1, html.escape(l1), html.escape(l2)))
+    return ('<table class="diff" summary="Differences">\n' +
+            '\n'.join(rows) + '\n</table>')
+
+
+_PAGE_HEAD = '''<!DOCTYPE html>
+<html>
+<head><meta charset="UTF-8" />
+<title>{title}</title>
+<style type="text/css">
+  body {{font-family: sans-serif}}
+  table.summary {{border-collapse: collapse}}
+  table.summary td, table.summary th {{border: 1px solid #ccc; padding: 2px 6px}}
+  tr.modified {{background-color: #ffff77}}
+  tr.added {{background-color: #aaffaa}}
+  tr.removed {{background-color: #ffaaaa}}
+  table.diff {{font-family: Courier, monospace; border: medium}}
+  .diff_header {{background-color: #e0e0e0}}
+  td.diff_header {{text-align: right}}
+  .diff_next {{background-color: #c0c0c0}}
+  .diff_add {{background-color: #aaffaa}}
+  .diff_chg {{background-color: #ffff77}}
+  .diff_sub {{background-color: #ffaaaa}}
+</style>
+</head>
+<body>
+'''
+
+
+def render_diff_html(title, results, context_lines=3):
+    """Return an html page with the summary and the changed sections"""
+    parts = [_PAGE_HEAD.format(title=html.escape(title))]
+    parts.append('<h1>{}</h1>\n'.format(html.escape(title)))
+    counts = {}
+    for res in results:
+        counts[res['status']] = counts.get(res['status'], 0) + 1
+    parts.append('<p>' + ', '.join('{} {}'.format(counts.get(s, 0), s) for s in
+                 ('modified', 'added', 'removed', 'identical')) +
+                 ' sections</p>\n')
+
+    parts.append('<table class="summary">\n<tr><th>MAT</th><th>MF</th>'
+                 '<th>MT</th><th>status</th><th>lines #1</th>'
+                 '<th>lines #2</th><th>changed lines</th></tr>\n')
+    differ = difflib.HtmlDiff(wrapcolumn=None)
+    details = []
+    for res in results:
+        label = res.get('label')
+        if label is None:
+            anchor = 'mat{mat}mf{mf}mt{mt}'.format(**res)
+            heading = 'MAT {} MF {} MT {}'.format(res['mat'], res['mf'], res['mt'])
+            name = str(res['mt'])
+        else:
+            anchor = label.replace(' ', '-')
+            heading = label
+            name = label
+        changed = ''
+        namecell = name
+        if res['status'] == 'modified':
+            lines1, lines2 = res['lines1'], res['lines2']
+            changed = str(_count_changed_lines(lines1, lines2))
+            namecell = '<a href="#{}">{}</a>'.format(anchor, html.escape(name))
+            if max(len(lines1), len(lines2)) > MAX_DIFFLIB_LINES:
+                table = _render_positional_table(lines1, lines2)
+            else:
+                table = differ.make_table(lines1, lines2, '#1', '#2',
+                                          context=True, numlines=context_lines)
+            details.append('<h2 id="{}">{}</h2>\n{}\n'.format(
+                           anchor, html.escape(heading), table))
+        if label is None:
+            cells = '<td>{}</td><td>{}</td><td>{}</td>'.format(
+                    res['mat'], res['mf'], namecell)
+        else:
+            cells = '<td colspan="3">{}</td>'.format(namecell)
+        parts.append('<tr class="{status}">{cells}<td>{status}</td><td>{nlines1}</td>'
+                     '<td>{nlines2}</td><td>{changed}</td></tr>\n'.format(
+                     cells=cells, changed=changed, **res))
+    parts.append('</table>\n')
+    parts.extend(details)
+    parts.append('</body>\n</html>\n')
+    return ''.join(parts)
+
+
+def write_diff_html(fpath1, fpath2, outpath, title=None):
+    """Compare two ENDF files and write the html page to outpath.
+
+    Return the list with the comparison of the sections.
+    """
+    results = compare_sections(fpath1, fpath2)
+    if title is None:
+        title = outpath
+    html_output = render_diff_html(title, results)
+    with open(outpath, 'w', encoding='utf-8') as f:
+        f.write(html_output)
+    return results
@@ -0,0 +1,340 @@
+############################################################
+#
+# Date:         2026/10/17
+# Institution:  IAEA
+#
+# Index of the MAT/MF/MT sections of ENDF files based on
+# the control fields in columns 67-75. For each section,
+# the byte offset, the length in bytes and the number of
+# lines are recorded in a compact array. The index can be
+# stored in a sidecar file next to the ENDF file or in a
+# cache directory so that it needs to be built only once.
+#
+# Lines whose control fields cannot be parsed and that do
+# not lie within a section are recorded as unindexed byte
+# ranges, so that callers can still look at their content.
+#
+# EndfSectionReader maps the ENDF file into memory and
+# returns sections as memoryview objects without copying.
+#
+############################################################
+
+import hashlib
+import mmap
+import os
+import re
+import struct
+import sys
+import tempfile
+from array import array
+from .metadata_cache import get_annex_key
+
+
+INDEX_MAGIC = b'ENDFIDX2'
+INDEX_HEADER = struct.Struct('<8sqqqq')
+INDEX_SUFFIX = '.secidx'
+# number of values stored per section
+INDEX_FIELDS = 6
+# number of values stored per unindexed byte range
+UNINDEXED_FIELDS = 3
+
+# lines with MT=0 in columns 73-75, i.e., SEND, FEND, MEND, TEND
+# records and the tape identification line, delimit the sections.
+# The leading newline is much faster to search than ^ with re.M.
+_DELIMITER_REGEX = re.compile(rb'\n[^\n]{72}[ 0]{2}0')
+_FIRST_DELIMITER_REGEX = re.compile(rb'[^\n]{72}[ 0]{2}0')
+
+
+def _parse_control(line):
+    """Return MAT, MF, MT from columns 67-75 of a line"""
+    return int(line[66:70]), int(line[70:72]), int(line[72:75])
+
+
+class SectionIndex(object):
+    """Byte offsets, lengths and line counts of the sections in an ENDF file.
+
+    The values are stored in a flat array with one row
+    (mat, mf, mt, offset, nbytes, nlines) per section. The
+    byte ranges with lines that could not be assigned to a
+    section are stored as rows (offset, nbytes, nlines) in
+    the array unindexed.
+    """
+
+    def __init__(self, values=None, unindexed=None):
+        self.values = values if values is not None else array('q')
+        self.unindexed = unindexed if unindexed is not None else array('q')
+        self._lookup = None
+
+    def __len__(self):
+        return len(self.values) // INDEX_FIELDS
+
+    def __iter__(self):
+        v = self.values
+        for i in range(0, len(v), INDEX_FIELDS):
+            yield tuple(v[i:i+INDEX_FIELDS])
+
+    def append(self, mat, mf, mt, offset, nbytes, nlines):
+        self.values.extend((mat, mf, mt, offset, nbytes, nlines))
+        self._lookup = None
+
+    def add_unindexed(self, offset, nbytes, nlines):
+        self.unindexed.extend((offset, nbytes, nlines))
+
+    def unindexed_ranges(self):
+        """Return a list with the tuples (offset, nbytes, nlines) of unindexed lines"""
+        u = self.unindexed
+        return [tuple(u[i:i+UNINDEXED_FIELDS])
+                for i in range(0, len(u), UNINDEXED_FIELDS)]
+
+    def sections(self):
+        """Return a list with the tuples (mat, mf, mt) of all sections"""
+        return [row[:3] for row in self]
+
+    def find(self, mf, mt, mat=None):
+        """Return the row of a section or None if not present.
+
+        If mat is None, the first material in the file is used.
+        """
+        if self._lookup is None:
+            self._lookup = {}
+            for row in self:
+                self._lookup.setdefault(row[:3], row)
+                self._lookup.setdefault((None,) + row[1:3], row)
+        return self._lookup.get((mat, mf, mt))
+
+    def to_bytes(self, fsize, mtime_ns):
+        values = self.values + self.unindexed
+        if sys.byteorder != 'little':
+            values.byteswap()
+        nranges = len(self.unindexed) // UNINDEXED_FIELDS
+        return INDEX_HEADER.pack(INDEX_MAGIC, fsize, mtime_ns, len(self),
+                                 nranges) + values.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Return the index and the file size and time it was built for"""
+        magic, fsize, mtime_ns, nrows, nranges = INDEX_HEADER.unpack_from(data)
+        if magic != INDEX_MAGIC:
+            raise ValueError('not an ENDF section index')
+        values = array('q')
+        values.frombytes(data[INDEX_HEADER.size:])
+        if sys.byteorder != 'little':
+            values.byteswap()
+        nvalues = nrows * INDEX_FIELDS
+        if len(values) != nvalues + nranges * UNINDEXED_FIELDS:
+            raise ValueError('truncated ENDF section index')
+        return cls(values[:nvalues], values[nvalues:]), fsize, mtime_ns
+
+
+def _index_segment(index, buf, start, end):
+    """Add the sections in buf[start:end] to the index.
+
+    Normally, the segment between two delimiter lines is a
+    single section. Otherwise, it is split line by line.
+    Lines with invalid control fields are included in a
+    section if the lines before and after belong to it and
+    recorded as unindexed otherwise.
+    """
+    firstend = buf.find(b'\n', start, end)
+    lastbeg = buf.rfind(b'\n', start, end - 1) + 1
+    firstline = buf[start:firstend if firstend != -1 else end]
+    lastline = buf[max(lastbeg, start):end]
+    try:
+        first = _parse_control(firstline)
+        last = _parse_control(lastline)
+    except ValueError:
+        first = last = None
+    if first is not None and first == last:
+        nlines = buf[start:end].count(b'\n')
+        if buf[end-1:end] != b'\n':
+            nlines += 1
+        index.append(*first, start, end - start, nlines)
+        return
+    pos = start
+    # current section as [control, start, end, nlines] and
+    # the lines with invalid control fields after it
+    cur = None
+    bad = None
+    while pos < end:
+        nl = buf.find(b'\n', pos, end)
+        nxt = nl + 1 if nl != -1 else end
+        try:
+            ctrl = _parse_control(buf[pos:nxt])
+        except ValueError:
+            ctrl = None
+        if ctrl is None:
+            if bad is None:
+                bad = [pos, nxt, 1]
+            else:
+                bad[1] = nxt
+                bad[2] += 1
+        elif ctrl[2] != 0:
+            if cur is not None and cur[0] == ctrl:
+                if bad is not None:
+                    cur[3] += bad[2]
+                    bad = None
+                cur[2] = nxt
+                cur[3] += 1
+            else:
+                if cur is not None:
+                    index.append(*cur[0], cur[1], cur[2] - cur[1], cur[3])
+                if bad is not None:
+                    index.add_unindexed(bad[0], bad[1] - bad[0], bad[2])
+                    bad = None
+                cur = [ctrl, pos, nxt, 1]
+        pos = nxt
+    if cur is not None:
+        index.append(*cur[0], cur[1], cur[2] - cur[1], cur[3])
+    if bad is not None:
+        index.add_unindexed(bad[0], bad[1] - bad[0], bad[2])
+
+
+def build_section_index(fpath):
+    """Scan an ENDF file and return the index of its sections"""
+    index = SectionIndex()
+    with open(fpath, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return index
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            start = 0
+            if _FIRST_DELIMITER_REGEX.match(buf):
+                start = buf.find(b'\n') + 1 or len(buf)
+            for m in _DELIMITER_REGEX.finditer(buf):
+                linestart = m.start() + 1
+                if linestart > start:
+                    _index_segment(index, buf, start, linestart)
+                nl = buf.find(b'\n', m.end())
+                start = nl + 1 if nl != -1 else len(buf)
+            if start < len(buf):
+                _index_segment(index, buf, start, len(buf))
+    return index
+
+
+def get_index_path(fpath, cache_dir=None):
+    """Return the path of the sidecar file with the section index.
+
+    Without cache_dir, the sidecar is stored next to the file.
+    In the cache directory, the file name is derived from the
+    git-annex key or, for regular files, from the absolute path.
+    """
+    if cache_dir is None:
+        return fpath + INDEX_SUFFIX
+    annex_key = get_annex_key(fpath)
+    if annex_key is not None:
+        name = annex_key
+    else:
+        abspath = os.path.abspath(fpath).encode('utf-8')
+        name = hashlib.sha1(abspath).hexdigest()
+    return os.path.join(cache_dir, name + INDEX_SUFFIX)
+
+
+def save_section_index(index, fpath, cache_dir=None):
+    """Write the section index of fpath to its sidecar file"""
+    st = os.stat(fpath)
+    idxpath = get_index_path(fpath, cache_dir)
+    idxdir = os.path.dirname(idxpath) or '.'
+    fd, tmppath = tempfile.mkstemp(prefix='.tmp-', dir=idxdir)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(index.to_bytes(st.st_size, st.st_mtime_ns))
+        os.replace(tmppath, idxpath)
+    except BaseException:
+        os.unlink(tmppath)
+        raise
+    return idxpath
+
+
+def load_section_index(fpath, cache_dir=None, create=True):
+    """Return the section index of an ENDF file.
+
+    The sidecar file is used if it matches the size and, for files
+    not managed by git-annex, the modification time of the file.
+    Otherwise, the index is built and stored if create is true.
+    """
+    idxpath = get_index_path(fpath, cache_dir)
+    st = os.stat(fpath)
+    try:
+        with open(idxpath, 'rb') as f:
+            index, fsize, mtime_ns = SectionIndex.from_bytes(f.read())
+        if fsize == st.st_size and (mtime_ns == st.st_mtime_ns or
+                                    get_annex_key(fpath) is not None):
+            return index
+    except (OSError, ValueError, struct.error):
+        pass
+    index = build_section_index(fpath)
+    if create:
+        try:
+            save_section_index(index, fpath, cache_dir)
+        except OSError:
+            print('could not store section index of ' + fpath)
+    return index
+
+
+class EndfSectionReader(object):
+    """Random access to the sections of an ENDF file.
+
+    The file is memory-mapped and sections are returned as
+    memoryview objects referring to the mapped file. They must
+    be released before the reader is closed.
+    """
+
+    def __init__(self, fpath, index=None, cache_dir=None):
+        self.fpath = fpath
+        if index is None:
+            index = load_section_index(fpath, cache_dir)
+        self.index = index
+        self._file = open(fpath, 'rb')
+        if os.fstat(self._file.fileno()).st_size > 0:
+            self._mmap = mmap.mmap(self._file.fileno(), 0,
+                                   access=mmap.ACCESS_READ)
+            self._view = memoryview(self._mmap)
+        else:
+            self._mmap = None
+            self._view = memoryview(b'')
+
+    def sections(self):
+        """Return a list with the tuples (mat, mf, mt) of all sections"""
+        return self.index.sections()
+
+    def __contains__(self, key):
+        return self.index.find(key[1], key[2], key[0]) is not None
+
+    def get_section(self, mf, mt, mat=None):
+        """Return the section as memoryview or raise a KeyError"""
+        row = self.index.find(mf, mt, mat)
+        if row is None:
+            raise KeyError('no section MF{}/MT{} in {}'.format(mf, mt, self.fpath))
+        offset, nbytes = row[3], row[4]
+        return self._view[offset:offset+nbytes]
+
+    def get_section_lines(self, mf, mt, mat=None):
+        """Return the lines of a section as a list of strings"""
+        return bytes(self.get_section(mf, mt, mat)).decode('latin-1').splitlines()
+
+    def get_other_lines(self):
+        """Return the lines outside of all sections as a list of strings.
+
+        These are the tape identification, the SEND, FEND, MEND and
+        TEND records and the unindexed lines.
+        """
+        ranges = sorted((row[3], row[4]) for row in self.index)
+        parts = []
+        pos = 0
+        for offset, nbytes in ranges + [(len(self._view), 0)]:
+            if offset > pos:
+                parts.append(bytes(self._view[pos:offset]))
+            pos = max(pos, offset + nbytes)
+        return b''.join(parts).decode('latin-1').splitlines()
+
+    def close(self):
+        """Release the memory map and close the file"""
+        self._view.release()
+        if self._mmap is not None:
+            self._mmap.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
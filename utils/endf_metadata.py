@@ -1,57 +1,293 @@
-from .fortran_utils import fort_read as fr
+from .fortran_utils import (fort_read as fr, compile_slice_plan,
+                            decode_real_strings)
+from .metadata_cache import get_active_cache
+from .instrumentation import stage, count
+from operator import itemgetter
+import locale
+import os
 import re
 
 
+# encoding used by open in text mode
+_TEXT_ENCODING = locale.getpreferredencoding(False)
+# number of bytes read at the beginning of a file
+# to find and parse the MF1/MT451 records
+PREFIX_BYTES = 1024
+
+
+# Fortran formats and variable names of the first nine
+# records of MF1/MT451, '_' marks ignored fields
+HEADER_FORMATS = (
+    ('(2E11.6,4I11)', ('ZA', 'AWR', 'LRP', 'LFI', 'NLIB', 'NMOD')),
+    ('(2E11.6,4I11)', ('ELIS', 'STA', 'LIS', 'LIS0', '_', 'NFOR')),
+    ('(2E11.6,4I11)', ('AWI', 'EMAX', 'LREL', '_', 'NSUB', 'NVER')),
+    ('(2E11.6,4I11)', ('TEMP', '_', 'LDRV', '_', 'NWD', 'NXC')),
+    ('(2A11,A10,1X,A33)', ('ZSYMAM', 'ALAB', 'EDATE', 'AUTH')),
+    ('(1X,A21,A10,1X,A10,12X,A8)', ('REF', 'DDATE', 'RDATE', 'ENDATE')),
+    ('(4X,A18,A22,A11)', ('HSUB_LIB', 'HSUB_MAT', 'HSUB_IREV')),
+    ('(5X,A61)', ('HSUB_SUBLIB',)),
+    ('(6X,A60)', ('HSUB_NFOR',))
+)
+
+# fixed-column layout of these records compiled from the formats.
+# Each entry is (variable name, start column, end column, type)
+# with type 'E' for floats, 'I' for integers and 'A' for strings.
+HEADER_SLICE_PLAN = tuple(
+    tuple((varname, start, end, vartype) for varname, (vartype, start, end, _)
+          in zip(varnames, compile_slice_plan(fmt)))
+    for fmt, varnames in HEADER_FORMATS)
+
+# integer fields with blanks removed
+_ENDF_INT_REGEX = re.compile(r'[+-]?[0-9]+$')
+
+
+class _SlowPathRequired(Exception):
+    """Raised if a header cannot be parsed by the fixed-column parser"""
+
+
+def endf_int(field):
+    """Convert an integer field of an ENDF file to an int"""
+    try:
+        return int(field)
+    except ValueError:
+        field = field.replace(' ', '')
+        if not field:
+            return 0
+        if not _ENDF_INT_REGEX.match(field):
+            raise
+        return int(field)
+
+
 def is_endf_file(fpath):
     """Determines whether file is a valid ENDF file"""
+    chunk = read_file_prefix(fpath)
+    lines = decode_prefix_lines(chunk, len(chunk) < PREFIX_BYTES)
+    return find_mt451_line(lines) is not None
+
+
+def read_endf_header(fpath):
+    """Read the lines at the beginning of an ENDF file"""
+    count('files_opened')
     with open(fpath, 'r', errors='ignore') as f:
-        lines = f.readlines(80*10)
-        for curline in lines:
-            if curline[70:75] == ' 1451':
-                return True
-    return False
+        header = f.readlines(10000)
+    count('bytes_read', sum(map(len, header)))
+    return header
 
 
 def get_endf_metadata(fpath):
     """Extract the metadata from an ENDF file"""
-    with open(fpath, 'r', errors='ignore') as f:
-        header = f.readlines(10000)
-    meta_dic = None
-    for nr, curline in enumerate(header):
+    with stage('get_endf_metadata'):
+        cache = get_active_cache()
+        if cache is not None:
+            found, meta_dic = cache.lookup(fpath)
+            if found:
+                count('metadata_cache_hits')
+                return meta_dic
+            count('metadata_cache_misses')
+        meta_dic = _get_endf_metadata_uncached(fpath)
+        if cache is not None:
+            cache.store(fpath, meta_dic)
+        return meta_dic
+
+
+def get_endf_metadata_many(fpaths):
+    """Extract the metadata from several ENDF files.
+
+    Return a list with one metadata dictionary per path
+    in the same order as fpaths. Entries are None for files
+    without a MF1/MT451 section. The headers are parsed as
+    by get_endf_metadata, but the new entries of the cache
+    are written in one transaction.
+    """
+    results = []
+    with stage('get_endf_metadata'):
+        cache = get_active_cache()
+        missed = []
+        for fpath in fpaths:
+            if cache is not None:
+                found, meta_dic = cache.lookup(fpath)
+                if found:
+                    count('metadata_cache_hits')
+                    results.append(meta_dic)
+                    continue
+                count('metadata_cache_misses')
+            meta_dic = _get_endf_metadata_uncached(fpath)
+            missed.append((fpath, meta_dic))
+            results.append(meta_dic)
+        if cache is not None and missed:
+            cache.store_many(missed)
+    return results
+
+
+def _get_endf_metadata_uncached(fpath):
+    """Extract the metadata from an ENDF file without the cache"""
+    return _parse_prefix_or_file(fpath, read_file_prefix(fpath))
+
+
+def _parse_prefix_or_file(fpath, chunk):
+    """Parse the header in the first bytes of a file or read it again"""
+    header = get_header_from_prefix(chunk, len(chunk) < PREFIX_BYTES)
+    if header is None:
+        header = read_endf_header(fpath)
+    return parse_endf_header(header)
+
+
+def read_file_prefix(fpath, nbytes=PREFIX_BYTES):
+    """Read the first nbytes of a file in binary mode"""
+    # low-level calls avoid the overhead of file objects
+    fd = os.open(fpath, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+    try:
+        chunk = os.read(fd, nbytes)
+    finally:
+        os.close(fd)
+    count('files_opened')
+    count('bytes_read', len(chunk))
+    return chunk
+
+
+def decode_prefix_lines(chunk, at_eof=False):
+    """Decode the first bytes of a file and split them into lines.
+
+    Line endings are removed. An incomplete line at the end is
+    dropped unless at_eof is true, i.e., chunk is the whole file.
+    """
+    # a carriage return at the end may belong to CRLF
+    text = chunk.rstrip(b'\r').decode(_TEXT_ENCODING, errors='ignore')
+    text = text.replace('\r\n', '\n').replace('\r', '\n')
+    lines = text.split('\n')
+    # the last element is an incomplete line or empty
+    last = lines.pop()
+    if at_eof and last:
+        lines.append(last)
+    return lines
+
+
+def find_mt451_line(lines):
+    """Return the index of the first line of MF1/MT451 or None"""
+    for nr, curline in enumerate(lines):
         if curline[70:75] == ' 1451':
-            fmt = r'(2E11.6,4I11)'
-            meta_dic = {}
-            mu = meta_dic.update
-            mu(fr(header[nr],   fmt,
-                varnames = ['ZA','AWR','LRP','LFI','NLIB','NMOD']))
-            mu(fr(header[nr+1], fmt,
-                varnames=['ELIS', 'STA', 'LIS', 'LIS0', '_', 'NFOR']))
-            mu(fr(header[nr+2], fmt,
-                varnames=['AWI', 'EMAX', 'LREL', '_', 'NSUB', 'NVER']))
-            mu(fr(header[nr+3], fmt,
-                varnames=['TEMP', '_', 'LDRV', '_', 'NWD', 'NXC']))
-            mu(fr(header[nr+4], r'(2A11,A10,1X,A33)',
-                varnames=['ZSYMAM', 'ALAB', 'EDATE', 'AUTH']))
-            mu(fr(header[nr+5], r'(1X,A21,A10,1X,A10,12X,A8)',
-                varnames=['REF', 'DDATE', 'RDATE', 'ENDATE']))
-            mu(fr(header[nr+6], r'(4X,A18,A22,A11)',
-                varnames=['HSUB_LIB', 'HSUB_MAT', 'HSUB_IREV']))
-            mu(fr(header[nr+7], r'5X,A61',
-                varnames=['HSUB_SUBLIB']))
-            mu(fr(header[nr+8], r'6X,A60',
-                varnames=['HSUB_NFOR']))
-
-            meta_dic.pop('_', None)
-            # strip away blanks from beginning and end of fields with strings
-            for k, v in meta_dic.items():
-                if isinstance(v, str):
-                    meta_dic[k] = v.strip()
-            # expose material number
-            meta_dic['MAT'] = re.sub(r'^Material *', '',
-                    meta_dic['HSUB_MAT'], flags=re.I).strip()
-            # some other conversions
-            meta_dic['ZA'] = int(meta_dic['ZA'])
-            meta_dic['ZSYMAM'] = meta_dic['ZSYMAM'].replace(' ', '')
-            return meta_dic
+            return nr
+    return None
+
+
+def get_header_from_prefix(chunk, at_eof=False):
+    """Return the MF1/MT451 records in the first bytes of a file.
 
+    The lines are decoded and split as in read_endf_header.
+    Return None if the complete lines in chunk do not contain
+    the nine records of MF1/MT451.
+    """
+    lines = decode_prefix_lines(chunk, at_eof)
+    nr = find_mt451_line(lines)
+    if nr is None:
+        return None
+    lines = lines[nr:nr+len(HEADER_SLICE_PLAN)]
+    if len(lines) < len(HEADER_SLICE_PLAN):
+        return None
+    return [l + '\n' for l in lines]
+
+
+def parse_endf_header(header):
+    """Extract the metadata from the lines of an ENDF header"""
+    for nr, curline in enumerate(header):
+        if curline[70:75] == ' 1451':
+            try:
+                meta_dic = _parse_header_fast(header, nr)
+            except _SlowPathRequired:
+                meta_dic = _parse_header_fortran(header, nr)
+            return _finalize_metadata(meta_dic)
     return None
+
+
+def _build_header_getter(slice_plan, linewidth=66):
+    """Return a field getter and variable names by type for a slice plan.
+
+    The getter extracts all fields from the concatenation of
+    the records, each one truncated or padded to linewidth.
+    The fields are rearranged so that the float, integer
+    and string fields form contiguous blocks in this order.
+    """
+    slices = {'E': [], 'I': [], 'A': []}
+    varnames = {'E': [], 'I': [], 'A': []}
+    for lineidx, curplan in enumerate(slice_plan):
+        offset = lineidx * linewidth
+        for varname, start, end, vartype in curplan:
+            slices[vartype].append(slice(offset+start, offset+end))
+            varnames[vartype].append(varname)
+    allnames = varnames['E'] + varnames['I'] + varnames['A']
+    getter = itemgetter(*(slices['E'] + slices['I'] + slices['A']))
+    counts = (len(varnames['E']), len(varnames['I']))
+    # permutation to restore the original order of the variables
+    varorder = tuple(f[0] for p in slice_plan for f in p)
+    positions = {}
+    for idx, varname in enumerate(allnames):
+        positions.setdefault(varname, []).append(idx)
+    restore = itemgetter(*(positions[v].pop(0) for v in varorder))
+    return getter, counts, restore, varorder
+
+
+_HEADER_GETTER, _HEADER_COUNTS, _HEADER_RESTORE, _HEADER_VARNAMES = \
+        _build_header_getter(HEADER_SLICE_PLAN)
+# records with numeric fields that must be complete
+_HEADER_NUMERIC_LINES = tuple(i for i, p in enumerate(HEADER_SLICE_PLAN)
+                              if p[0][3] != 'A')
+_MATERIAL_REGEX = re.compile(r'^Material *', flags=re.I)
+
+
+def _parse_header_fast(header, nr):
+    """Parse the MF1/MT451 records with the fixed-column slice plan"""
+    lines = header[nr:nr+len(HEADER_SLICE_PLAN)]
+    if len(lines) < len(HEADER_SLICE_PLAN):
+        # let the Fortran reader deal with truncated headers
+        raise _SlowPathRequired
+    # numeric fields beyond the end of the line
+    # yield None in the Fortran reader
+    for i in _HEADER_NUMERIC_LINES:
+        if len(lines[i].rstrip('\n')) < 66:
+            raise _SlowPathRequired
+    record = ''.join([l[:66].ljust(66) for l in lines])
+    fields = _HEADER_GETTER(record)
+    nfloat, nint = _HEADER_COUNTS
+    nnum = nfloat + nint
+    float_fields = fields[:nfloat]
+    int_fields = fields[nfloat:nnum]
+    # a field without decimal point has an implied one in Fortran
+    if ''.join(float_fields).count('.') != nfloat:
+        raise _SlowPathRequired
+    float_vals = decode_real_strings(float_fields)
+    # fields that cannot be converted are NaN
+    if any(v != v for v in float_vals):
+        raise _SlowPathRequired
+    try:
+        try:
+            int_vals = list(map(int, int_fields))
+        except ValueError:
+            int_vals = [endf_int(x) for x in int_fields]
+    except ValueError:
+        raise _SlowPathRequired
+    values = float_vals + int_vals + list(map(str.strip, fields[nnum:]))
+    # keep the order of the variables in the header
+    return dict(zip(_HEADER_VARNAMES, _HEADER_RESTORE(values)))
+
+
+def _parse_header_fortran(header, nr):
+    """Parse the MF1/MT451 records with Fortran format descriptors"""
+    meta_dic = {}
+    for i, (fmt, varnames) in enumerate(HEADER_FORMATS):
+        meta_dic.update(fr(header[nr+i], fmt, varnames=varnames))
+    # strip away blanks from beginning and end of fields with strings
+    for k, v in meta_dic.items():
+        if isinstance(v, str):
+            meta_dic[k] = v.strip()
+    return meta_dic
+
+
+def _finalize_metadata(meta_dic):
+    """Apply the conversions common to all header parsers"""
+    meta_dic.pop('_', None)
+    # expose material number
+    meta_dic['MAT'] = _MATERIAL_REGEX.sub('', meta_dic['HSUB_MAT']).strip()
+    # some other conversions
+    meta_dic['ZA'] = int(meta_dic['ZA'])
+    meta_dic['ZSYMAM'] = meta_dic['ZSYMAM'].replace(' ', '')
+    return meta_dic
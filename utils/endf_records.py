@@ -0,0 +1,337 @@
+############################################################
+#
+# Date:         2026/10/17
+# Institution:  IAEA
+#
+# Decoding of the numeric records of ENDF sections with
+# NumPy. The six 11-column fields of all lines of a section
+# are converted to float64 at once, including the Fortran
+# notation without exponent character, e.g., 1.234567-5.
+# EndfRecordReader walks through the decoded fields and
+# returns CONT, LIST, TAB1 and TAB2 records, and
+# EndfRecordWriter writes them with the fields of all lines
+# formatted at once.
+#
+# The section can be given as str, bytes or memoryview,
+# e.g., as returned by EndfSectionReader.get_section.
+#
+############################################################
+
+import io
+import numpy as np
+from .fortran_utils import decode_real_fields
+
+
+# number of columns of an ENDF line including the control fields
+LINE_WIDTH = 80
+FIELD_WIDTH = 11
+FIELDS_PER_LINE = 6
+_SPACE = ord(' ')
+
+
+def section_to_chars(buf):
+    """Return the lines of a section as uint8 array of shape (nlines, 80).
+
+    Lines are truncated or padded with blanks to 80 columns.
+    """
+    if isinstance(buf, str):
+        buf = buf.encode('latin-1')
+    buf = memoryview(buf).cast('B')
+    nbytes = len(buf)
+    # fast path for lines of 80 columns terminated by a newline
+    if nbytes % (LINE_WIDTH+1) == 0:
+        chars = np.frombuffer(buf, dtype=np.uint8).reshape(-1, LINE_WIDTH+1)
+        if np.all(chars[:, LINE_WIDTH] == ord('\n')):
+            return chars[:, :LINE_WIDTH]
+    lines = bytes(buf).splitlines()
+    padded = b''.join(l[:LINE_WIDTH].ljust(LINE_WIDTH) for l in lines)
+    return np.frombuffer(padded, dtype=np.uint8).reshape(-1, LINE_WIDTH)
+
+
+def decode_fields(chars):
+    """Convert the 11-column fields of the lines to floats.
+
+    chars is an uint8 array of shape (nlines, 80) or (nlines, 66)
+    as returned by section_to_chars. The result has the shape
+    (nlines, 6). Blank fields are zero and fields that are not
+    numeric, such as the text in MF1/MT451, are NaN.
+    """
+    nlines = chars.shape[0]
+    fields = np.ascontiguousarray(
+        chars[:, :FIELD_WIDTH*FIELDS_PER_LINE]).reshape(-1, FIELD_WIDTH)
+    return decode_real_fields(fields).reshape(nlines, FIELDS_PER_LINE)
+
+
+def _to_int(value):
+    """Convert a decoded field to int and raise ValueError if not numeric"""
+    if np.isnan(value):
+        raise ValueError('expected an integer field')
+    return int(value)
+
+
+class EndfRecordReader(object):
+    """Sequential reader of the records of an ENDF section.
+
+    All fields are decoded when the reader is created. The
+    methods read_cont, read_list, read_tab1 and read_tab2
+    return the next record and advance to the line after it.
+    """
+
+    def __init__(self, buf):
+        chars = section_to_chars(buf)
+        self.values = decode_fields(chars)
+        self.nlines = self.values.shape[0]
+        self.pos = 0
+
+    def _take(self, count):
+        """Return the next count values, which start on a new line"""
+        nrows = -(-count // FIELDS_PER_LINE)
+        if self.pos + nrows > self.nlines:
+            raise ValueError('record extends beyond the end of the section')
+        flat = self.values[self.pos:self.pos+nrows].ravel()[:count]
+        self.pos += nrows
+        return flat
+
+    def read_cont(self):
+        """Return (C1, C2, L1, L2, N1, N2) of a CONT or HEAD record"""
+        c1, c2, l1, l2, n1, n2 = self._take(FIELDS_PER_LINE)
+        return (float(c1), float(c2), _to_int(l1), _to_int(l2),
+                _to_int(n1), _to_int(n2))
+
+    def _read_interp(self, nr):
+        """Return the arrays NBT and INT of an interpolation table"""
+        pairs = self._take(2*nr)
+        if np.isnan(pairs).any():
+            raise ValueError('invalid interpolation table')
+        pairs = pairs.astype(np.int64)
+        return pairs[0::2], pairs[1::2]
+
+    def read_list(self):
+        """Return the CONT fields and the values of a LIST record.
+
+        The number of values NPL is given by N1.
+        """
+        cont = self.read_cont()
+        return cont, self._take(cont[4]).copy()
+
+    def read_tab1(self):
+        """Return the CONT fields, NBT, INT, x and y of a TAB1 record"""
+        cont = self.read_cont()
+        nbt, interp = self._read_interp(cont[4])
+        xy = self._take(2*cont[5])
+        return cont, nbt, interp, xy[0::2].copy(), xy[1::2].copy()
+
+    def read_tab2(self):
+        """Return the CONT fields, NBT and INT of a TAB2 record"""
+        cont = self.read_cont()
+        nbt, interp = self._read_interp(cont[4])
+        return cont, nbt, interp
+
+    def at_end(self):
+        """Check whether all lines have been read"""
+        return self.pos >= self.nlines
+
+
+def _scale_by_power_of_ten(values, powers):
+    """Return values * 10**powers with as few rounding errors as possible.
+
+    Powers of ten up to 1e22 are exact floats, so negative powers
+    are applied as division and large powers are split.
+    """
+    result = values.copy()
+    powers = powers.copy()
+    while True:
+        step = np.clip(powers, -22, 22)
+        if not step.any():
+            return result
+        pos = step > 0
+        neg = step < 0
+        result[pos] *= 10.0**step[pos]
+        result[neg] /= 10.0**-step[neg]
+        powers -= step
+
+
+def _format_exponent_group(absvals, exponents, decimals):
+    """Return mantissa digits and exponents for decimals digits after the point"""
+    for i in range(2):
+        scaled = np.rint(_scale_by_power_of_ten(absvals, decimals - exponents))
+        # correct the exponent if log10 was off or rounding overflowed
+        upper = scaled >= 10.0**(decimals+1)
+        lower = scaled < 10.0**decimals
+        if not upper.any() and not lower.any():
+            break
+        exponents = exponents + upper - lower
+    return scaled.astype(np.int64), exponents
+
+
+def _exponent_digits(exponents):
+    """Return the number of digits of the exponents"""
+    absexps = np.abs(exponents)
+    return 1 + (absexps >= 10) + (absexps >= 100) + (absexps >= 1000)
+
+
+def _mantissa_decimals(ndigits, negative):
+    """Return the number of digits after the decimal point.
+
+    Mantissa and exponent fill 10 columns after the sign column.
+    Positive values with an exponent of more than one digit also
+    use the blank sign column, e.g., 1.000000+10 instead of
+    1.00000+10, so that they keep seven significant digits.
+    """
+    return 7 - ndigits + ((ndigits > 1) & ~negative)
+
+
+def format_endf_floats(values):
+    """Format floats as 11-column ENDF fields without E character.
+
+    Return an uint8 array of shape (n, 11), e.g., with ' 1.234567+5',
+    '1.234567+10' or '-1.23456-10'. Rounding is done in binary
+    floating point and may differ from the correctly rounded decimal
+    value if the value lies within a few ulps of a tie.
+    """
+    values = np.asarray(values, dtype=np.float64).ravel()
+    if not np.isfinite(values).all():
+        raise ValueError('only finite values can be written to ENDF fields')
+    nvals = len(values)
+    out = np.full((nvals, FIELD_WIDTH), _SPACE, dtype=np.uint8)
+    negative = values < 0
+    out[negative, 0] = ord('-')
+    absvals = np.abs(values)
+    nonzero = absvals > 0
+    exponents = np.zeros(nvals, dtype=np.int64)
+    exponents[nonzero] = np.floor(np.log10(absvals[nonzero])).astype(np.int64)
+    # zero is written as 0.000000+0
+    mantissas = np.zeros(nvals, dtype=np.int64)
+    decimals = _mantissa_decimals(_exponent_digits(exponents), negative)
+    for i in range(3):
+        for dec in np.unique(decimals[nonzero]):
+            sel = nonzero & (decimals == dec)
+            mantissas[sel], exponents[sel] = _format_exponent_group(
+                absvals[sel], exponents[sel], dec)
+        # rounding may change the width of the exponent, e.g., 9.9999999+9
+        ndigits = _exponent_digits(exponents)
+        new_decimals = _mantissa_decimals(ndigits, negative)
+        if np.array_equal(new_decimals, decimals):
+            break
+        decimals = new_decimals
+    if (ndigits > 3).any():
+        raise ValueError('exponent out of range for ENDF fields')
+    for dec in np.unique(decimals):
+        rows = np.nonzero(decimals == dec)[0]
+        # the mantissa starts in the sign column if it has 8 - ndigits decimals
+        first = FIELD_WIDTH - 3 - dec - ndigits[rows]
+        mant = mantissas[rows]
+        for i in range(dec, -1, -1):
+            col = first if i == dec else first + 1 + dec - i
+            out[rows, col] = ord('0') + (mant // 10**i) % 10
+        out[rows, first + 1] = ord('.')
+        exps = exponents[rows]
+        out[rows, first + 2 + dec] = np.where(exps < 0, ord('-'), ord('+'))
+        absexps = np.abs(exps)
+        for i in range(3):
+            sel = ndigits[rows] > i
+            out[rows[sel], FIELD_WIDTH-1-i] = ord('0') + (absexps[sel] // 10**i) % 10
+    return out
+
+
+def format_endf_ints(values):
+    """Format integers as right-aligned 11-column fields"""
+    values = np.asarray(values, dtype=np.int64).ravel()
+    strings = np.array(['{:11d}'.format(v) for v in values.tolist()],
+                       dtype='S{}'.format(FIELD_WIDTH))
+    return strings.view(np.uint8).reshape(-1, FIELD_WIDTH)
+
+
+class EndfRecordWriter(object):
+    """Sequential writer of the records of an ENDF section.
+
+    The lines are written to a file object opened in text or
+    binary mode, including the MAT, MF, MT and line number
+    columns. Values are formatted in chunks of lines so that
+    large records do not need to be held in memory as text.
+    """
+
+    def __init__(self, fobj, mat, mf, mt, start_line=1, chunk_lines=8192):
+        self.fobj = fobj
+        self.mat = mat
+        self.mf = mf
+        self.mt = mt
+        self.line_number = start_line
+        self.chunk_lines = chunk_lines
+        self._binary = not isinstance(fobj, io.TextIOBase)
+        self._control = '{:4d}{:2d}{:3d}'.format(mat, mf, mt).encode('ascii')
+
+    def _write_fields(self, fields):
+        """Write an uint8 array of shape (n, 11) as lines of six fields"""
+        nfields = fields.shape[0]
+        nlines = -(-nfields // FIELDS_PER_LINE)
+        padded = np.full((nlines * FIELDS_PER_LINE, FIELD_WIDTH), _SPACE,
+                         dtype=np.uint8)
+        padded[:nfields] = fields
+        chars = np.empty((nlines, LINE_WIDTH+1), dtype=np.uint8)
+        chars[:, :66] = padded.reshape(nlines, 66)
+        chars[:, 66:75] = np.frombuffer(self._control, dtype=np.uint8)
+        numbers = (self.line_number + np.arange(nlines)) % 100000
+        for i in range(5):
+            digits = (numbers // 10**i) % 10
+            # line numbers are right-aligned without leading zeros
+            blank = (numbers < 10**i) & (i > 0)
+            chars[:, 79-i] = np.where(blank, _SPACE, ord('0') + digits)
+        chars[:, LINE_WIDTH] = ord('\n')
+        self.line_number += nlines
+        data = chars.tobytes()
+        self.fobj.write(data if self._binary else data.decode('ascii'))
+
+    def write_cont(self, c1, c2, l1, l2, n1, n2):
+        """Write a CONT or HEAD record"""
+        fields = np.concatenate([format_endf_floats([c1, c2]),
+                                 format_endf_ints([l1, l2, n1, n2])])
+        self._write_fields(fields)
+
+    def write_text(self, text):
+        """Write a TEXT record with up to 66 characters"""
+        if len(text) > 66:
+            raise ValueError('text longer than 66 characters')
+        data = '{:<66}{}{:5d}\n'.format(text, self._control.decode('ascii'),
+                                        self.line_number % 100000)
+        self.line_number += 1
+        self.fobj.write(data.encode('ascii') if self._binary else data)
+
+    def write_values(self, values):
+        """Write floats with six per line, starting on a new line"""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        step = self.chunk_lines * FIELDS_PER_LINE
+        for start in range(0, len(values), step):
+            self._write_fields(format_endf_floats(values[start:start+step]))
+
+    def _write_interp(self, nbt, interp):
+        pairs = np.column_stack([np.asarray(nbt), np.asarray(interp)])
+        if len(pairs) > 0:
+            self._write_fields(format_endf_ints(pairs))
+
+    def write_list(self, c1, c2, l1, l2, n2, values):
+        """Write a LIST record, NPL is the number of values"""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        self.write_cont(c1, c2, l1, l2, len(values), n2)
+        self.write_values(values)
+
+    def write_tab1(self, c1, c2, l1, l2, nbt, interp, x, y):
+        """Write a TAB1 record with interpolation table and (x, y) pairs"""
+        x = np.asarray(x, dtype=np.float64).ravel()
+        y = np.asarray(y, dtype=np.float64).ravel()
+        if len(x) != len(y):
+            raise ValueError('x and y must have the same length')
+        self.write_cont(c1, c2, l1, l2, len(nbt), len(x))
+        self._write_interp(nbt, interp)
+        self.write_values(np.column_stack([x, y]))
+
+    def write_tab2(self, c1, c2, l1, l2, nbt, interp, nz):
+        """Write a TAB2 record, nz is the number of subsequent records"""
+        self.write_cont(c1, c2, l1, l2, len(nbt), nz)
+        self._write_interp(nbt, interp)
+
+    def write_send(self):
+        """Write the SEND record that terminates the section"""
+        line = ' 0.000000+0 0.000000+0          0          0          0          0'
+        data = '{}{:4d}{:2d}{:3d}{:5d}\n'.format(line, self.mat, self.mf, 0, 99999)
+        self.fobj.write(data.encode('ascii') if self._binary else data)
@@ -0,0 +1,310 @@
+############################################################
+#
+# Date:         2026/10/17
+# Institution:  IAEA
+#
+# Benchmark stages of the import, metadata and website
+# code on a tree created by create_synthetic_fendl. Each
+# stage runs in a fresh process so that its peak resident
+# set size is measured independently of the other stages.
+# The results can be stored as JSON file and compared with
+# the results of a previous run (the baseline).
+#
+############################################################
+
+import importlib.util
+import json
+import multiprocessing
+import os
+import re
+import resource
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from .synthetic_fendl import SYNTHETIC_INFO_FILE
+
+
+BENCHMARK_STAGES = ('is_endf_file', 'get_endf_metadata', 'get_endf_metadata_many',
+                    'fort_read', 'fort_read_many', 'decode_real_fields',
+                    'copy_endf_files',
+                    'create_sublib_html', 'get_fendl_sublib_table_from_htmlfile',
+                    'get_fendl_sublib_table_from_htmlfile_bs4', 'hashstore')
+# stages that need packages which are not installed by default
+_STAGE_MODULES = {'get_fendl_sublib_table_from_htmlfile_bs4': ('bs4', 'html5lib')}
+
+_CODE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# format of the lines of the ENDF files outside of MF1
+_DATA_FORMAT = '(6E11.0,I4,I2,I3,I5)'
+
+
+def load_synthetic_info(root):
+    """Return the content of synthetic.json of a synthetic tree"""
+    with open(os.path.join(root, SYNTHETIC_INFO_FILE), 'r') as f:
+        return json.load(f)
+
+
+def _get_raw_paths(root, info):
+    fpaths = []
+    for sublib in info['sublibs']:
+        raw_dir = os.path.join(root, 'raw', sublib)
+        fpaths.extend(os.path.join(raw_dir, f) for f in sorted(os.listdir(raw_dir)))
+    return fpaths
+
+
+def _get_endf_paths(root, info):
+    return [os.path.join(root, 'data', sublib, 'endf', res['filename'])
+            for sublib, entry in info['sublibs'].items() for res in entry['files']]
+
+
+def _total_size(fpaths):
+    return sum(os.path.getsize(p) for p in fpaths)
+
+
+def _stage_is_endf_file(root, info, workdir, jobs):
+    from .endf_metadata import is_endf_file
+    fpaths = _get_raw_paths(root, info)
+    starttime = time.perf_counter()
+    for fpath in fpaths:
+        is_endf_file(fpath)
+    return fpaths, time.perf_counter() - starttime
+
+
+def _stage_get_endf_metadata(root, info, workdir, jobs):
+    from .endf_metadata import get_endf_metadata
+    from .metadata_cache import disable_metadata_cache
+    disable_metadata_cache()
+    fpaths = _get_endf_paths(root, info)
+    starttime = time.perf_counter()
+    for fpath in fpaths:
+        get_endf_metadata(fpath)
+    return fpaths, time.perf_counter() - starttime
+
+
+def _stage_get_endf_metadata_many(root, info, workdir, jobs):
+    from .endf_metadata import get_endf_metadata_many
+    from .metadata_cache import disable_metadata_cache
+    disable_metadata_cache()
+    fpaths = _get_endf_paths(root, info)
+    starttime = time.perf_counter()
+    get_endf_metadata_many(fpaths)
+    return fpaths, time.perf_counter() - starttime
+
+
+def _get_data_lines(fpaths):
+    """Return the lines of the ENDF files that are not in MF0 or MF1"""
+    lines = []
+    for fpath in fpaths:
+        with open(fpath, 'r') as f:
+            lines.extend(l for l in f if l[70:72].strip() not in ('', '0', '1'))
+    return lines
+
+
+def _stage_fort_read(root, info, workdir, jobs):
+    from .fortran_utils import fort_read
+    fpaths = _get_endf_paths(root, info)
+    lines = _get_data_lines(fpaths)
+    starttime = time.perf_counter()
+    for line in lines:
+        fort_read(line, _DATA_FORMAT)
+    return fpaths, time.perf_counter() - starttime
+
+
+def _stage_fort_read_many(root, info, workdir, jobs):
+    from .fortran_utils import fort_read_many
+    fpaths = _get_endf_paths(root, info)
+    lines = _get_data_lines(fpaths)
+    starttime = time.perf_counter()
+    fort_read_many(lines, _DATA_FORMAT)
+    return fpaths, time.perf_counter() - starttime
+
+
+def _stage_decode_real_fields(root, info, workdir, jobs):
+    from .endf_records import section_to_chars, decode_fields
+    fpaths = _get_endf_paths(root, info)
+    text = ''.join(_get_data_lines(fpaths))
+    starttime = time.perf_counter()
+    decode_fields(section_to_chars(text))
+    return fpaths, time.perf_counter() - starttime
+
+
+def _stage_copy_endf_files(root, info, workdir, jobs):
+    from .import_endf_files import copy_endf_files
+    outdirs = {}
+    for sublib in info['sublibs']:
+        outdirs[sublib] = os.path.join(workdir, 'import', sublib)
+        shutil.rmtree(outdirs[sublib], ignore_errors=True)
+        os.makedirs(outdirs[sublib])
+    starttime = time.perf_counter()
+    for sublib in info['sublibs']:
+        copy_endf_files(os.path.join(root, 'raw', sublib), outdirs[sublib],
+                        jobs=jobs, verbose=False)
+    return _get_raw_paths(root, info), time.perf_counter() - starttime
+
+
+def _stage_create_sublib_html(root, info, workdir, jobs):
+    os.environ['FENDL_DATA_DIR'] = os.path.join(root, 'data')
+    os.environ['FENDL_TEMPLATE_DIR'] = os.path.join(_CODE_DIR, 'templates')
+    os.environ['FENDL_DIFF_DIR'] = 'diff'
+    os.environ['FENDL_VERSION'] = info['params']['version']
+    os.environ['FENDL_OLD_VERSION'] = info['params']['version']
+    os.environ.pop('FENDL_METADATA_CACHE', None)
+    # the script reads the environment variables on import
+    sys.path.insert(0, _CODE_DIR)
+    import create_sublib_table_websites as website
+    # index.html is written to workdir instead of the input tree,
+    # the derived files are still looked up in the input tree
+    specs = {}
+    for sublib in info['sublibs']:
+        specs[sublib] = dict(website.sublib_dic[sublib])
+        specs[sublib]['html_dir'] = os.path.join(workdir, 'html', sublib)
+        os.makedirs(specs[sublib]['html_dir'], exist_ok=True)
+    starttime = time.perf_counter()
+    for sublib in info['sublibs']:
+        derived_index = website.get_derived_file_index(website.sublib_dic[sublib])
+        website.create_sublib_html(specs[sublib], derived_index=derived_index)
+    return _get_endf_paths(root, info), time.perf_counter() - starttime
+
+
+def _stage_get_fendl_sublib_table_from_htmlfile(root, info, workdir, jobs):
+    sys.path.insert(0, _CODE_DIR)
+    from table_dir_compare import get_fendl_sublib_table_from_htmlfile
+    fpaths = [os.path.join(root, 'legacy', sublib + '.html') for sublib in info['sublibs']]
+    starttime = time.perf_counter()
+    for fpath in fpaths:
+        get_fendl_sublib_table_from_htmlfile(fpath)
+    return fpaths, time.perf_counter() - starttime
+
+
+def _read_sublib_table_bs4(endf_table_file):
+    """Read a legacy sublibrary table as done before with BeautifulSoup"""
+    from bs4 import BeautifulSoup
+    from table_dir_compare import _get_html_table_entry
+    with open(endf_table_file) as f:
+        soup = BeautifulSoup(f.read(), 'html5lib')
+    tbody_el = soup.find('tbody')
+    isolist = {}
+    for tr_el in tbody_el.find_all('tr', {'bgcolor': re.compile(r'.*')}):
+        cur_info = _get_html_table_entry([td.text for td in tr_el.find_all('td')])
+        isolist[cur_info['MAT']] = cur_info
+    return isolist
+
+
+def _stage_get_fendl_sublib_table_from_htmlfile_bs4(root, info, workdir, jobs):
+    sys.path.insert(0, _CODE_DIR)
+    fpaths = [os.path.join(root, 'legacy', sublib + '.html') for sublib in info['sublibs']]
+    starttime = time.perf_counter()
+    for fpath in fpaths:
+        _read_sublib_table_bs4(fpath)
+    return fpaths, time.perf_counter() - starttime
+
+
+def _stage_hashstore(root, info, workdir, jobs):
+    from .hashstore import store_files
+    hashdir = os.path.join(workdir, 'hashstore')
+    shutil.rmtree(hashdir, ignore_errors=True)
+    os.makedirs(hashdir)
+    fpaths = _get_endf_paths(root, info)
+    starttime = time.perf_counter()
+    store_files(hashdir, fpaths, jobs=jobs, verbose=False)
+    return fpaths, time.perf_counter() - starttime
+
+
+def _run_stage(stage, root, workdir, jobs):
+    """Run a stage and return its statistics, called in a fresh process"""
+    info = load_synthetic_info(root)
+    stage_func = globals()['_stage_' + stage]
+    with open(os.devnull, 'w') as devnull:
+        stdout = sys.stdout
+        sys.stdout = devnull
+        try:
+            fpaths, seconds = stage_func(root, info, workdir, jobs)
+        finally:
+            sys.stdout = stdout
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    unit = 1 if sys.platform == 'darwin' else 1024
+    peak_rss = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                   resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss) * unit
+    return {'files': len(fpaths), 'bytes': _total_size(fpaths),
+            'seconds': seconds, 'peak_rss': peak_rss}
+
+
+def run_benchmark(root, workdir, stages=BENCHMARK_STAGES, jobs=1, repeat=1):
+    """Run the stages on the synthetic tree in root.
+
+    Output of the stages, e.g., imported files, the hashstore and
+    the html tables, is written to workdir. Each stage is run
+    repeat times; the time of the fastest run and the largest peak
+    RSS of all runs are kept. Return a dictionary with the
+    parameters of the tree and the statistics of each stage, i.e.,
+    files, bytes, seconds, files_per_s, mb_per_s and peak_rss.
+    """
+    info = load_synthetic_info(root)
+    results = {'params': info['params'], 'jobs': jobs, 'stages': {}}
+    context = multiprocessing.get_context('spawn')
+    for stage in stages:
+        if stage not in BENCHMARK_STAGES:
+            raise ValueError('unknown stage ' + stage)
+        missing = [m for m in _STAGE_MODULES.get(stage, ())
+                   if importlib.util.find_spec(m) is None]
+        if missing:
+            print('WARNING: skipped stage ' + stage + ' because ' +
+                  ', '.join(missing) + ' is not installed')
+            continue
+        best = None
+        peak_rss = 0
+        for i in range(repeat):
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                res = executor.submit(_run_stage, stage, root, workdir, jobs).result()
+            peak_rss = max(peak_rss, res['peak_rss'])
+            if best is None or res['seconds'] < best['seconds']:
+                best = res
+        # the peak RSS is the maximum of all runs, not of the fastest
+        best['peak_rss'] = peak_rss
+        seconds = max(best['seconds'], 1e-9)
+        best['files_per_s'] = best['files'] / seconds
+        best['mb_per_s'] = best['bytes'] / 2**20 / seconds
+        results['stages'][stage] = best
+    return results
+
+
+def compare_with_baseline(results, baseline, tolerance=0.2):
+    """Compare the results of run_benchmark with a baseline.
+
+    Return a dictionary with the throughput and peak RSS ratios
+    of each stage in both and the list of stages that are slower
+    or use more memory by more than the tolerance.
+    """
+    if results['params'] != baseline['params'] or results['jobs'] != baseline['jobs']:
+        print('WARNING: baseline was measured with different parameters')
+    ratios = {}
+    regressions = []
+    for stage, res in results['stages'].items():
+        base = baseline['stages'].get(stage)
+        if base is None:
+            continue
+        speed = res['mb_per_s'] / max(base['mb_per_s'], 1e-12)
+        memory = res['peak_rss'] / max(base['peak_rss'], 1)
+        ratios[stage] = {'speed': speed, 'memory': memory}
+        if speed < 1 - tolerance or memory > 1 + tolerance:
+            regressions.append(stage)
+    return {'ratios': ratios, 'regressions': regressions}
+
+
+def print_benchmark_results(results, comparison=None):
+    """Print a table with the statistics of each stage"""
+    header = '{:<42}{:>7}{:>10}{:>9}{:>10}{:>9}{:>9}'.format(
+             'stage', 'files', 'MB', 'seconds', 'files/s', 'MB/s', 'RSS MB')
+    if comparison is not None:
+        header += '{:>9}{:>9}'.format('speed', 'memory')
+    print(header)
+    for stage, res in results['stages'].items():
+        line = '{:<42}{:>7}{:>10.1f}{:>9.3f}{:>10.1f}{:>9.1f}{:>9.1f}'.format(
+               stage, res['files'], res['bytes'] / 2**20, res['seconds'],
+               res['files_per_s'], res['mb_per_s'], res['peak_rss'] / 2**20)
+        if comparison is not None and stage in comparison['ratios']:
+            ratios = comparison['ratios'][stage]
+            line += '{:>8.2f}x{:>8.2f}x'.format(ratios['speed'], ratios['memory'])
+            if stage in comparison['regressions']:
+                line += '  REGRESSION'
+        print(line)
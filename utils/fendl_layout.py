@@ -0,0 +1,113 @@
+############################################################
+#
+# Date:         2026/10/17
+# Institution:  IAEA
+#
+# Directory layout of the FENDL-Processed repository
+# (with the FENDL-ENDF submodule in fendl-endf/) and
+# the corresponding directories in the data folder
+# of the FENDL website.
+#
+############################################################
+
+import os
+
+
+# tuples (repository directory, website directory)
+FENDL_WEB_DIRS = (
+    # atom
+    ('fendl-endf/general-purpose/atom', 'atom/endf'),
+    ('general-purpose/atom/group', 'atom/group'),
+    # neutron
+    ('fendl-endf/general-purpose/neutron', 'neutron/endf'),
+    ('general-purpose/neutron/ace', 'neutron/ace'),
+    ('general-purpose/neutron/group', 'neutron/group'),
+    ('general-purpose/neutron/njoy', 'neutron/njoy'),
+    ('general-purpose/neutron/plot', 'neutron/plot'),
+    # deuteron
+    ('fendl-endf/general-purpose/deuteron', 'deuteron/endf'),
+    ('general-purpose/deuteron/ace', 'deuteron/ace'),
+    # proton
+    ('fendl-endf/general-purpose/proton', 'proton/endf'),
+    ('general-purpose/proton/ace', 'proton/ace'),
+    ('general-purpose/proton/njoy', 'proton/njoy'),
+    ('general-purpose/proton/plot', 'proton/plot'),
+)
+
+
+def list_dir_files(dirpath):
+    """Return the sorted names of the non-hidden files in a directory.
+
+    Symbolic links of git-annex are included even if their
+    content is not present in the repository.
+    """
+    fnames = []
+    with os.scandir(dirpath) as it:
+        for entry in it:
+            if entry.name.startswith('.'):
+                continue
+            if entry.is_symlink() or entry.is_file():
+                fnames.append(entry.name)
+    return sorted(fnames)
+
+
+def find_website_files(data_dir, reldir, suffix='', include_dirs=False):
+    """Return the files below data_dir/reldir as (path, arcname) tuples.
+
+    The arcname is the path relative to data_dir with forward slashes.
+    If include_dirs is true, data_dir/reldir and its subdirectories
+    are included with an arcname ending in a slash, as done by zip -r.
+    """
+    members = []
+    for root, dirs, files in os.walk(os.path.join(data_dir, reldir)):
+        dirs.sort()
+        if include_dirs:
+            arcname = os.path.relpath(root, data_dir).replace(os.sep, '/')
+            members.append((root, arcname + '/'))
+        for fname in sorted(files):
+            if fname.endswith(suffix):
+                fpath = os.path.join(root, fname)
+                arcname = os.path.relpath(fpath, data_dir).replace(os.sep, '/')
+                members.append((fpath, arcname))
+    return members
+
+
+def get_website_zip_bundles(data_dir, fendl_version):
+    """Return the zip files of the website as (zip path, members) tuples.
+
+    The members are given as (path, arcname) tuples. The contents
+    correspond to the zip files created by update_website_endf.sh.
+    """
+    def zippath(sublib, kind):
+        return os.path.join(data_dir, sublib, 'fendl-{}-{}-{}.zip'.format(
+                            fendl_version, sublib, kind))
+
+    def flat_members(members, arcdir):
+        # the files are put into one directory as in the copies
+        # zipped by update_website_endf.sh before
+        members = [(p, arcdir + '/' + os.path.basename(p)) for p, _ in members]
+        if members:
+            members.append((os.path.join(data_dir, arcdir), arcdir + '/'))
+        return members
+
+    bundles = []
+    for sublib in ('neutron', 'proton', 'deuteron', 'atom'):
+        bundles.append((zippath(sublib, 'endf'),
+                        find_website_files(data_dir, sublib + '/endf',
+                                           include_dirs=True)))
+    for sublib in ('neutron', 'proton', 'deuteron'):
+        bundles.append((zippath(sublib, 'ace'),
+                        find_website_files(data_dir, sublib + '/ace',
+                                           include_dirs=True)))
+    # neutron gendf files together with the photo-atomic gam files
+    gendf_members = find_website_files(data_dir, 'neutron/group', '.g')
+    gendf_members += find_website_files(data_dir, 'atom/group', '.gam')
+    bundles.append((zippath('neutron', 'gendf'),
+                    flat_members(gendf_members, 'neutron/group')))
+    matxs_members = find_website_files(data_dir, 'neutron/group', '.m')
+    bundles.append((zippath('neutron', 'matxs'),
+                    flat_members(matxs_members, 'neutron/group')))
+    bundles.append((zippath('atom', 'gendf'),
+                    find_website_files(data_dir, 'atom/group',
+                                       include_dirs=True)))
+    return bundles
@@ -0,0 +1,190 @@
+############################################################
+#
+# Date:         2026/10/17
+# Institution:  IAEA
+#
+# Classification of ENDF and derived files by their
+# content instead of their filename extension. Only the
+# first SNIFF_BYTES bytes of a file are read in binary mode.
+# The formats are distinguished as follows:
+#
+#   endf   - MF1/MT451 section, variant is ENDF-<NFOR>
+#   pendf  - MF1/MT451 section with LRP=2 as written by NJOY
+#   gendf  - MF1/MT451 HEAD record with N1=-1 (GENDF marker)
+#   ace    - variant type1 for the ASCII format (old header
+#            or 2.0 header) and type2 for the binary format
+#            with a Fortran record marker before the ZAID
+#   xsdir  - xsdir lines of an ACE file (.xsd)
+#   matxs  - MATXS file identification record
+#   njoy_input, njoy_output, pdf, postscript, html,
+#   text, binary, empty
+#   missing - symbolic link of git-annex without content
+#
+# For the ENDF formats, the metadata of the header can be
+# extracted from the same prefix so that the file does not
+# need to be read again.
+#
+############################################################
+
+import collections
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from .endf_metadata import (read_file_prefix, decode_prefix_lines, find_mt451_line,
+                            get_header_from_prefix, parse_endf_header, endf_int)
+from .fendl_layout import list_dir_files
+from .instrumentation import executor_map
+
+
+SNIFF_BYTES = 2048
+
+ENDF_FORMATS = ('endf', 'pendf', 'gendf')
+
+NJOY_MODULES = ('moder', 'reconr', 'broadr', 'unresr', 'heatr', 'thermr',
+                'groupr', 'gaminr', 'errorr', 'covr', 'dtfr', 'ccccr',
+                'matxsr', 'resxsr', 'acer', 'powr', 'wimsr', 'plotr',
+                'viewr', 'mixr', 'purr', 'leapr', 'gaspr')
+
+# result of sniff_file, variant and metadata may be None
+SniffResult = collections.namedtuple('SniffResult',
+                                     ['path', 'format', 'variant', 'size', 'metadata'])
+
+# the ZAID of a binary ACE file is a 10-character field
+_ACE_TYPE2_REGEX = re.compile(rb'\s*[0-9]{1,6}\.[0-9]{2,3}[a-z]{1,2}\s*')
+_ACE_TYPE1_REGEX = re.compile(
+    r'^\s*[0-9]{1,6}\.[0-9]{2,3}[a-z]{1,2}\s+[0-9]+\.[0-9]+\s+[0-9.]+[eE][+-]?[0-9]+')
+_ACE_VERSION_REGEX = re.compile(r'^\s*2\.0\.[0-9]+\s+\S+')
+_XSDIR_REGEX = re.compile(
+    r'^\s*[0-9]{1,6}\.[0-9]{2,3}[a-z]{1,2}\s+[0-9.eE+-]+\s+\S+\s+\S+\s+[12]\s+[0-9]+')
+_MATXS_REGEX = re.compile(r'^\s*0?v\s+matxs', flags=re.I)
+_NJOY_OUTPUT_REGEX = re.compile(r'njoy\s*20[0-9]{2}|njoy\s+[0-9]+\.[0-9]+', flags=re.I)
+_TEXT_BYTES = bytes(range(32, 127)) + b'\t\n\r\f\v'
+
+
+def _is_binary(chunk):
+    """Check whether the bytes do not look like text"""
+    if b'\0' in chunk:
+        return True
+    nontext = len(chunk.translate(None, _TEXT_BYTES))
+    return nontext > len(chunk) // 10
+
+
+def _get_int_field(line, idx):
+    try:
+        return endf_int(line[11*idx:11*idx+11])
+    except ValueError:
+        return None
+
+
+def _classify_endf(lines, nr):
+    """Return format and variant of a file with MF1/MT451 in line nr"""
+    head = lines[nr]
+    if _get_int_field(head, 4) == -1:
+        return 'gendf', None
+    if _get_int_field(head, 2) == 2:
+        return 'pendf', None
+    nfor = None
+    if nr + 1 < len(lines) and lines[nr+1][70:75] == ' 1451':
+        nfor = _get_int_field(lines[nr+1], 5)
+    return 'endf', ('ENDF-{}'.format(nfor) if nfor else None)
+
+
+def _is_ace_type2(chunk):
+    """Check for a Fortran record marker followed by a ZAID"""
+    if len(chunk) < 24:
+        return False
+    for byteorder in ('little', 'big'):
+        reclen = int.from_bytes(chunk[:4], byteorder)
+        if 16 <= reclen <= 2**28 and _ACE_TYPE2_REGEX.fullmatch(chunk[4:14]):
+            return True
+    return False
+
+
+def classify_prefix(chunk, at_eof=False):
+    """Return the tuple (format, variant) of a file from its first bytes"""
+    if not chunk:
+        return 'empty', None
+    if chunk.startswith(b'%PDF'):
+        return 'pdf', None
+    if chunk.startswith(b'%!PS'):
+        return 'postscript', None
+    if _is_ace_type2(chunk):
+        return 'ace', 'type2'
+    if _is_binary(chunk):
+        if b'matxs' in chunk[:100].lower():
+            return 'matxs', 'binary'
+        return 'binary', None
+    lines = decode_prefix_lines(chunk, at_eof)
+    nr = find_mt451_line(lines)
+    if nr is not None:
+        return _classify_endf(lines, nr)
+    first = next((l for l in lines if l.strip()), '')
+    if _ACE_TYPE1_REGEX.match(first) or _ACE_VERSION_REGEX.match(first):
+        return 'ace', 'type1'
+    if _XSDIR_REGEX.match(first):
+        return 'xsdir', None
+    if _MATXS_REGEX.match(first):
+        return 'matxs', 'bcd'
+    tokens = first.split()
+    if tokens and tokens[0].strip("'").lower() in NJOY_MODULES:
+        return 'njoy_input', None
+    text = chunk.decode('latin-1')
+    if _NJOY_OUTPUT_REGEX.search(text):
+        return 'njoy_output', None
+    if '<html' in text[:512].lower() or '<!doctype html' in text[:512].lower():
+        return 'html', None
+    return 'text', None
+
+
+def sniff_file(fpath, with_metadata=False, nbytes=SNIFF_BYTES):
+    """Classify a file by its first nbytes and return a SniffResult.
+
+    With with_metadata, the metadata of files in an ENDF format
+    are extracted from the same bytes as by get_endf_metadata.
+    The metadata are None if the prefix does not contain the
+    complete MF1/MT451 records or they cannot be parsed; the
+    caller should then use get_endf_metadata.
+    """
+    if os.path.islink(fpath) and not os.path.exists(fpath):
+        return SniffResult(fpath, 'missing', None, 0, None)
+    chunk = read_file_prefix(fpath, nbytes)
+    at_eof = len(chunk) < nbytes
+    fmt, variant = classify_prefix(chunk, at_eof)
+    size = len(chunk) if at_eof else os.path.getsize(fpath)
+    metadata = None
+    if with_metadata and fmt in ENDF_FORMATS:
+        header = get_header_from_prefix(chunk, at_eof)
+        try:
+            metadata = parse_endf_header(header) if header is not None else None
+        except Exception:
+            # get_endf_metadata reports the problem to the caller
+            metadata = None
+    return SniffResult(fpath, fmt, variant, size, metadata)
+
+
+def sniff_files(fpaths, with_metadata=False, jobs=1):
+    """Classify files with sniff_file in jobs worker processes.
+
+    Return the list of SniffResult in the order of fpaths.
+    """
+    if jobs == 1 or len(fpaths) < 2:
+        return [sniff_file(p, with_metadata) for p in fpaths]
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        return list(executor_map(executor, sniff_file, fpaths,
+                                 [with_metadata] * len(fpaths), chunksize=32))
+
+
+def sniff_directory(dirpath, with_metadata=False, jobs=1, recursive=False):
+    """Classify the non-hidden files in a directory.
+
+    With recursive, the files in subdirectories are included.
+    Return the list of SniffResult sorted by path.
+    """
+    if recursive:
+        fpaths = []
+        for root, dirs, files in os.walk(dirpath):
+            dirs[:] = sorted(d for d in dirs if not d.startswith('.'))
+            fpaths.extend(os.path.join(root, f) for f in list_dir_files(root))
+    else:
+        fpaths = [os.path.join(dirpath, f) for f in list_dir_files(dirpath)]
+    return sniff_files(fpaths, with_metadata, jobs)
@@ -1,7 +1,20 @@
+import re
+import numpy as np
 from fortranformat import FortranRecordReader, FortranRecordWriter
 from .generic_utils import flatten, static_vars
 
 
+# edit descriptors supported by compile_slice_plan, e.g., 6E11.0 or 2X
+_EDIT_DESCRIPTOR_REGEX = re.compile(r'^([0-9]*)([IEFDAX])([0-9]*)(?:\.([0-9]+))?$',
+                                    flags=re.I)
+_SPACE = ord(' ')
+_NEWLINE = ord('\n')
+_REAL_CHARS = np.zeros(256, dtype=bool)
+_REAL_CHARS[list(b'0123456789.+-eEdD ')] = True
+# characters other than those of real fields and their separators
+_INVALID_REAL_REGEX = re.compile(r'[^0-9.+\-eEdD \n]')
+
+
 @static_vars(frr_cache={})
 def fort_read(fobj, formatstr, none_as=None, varnames=None, debug=False):
     """Read from a file or string using a format descriptor
@@ -75,6 +88,231 @@ def fort_write(fobj, formatstr, values, debug=False):
         fobj.write(line + '\n')
 
 
+def compile_slice_plan(formatstr):
+    """Compile a simple Fortran format to a list of fields.
+
+    Each field is a tuple (type, start column, end column, decimals)
+    with type 'E' for real, 'I' for integer and 'A' for string fields.
+    Only the edit descriptors I, E, F, D, A and X with explicit widths
+    and repeat counts are supported. For other formats, e.g., with
+    groups in parentheses, return None.
+    """
+    fmt = formatstr.strip()
+    if fmt.startswith('(') and fmt.endswith(')'):
+        fmt = fmt[1:-1]
+    plan = []
+    pos = 0
+    for item in fmt.split(','):
+        m = _EDIT_DESCRIPTOR_REGEX.match(item.replace(' ', ''))
+        if not m:
+            return None
+        repeat, code, width, decimals = m.groups()
+        code = code.upper()
+        repeat = int(repeat) if repeat else 1
+        if code == 'X':
+            if width or decimals:
+                return None
+            pos += repeat
+            continue
+        if not width or (code in 'EFD') != (decimals is not None):
+            return None
+        width = int(width)
+        vartype = 'E' if code in 'EFD' else code
+        for i in range(repeat):
+            plan.append((vartype, pos, pos + width, int(decimals or 0)))
+            pos += width
+    return plan
+
+
+@static_vars(readers={})
+def _read_real_field(field):
+    """Convert a single real field with fortranformat or return NaN"""
+    if not field.strip(' '):
+        return 0.0
+    if _INVALID_REAL_REGEX.search(field):
+        return np.nan
+    width = max(len(field), 1)
+    if width not in _read_real_field.readers:
+        _read_real_field.readers[width] = \
+            FortranRecordReader('(E{}.0)'.format(width))
+    try:
+        return _read_real_field.readers[width].read(field)[0]
+    except ValueError:
+        return np.nan
+
+
+def _decode_real_text(text, checked=False):
+    """Convert real fields each preceded by a newline to floats.
+
+    If checked is true, the caller ensured that the text
+    contains only the characters of real fields and newlines.
+    """
+    try:
+        if not checked and _INVALID_REAL_REGEX.search(text):
+            raise ValueError
+        # a sign after a digit or decimal point starts an exponent
+        # without E character, e.g., 1.001000+3: E is inserted before
+        # each sign and removed again in front of the mantissa and
+        # after an existing E
+        conv = text.replace('d', 'e').replace('D', 'e')
+        conv = conv.replace('+', 'e+').replace('-', 'e-')
+        conv = conv.replace(' e', ' ').replace('\ne', '\n')
+        conv = conv.replace('ee', 'e').replace('Ee', 'E')
+        return list(map(float, conv[1:].split('\n')))
+    except ValueError:
+        return [_read_real_field(f) for f in text[1:].split('\n')]
+
+
+def decode_real_strings(fields):
+    """Convert real fields given as strings to a list of floats.
+
+    Exponents without E character, e.g., 1.234567-5, and D
+    exponents are supported. Blank fields are zero and fields
+    that cannot be converted are NaN.
+    """
+    text = '\n' + '\n'.join(fields)
+    # newlines separate the fields and must not occur within them
+    if text.count('\n') != len(fields):
+        return [_read_real_field(f.replace('\n', '?')) for f in fields]
+    return _decode_real_text(text)
+
+
+def decode_real_fields(fields):
+    """Convert fixed-width real fields to floats.
+
+    fields is an uint8 array of shape (n, width) with the characters
+    of n fields. They are converted as by decode_real_strings.
+    """
+    nfields, width = fields.shape
+    valid = _REAL_CHARS[fields].all(axis=1)
+    zero = ~valid | (fields == _SPACE).all(axis=1)
+    chars = np.empty((nfields, width+1), dtype=np.uint8)
+    chars[:, 0] = _NEWLINE
+    chars[:, 1:] = fields
+    chars[zero, 1:] = _SPACE
+    chars[zero, -1] = ord('0')
+    values = _decode_real_text(chars.tobytes().decode('ascii'), checked=True)
+    values = np.array(values, dtype=np.float64)
+    values[~valid] = np.nan
+    return values
+
+
+def _decode_int_fields(fields):
+    """Convert fixed-width integer fields, blanks are ignored"""
+    strings = fields.view('S{}'.format(fields.shape[1])).ravel()
+    blank = (fields == _SPACE).all(axis=1)
+    try:
+        values = np.where(blank, b'0', strings).astype(np.int64)
+    except ValueError:
+        values = np.array([int(f.replace(b' ', b'') or b'0')
+                           for f in strings], dtype=np.int64)
+    return values
+
+
+def _to_char_array(lines):
+    """Return the lines as uint32 array of code points padded with zeros"""
+    lines = [l.rstrip('\r\n') for l in lines]
+    reclen = max(max(map(len, lines), default=0), 1)
+    arr = np.array(lines, dtype='U{}'.format(reclen))
+    return arr.view(np.uint32).reshape(len(lines), reclen)
+
+
+@static_vars(frr_cache={})
+def fort_read_many(lines_or_buffer, formatstr, varnames=None, none_as=None,
+                   as_dict=False):
+    """Read many lines with the same format descriptor at once
+
+    Simple formats (see compile_slice_plan) are decoded column-wise
+    with NumPy, other formats are read line by line with fortranformat.
+    Fields beyond the end of a line are NaN for real fields and 0 for
+    integer fields unless none_as is given.
+
+    Keyword arguments:
+    lines_or_buffer -- list of lines, file object or string with lines
+    formatstr       -- the Fortran format description string
+    varnames        -- names of the variables, by default f0, f1, ...
+                       A ValueError is raised if a name occurs
+                       several times.
+    none_as         -- value for fields beyond the end of a line
+    as_dict         -- if true, return a dictionary with one array per
+                       variable, otherwise a NumPy structured array
+    """
+    if varnames is not None and len(set(varnames)) != len(varnames):
+        raise ValueError('duplicate names in varnames')
+    if isinstance(lines_or_buffer, (bytes, bytearray, memoryview)):
+        lines_or_buffer = bytes(lines_or_buffer).decode('latin-1')
+    if isinstance(lines_or_buffer, str):
+        lines = lines_or_buffer.splitlines()
+    else:
+        lines = list(lines_or_buffer)
+
+    plan = compile_slice_plan(formatstr)
+    if plan is not None:
+        columns = _read_columns(lines, plan, none_as)
+    else:
+        if formatstr not in fort_read_many.frr_cache:
+            fort_read_many.frr_cache[formatstr] = FortranRecordReader(formatstr)
+        frr = fort_read_many.frr_cache[formatstr]
+        rows = [frr.read(l.rstrip('\r\n')) for l in lines]
+        if none_as is not None:
+            rows = [[none_as if x is None else x for x in r] for r in rows]
+        ncols = len(rows[0]) if rows else 0
+        columns = [np.array([r[i] for r in rows]) for i in range(ncols)]
+
+    if varnames is None:
+        varnames = ['f{}'.format(i) for i in range(len(columns))]
+    result = dict(zip(varnames, columns))
+    if as_dict:
+        return result
+    recarr = np.empty(len(lines), dtype=[(k, v.dtype) for k, v in result.items()])
+    for k, v in result.items():
+        recarr[k] = v
+    return recarr
+
+
+def _read_columns(lines, plan, none_as):
+    """Decode the columns of a compiled slice plan"""
+    chars = _to_char_array(lines)
+    reclen = chars.shape[1]
+    columns = []
+    for vartype, start, end, decimals in plan:
+        fields = np.zeros((len(lines), end - start), dtype=np.uint32)
+        if start < reclen:
+            fields[:, :min(end, reclen) - start] = chars[:, start:end]
+        missing = fields[:, 0] == 0
+        fields[fields == 0] = _SPACE
+        if vartype == 'A':
+            columns.append(np.ascontiguousarray(fields).view(
+                'U{}'.format(end - start)).ravel())
+            continue
+        # characters outside ASCII cannot be part of a number
+        nonascii = (fields > 127).any(axis=1)
+        fields8 = np.where(fields > 127, 0, fields).astype(np.uint8)
+        if vartype == 'E':
+            values = decode_real_fields(fields8)
+            values[nonascii] = np.nan
+            if np.isnan(values[~missing]).any():
+                raise ValueError('invalid real field in column ' + str(start+1))
+            if decimals > 0:
+                # a field without decimal point has an implied one
+                nopoint = ~(fields8 == ord('.')).any(axis=1)
+                values[nopoint] /= 10**decimals
+        else:
+            if nonascii.any():
+                raise ValueError('invalid integer field in column ' + str(start+1))
+            values = _decode_int_fields(fields8)
+        if missing.any():
+            if none_as is not None:
+                values = values.astype(np.result_type(values, none_as))
+                values[missing] = none_as
+            elif vartype == 'E':
+                values[missing] = np.nan
+            else:
+                values[missing] = 0
+        columns.append(values)
+    return columns
+
+
 def fort_range(*args):
     """Specify a range Fortran style.
 
@@ -0,0 +1,175 @@
+############################################################
+#
+# Date:         2026/10/17
+# Institution:  IAEA
+#
+# Determine the changes between two commits of a git-annex
+# repository at the level of git objects. The trees of both
+# commits are read with 'git ls-tree' and the targets of the
+# symbolic links that differ are read with a single
+# 'git cat-file --batch' process. The annex keys in the
+# link targets identify the content so that files moved
+# to another path are recognized as renamed. The file
+# sizes are taken from the SHA256E keys.
+#
+############################################################
+
+import re
+import subprocess
+from .metadata_cache import ANNEX_KEY_REGEX
+from .instrumentation import run_subprocess
+
+
+SYMLINK_MODE = '120000'
+STATUS_NAMES = {'A': 'added', 'M': 'modified', 'D': 'deleted', 'R': 'renamed'}
+
+_KEY_SIZE_REGEX = re.compile(r'-s([0-9]+)-')
+
+
+def read_tree(commit, paths=(), cwd=None):
+    """Return a dictionary mapping paths to (mode, blob, size) of a commit.
+
+    The size is the one of the git object, i.e., for symbolic
+    links the length of the link target.
+    """
+    cmd = ['git', 'ls-tree', '-r', '-l', '-z', '--full-tree', commit, '--'] + list(paths)
+    output = run_subprocess(cmd, cwd=cwd, check=True,
+                            stdout=subprocess.PIPE).stdout.decode('utf-8')
+    tree = {}
+    for entry in output.split('\0'):
+        if not entry:
+            continue
+        info, path = entry.split('\t', 1)
+        mode, objtype, blob, size = info.split()
+        if objtype != 'blob':
+            continue
+        tree[path] = (mode, blob, int(size) if size != '-' else None)
+    return tree
+
+
+def read_blobs(blobs, cwd=None):
+    """Return a dictionary with the content of blobs as bytes.
+
+    All blobs are read by a single 'git cat-file --batch' process.
+    """
+    blobs = sorted(set(blobs))
+    if not blobs:
+        return {}
+    inp = ''.join(b + '\n' for b in blobs).encode('ascii')
+    output = run_subprocess(['git', 'cat-file', '--batch'], cwd=cwd, check=True,
+                            input=inp, stdout=subprocess.PIPE).stdout
+    contents = {}
+    pos = 0
+    for blob in blobs:
+        nl = output.index(b'\n', pos)
+        header = output[pos:nl].split()
+        if len(header) < 3 or header[1] == b'missing':
+            raise ValueError('blob ' + blob + ' is missing')
+        size = int(header[2])
+        contents[blob] = output[nl+1:nl+1+size]
+        pos = nl + 1 + size + 1
+    return contents
+
+
+def get_key_size(key):
+    """Return the file size recorded in an annex key or None"""
+    if key is None:
+        return None
+    m = _KEY_SIZE_REGEX.search(key)
+    return int(m.group(1)) if m else None
+
+
+def _describe(entry, link_targets):
+    """Return key and size of a tree entry (mode, blob, size)"""
+    mode, blob, size = entry
+    if mode == SYMLINK_MODE:
+        target = link_targets[blob].decode('utf-8', errors='replace')
+        name = target.rsplit('/', 1)[-1]
+        if ANNEX_KEY_REGEX.match(name):
+            return name, get_key_size(name)
+    return None, size
+
+
+def get_tree_changes(commit1, commit2, paths=(), cwd=None):
+    """Return the list of changes between two commits.
+
+    Each change is a dictionary with the keys status ('A', 'M',
+    'D' or 'R'), filename, oldfilename (for renamed files), the
+    annex keys key1 and key2, the sizes size1 and size2 and their
+    difference size_delta, as well as mode1, blob1, mode2, blob2.
+    Entries of the missing version are None. Paths whose blobs
+    or annex keys are equal in both commits are not included.
+    """
+    tree1 = read_tree(commit1, paths, cwd)
+    tree2 = read_tree(commit2, paths, cwd)
+    differing = [p for p in tree1 if tree2.get(p, (None,)*3)[1] != tree1[p][1]]
+    differing += [p for p in tree2 if p not in tree1]
+    link_blobs = []
+    for p in differing:
+        for tree in (tree1, tree2):
+            if p in tree and tree[p][0] == SYMLINK_MODE:
+                link_blobs.append(tree[p][1])
+    link_targets = read_blobs(link_blobs, cwd)
+
+    changes = []
+    removed = {}
+    added = []
+    for p in sorted(set(differing)):
+        entry1 = tree1.get(p)
+        entry2 = tree2.get(p)
+        key1, size1 = _describe(entry1, link_targets) if entry1 else (None, None)
+        key2, size2 = _describe(entry2, link_targets) if entry2 else (None, None)
+        change = {'filename': p, 'oldfilename': None,
+                  'key1': key1, 'key2': key2, 'size1': size1, 'size2': size2,
+                  'mode1': entry1[0] if entry1 else None,
+                  'blob1': entry1[1] if entry1 else None,
+                  'mode2': entry2[0] if entry2 else None,
+                  'blob2': entry2[1] if entry2 else None}
+        if entry1 is None:
+            change['status'] = 'A'
+            added.append(change)
+        elif entry2 is None:
+            change['status'] = 'D'
+            removed.setdefault(key1 or entry1[1], []).append(change)
+        elif key1 is not None and key1 == key2:
+            continue
+        else:
+            change['status'] = 'M'
+        changes.append(change)
+
+    # an added file with the key (or for files not managed by
+    # git-annex the blob) of a deleted file has been renamed
+    for change in added:
+        candidates = removed.get(change['key2'] or change['blob2'])
+        if candidates:
+            oldchange = candidates.pop(0)
+            changes.remove(oldchange)
+            change['status'] = 'R'
+            change['oldfilename'] = oldchange['filename']
+            for k in ('key1', 'size1', 'mode1', 'blob1'):
+                change[k] = oldchange[k]
+
+    for change in changes:
+        size1 = 0 if change['status'] == 'A' else change['size1']
+        size2 = 0 if change['status'] == 'D' else change['size2']
+        if size1 is not None and size2 is not None:
+            change['size_delta'] = size2 - size1
+        else:
+            change['size_delta'] = None
+    changes.sort(key=lambda c: c['filename'])
+    return changes
+
+
+def format_size_delta(size_delta):
+    """Return a size difference as human readable string"""
+    if size_delta is None:
+        return ''
+    sign = '+' if size_delta >= 0 else '-'
+    size = abs(size_delta)
+    for unit in ('B', 'kB', 'MB'):
+        if size < 1000 or unit == 'MB':
+            break
+        size /= 1000.
+    if unit == 'B':
+        return '{}{} {}'.format(sign, int(size), unit)
+    return '{}{:.1f} {}'.format(sign, size, unit)
@@ -0,0 +1,169 @@
+############################################################
+#
+# Date:         2026/10/17
+# Institution:  IAEA
+#
+# Functions to store files in a hashstore, i.e., a directory
+# where each file is named sha256-<hash> according to the
+# sha256 hash of its content. Each stored file is recorded
+# by a line '<sha256-hash> <filename>' in hashinfo.txt.
+#
+# Files are hashed before they are copied to a temporary
+# file in the hashstore, which is renamed once the copy is
+# complete, so that files already stored are not copied.
+# For git-annex objects, the hash contained in the SHA256E
+# key can be trusted instead of being computed.
+#
+############################################################
+
+import hashlib
+import os
+import shutil
+import stat
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from .metadata_cache import ANNEX_KEY_REGEX
+
+
+HASH_PREFIX = 'sha256-'
+HASHINFO_FILE = 'hashinfo.txt'
+
+
+def get_key_sha256(fpath):
+    """Return the sha256 hash in the git-annex key of a file or None.
+
+    For a symbolic link, the key is taken from the link target,
+    otherwise from the name of the file, which is the key for
+    objects in .git/annex/objects.
+    """
+    if os.path.islink(fpath):
+        name = os.path.basename(os.readlink(fpath))
+    else:
+        name = os.path.basename(fpath)
+    m = ANNEX_KEY_REGEX.match(name)
+    return m.group(0)[-64:] if m else None
+
+
+def compute_sha256(fpath, chunksize=2**20):
+    """Return the sha256 hash of the content of a file"""
+    hasher = hashlib.sha256()
+    with open(fpath, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunksize), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def _copy_with_hash(fpath, hashdir, hexhash=None, chunksize=2**20):
+    """Copy a file to a temporary file in hashdir.
+
+    The content is hashed during the copy unless hexhash is given.
+    Return the path of the temporary file and the hash.
+    """
+    fd, tmppath = tempfile.mkstemp(prefix='.tmp-', dir=hashdir)
+    try:
+        with open(fpath, 'rb') as fin, os.fdopen(fd, 'wb') as fout:
+            if hexhash is not None:
+                shutil.copyfileobj(fin, fout, chunksize)
+            else:
+                hasher = hashlib.sha256()
+                for chunk in iter(lambda: fin.read(chunksize), b''):
+                    hasher.update(chunk)
+                    fout.write(chunk)
+                hexhash = hasher.hexdigest()
+    except BaseException:
+        os.unlink(tmppath)
+        raise
+    return tmppath, hexhash
+
+
+def store_file(hashdir, fpath, trust_keys=False, verify_existing=True):
+    """Store a file in the hashstore.
+
+    If trust_keys is true, the hash in the git-annex key of the
+    file is used if available. Otherwise the file is hashed before
+    it is copied so that files already in the hashstore are not
+    copied, except for git-annex objects whose key points to a
+    file not yet in the hashstore, which are hashed during the copy.
+    Files already in the hashstore are checked for consistency
+    unless verify_existing is false. Return a tuple
+    (status, filehash, filename) with status 'stored' or 'skipped'.
+    The hashinfo.txt file is not updated.
+    """
+    filename = os.path.basename(fpath)
+    hexhash = get_key_sha256(fpath)
+
+    tmppath = None
+    if hexhash is not None and not trust_keys:
+        keypath = os.path.join(hashdir, HASH_PREFIX + hexhash)
+        if os.path.isfile(keypath):
+            hexhash = compute_sha256(fpath)
+        else:
+            tmppath, hexhash = _copy_with_hash(fpath, hashdir)
+    elif hexhash is None:
+        hexhash = compute_sha256(fpath)
+    filehash = HASH_PREFIX + hexhash
+    outfilepath = os.path.join(hashdir, filehash)
+
+    try:
+        if os.path.isfile(outfilepath):
+            if verify_existing:
+                existhash = HASH_PREFIX + compute_sha256(outfilepath)
+                if existhash != filehash:
+                    raise ValueError('Inconsistent file ' + existhash +
+                                     ' in hashstore')
+            return 'skipped', filehash, filename
+        if tmppath is None:
+            tmppath, _ = _copy_with_hash(fpath, hashdir, hexhash)
+        os.chmod(tmppath, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+        os.replace(tmppath, outfilepath)
+        tmppath = None
+        return 'stored', filehash, filename
+    finally:
+        if tmppath is not None:
+            os.unlink(tmppath)
+
+
+def store_files(hashdir, fpaths, trust_keys=False, verify_existing=True,
+                jobs=4, verbose=True):
+    """Store many files in the hashstore using a pool of threads.
+
+    The lines in hashinfo.txt are appended in the order of fpaths.
+    Files that are inconsistent with the hashstore are reported
+    and counted as failed. Return a dictionary with the number
+    of stored, skipped and failed files.
+    """
+    counts = {'stored': 0, 'skipped': 0, 'failed': 0}
+    logpath = os.path.join(hashdir, HASHINFO_FILE)
+
+    def store(fpath):
+        try:
+            return store_file(hashdir, fpath, trust_keys, verify_existing)
+        except ValueError as exc:
+            return 'failed', None, str(exc)
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor, \
+            open(logpath, 'a') as logf:
+        for fpath, res in zip(fpaths, executor.map(store, fpaths)):
+            status, filehash, filename = res
+            counts[status] += 1
+            if status == 'failed':
+                print("ERROR: could not store '" + fpath + "': " + filename)
+                continue
+            logf.write(filehash + ' ' + filename + '\n')
+            logf.flush()
+            if not verbose:
+                continue
+            if status == 'stored':
+                print("stored '" + fpath + "' as " + filehash)
+            else:
+                print("skipped '" + os.path.join(hashdir, filehash) +
+                      "' because already in hashstore")
+    return counts
+
+
+def get_hashstore_url(hashurl, fpath):
+    """Return the url of a git-annex symbolic link in a hashstore"""
+    hexhash = get_key_sha256(fpath)
+    if hexhash is None:
+        raise ValueError('no sha256 hash in the annex key of ' + fpath)
+    return hashurl + HASH_PREFIX + hexhash
@@ -16,8 +16,14 @@
 #   * Remove empty lines
 #   * Convert line endings to Unix-style (LF)
 #
-# This script makes use of the command line tools
-# sed and dos2unix. The script can be
+# With import_endf_files, the destination directory is
+# updated in place: the sha256 hash of the normalized
+# content of each file is compared with the file already
+# at its destination, and only added and changed files
+# are written and files without a source deleted.
+#
+# The normalization is done in a single streaming pass
+# without external tools. The script can be
 # run either as a stand-alone utility or imported
 # into other Python scripts.
 #
@@ -29,25 +35,46 @@
 #
 ############################################################
 
+import hashlib
 import os
-import sys
-import subprocess
 import shutil
 import re
-from utils.endf_metadata import is_endf_file
-from utils.rename_endf import rename_endf_files
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from utils.endf_metadata import get_endf_metadata
+from utils.file_sniffer import sniff_file, ENDF_FORMATS
+from utils.rename_endf import EndfNamingContext
+from utils.fendl_layout import list_dir_files
+from utils.hashstore import compute_sha256, get_key_sha256
+from utils.instrumentation import stage, count, executor_map
 
 
 def copy_endf_files(inpdir, outdir, pattern='.*',
                     name_template='[proj]_[matcode]_[fullsym].endf',
-                    dry_run=False):
-    """Copy endf files from inpdir to outdir and make transformations"""
+                    dry_run=False, jobs=1, verbose=True, formats=ENDF_FORMATS):
+    """Copy endf files from inpdir to outdir and make transformations
+
+    The files are processed by a pool of jobs worker processes.
+    Only files whose content is classified by sniff_file as one
+    of formats (by default endf, pendf or gendf) are copied.
+    Return a list with a dictionary for each file in inpdir matching
+    pattern, sorted by filename. Each dictionary contains the keys
+    source, destination, format, bytes, status and error. The status
+    is one of
+
+        copied    -- file has been copied to destination
+        planned   -- file would be copied to destination (dry run)
+        skipped   -- file is not in one of the formats
+        collision -- another file would be copied to the same destination
+        error     -- renaming or copying failed, see the error field
+    """
 
     if inpdir == outdir:
         print('input and output directory cannot be the same')
         raise ValueError
 
-    for curfile in os.listdir(inpdir):
+    fpaths = []
+    for curfile in sorted(os.listdir(inpdir)):
         fpath = os.path.join(inpdir, curfile)
         # skip not maching filenames
         is_match = re.match(pattern, curfile)
@@ -56,23 +83,357 @@ def copy_endf_files(inpdir, outdir, pattern='.*',
         # skip directories
         if not os.path.isfile(fpath):
             continue
-        elif not is_endf_file(fpath):
-            print('skipping ' + fpath + ' because not ENDF file')
-            continue
-        # copy the endf file to the appropriate location
-        # in the destination repository
-        try:
-            fname_out = rename_endf_files([fpath], name_template=name_template, name_only=True)
-        except:
-            print('could not rename ' + fpath)
-            continue
+        fpaths.append(fpath)
+
+    # determine the destination of the endf files
+    # in the destination repository
+    plan_args = [(fpath, outdir, name_template, formats) for fpath in fpaths]
+    with stage('copy_endf_files'):
+        with stage('plan'):
+            results = _map_jobs(_plan_endf_file, plan_args, jobs)
+        _mark_collisions(results)
+
+        copy_results = [r for r in results if r['status'] == 'planned']
+        if not dry_run:
+            copy_args = [(r['source'], r['destination']) for r in copy_results]
+            with stage('copy'):
+                copy_outcomes = _map_jobs(_copy_endf_file, copy_args, jobs)
+            for res, outcome in zip(copy_results, copy_outcomes):
+                res.update(outcome)
+
+    if verbose:
+        print_import_report(results)
+    return results
+
+
+def print_import_report(results):
+    """Print a line for each entry in the result of copy_endf_files"""
+    for res in results:
+        status = res['status']
+        if status == 'skipped' and res['format'] in ENDF_FORMATS:
+            print('skipping ' + res['source'] + ' because ' + res['format'] + ' file')
+        elif status == 'skipped':
+            print('skipping ' + res['source'] + ' because not ENDF file')
+        elif status in ('copied', 'planned'):
+            print('copying ' + res['source'] + ' to ' + res['destination'])
+        else:
+            print(status + ': ' + res['source'] + ' (' + res['error'] + ')')
+
+
+def plan_endf_import(inpdir, outdir, pattern='.*',
+                     name_template='[proj]_[matcode]_[fullsym].endf',
+                     jobs=1, formats=ENDF_FORMATS):
+    """Compare the files to import from inpdir with those in outdir.
+
+    Return the list of dictionaries of copy_endf_files, each with the
+    additional keys action and hash. The hash is the sha256 hash of
+    the normalized content. The action is one of
+
+        add    -- destination does not exist
+        update -- destination exists with a different content
+        keep   -- destination exists with the same content
+        delete -- file in outdir that is not the destination of any file,
+                  none if the destination of a failed file is unknown
+        skip   -- file is not imported (skipped, collision or error)
+
+    Only the sources and, if their git-annex key does not contain
+    the hash, the existing destinations are read.
+    """
+    if inpdir == outdir:
+        print('input and output directory cannot be the same')
+        raise ValueError
+
+    fpaths = []
+    for curfile in sorted(os.listdir(inpdir)):
+        fpath = os.path.join(inpdir, curfile)
+        if re.match(pattern, curfile) and os.path.isfile(fpath):
+            fpaths.append(fpath)
+
+    plan_args = [(fpath, outdir, name_template, formats) for fpath in fpaths]
+    with stage('plan_endf_import'):
+        plan = _map_jobs(_plan_endf_update, plan_args, jobs)
+        _mark_collisions(plan)
+        # existing destinations of colliding and failed files are kept;
+        # if the destination of a failed file is unknown, nothing is deleted
+        destinations = set()
+        unknown = False
+        for res in plan:
+            if res['status'] != 'planned':
+                res['action'] = 'skip'
+            if res['status'] in ('planned', 'collision', 'error'):
+                if res['destination'] is None:
+                    unknown = True
+                else:
+                    destinations.add(res['destination'])
+        existing = list_dir_files(outdir) if os.path.isdir(outdir) else []
+        if unknown:
+            print('WARNING: not deleting any files in ' + outdir +
+                  ' because the destination of a file could not be determined')
+            existing = []
+        for fname in existing:
+            destpath = os.path.join(outdir, fname)
+            if destpath not in destinations:
+                plan.append({'source': None, 'destination': destpath,
+                             'format': None, 'bytes': os.lstat(destpath).st_size,
+                             'status': 'planned', 'error': None,
+                             'action': 'delete', 'hash': None})
+    return plan
+
+
+def execute_endf_import(plan, dry_run=False, jobs=1, verbose=True):
+    """Apply the adds, updates and deletes of plan_endf_import.
+
+    Files with the action keep are not touched so that a second
+    import of unchanged files does not write anything. The status
+    of the entries is set as in copy_endf_files, with unchanged
+    for kept files and deleted for removed files. Return a
+    dictionary with the number of files and bytes of each action.
+    """
+    stats = {k: [0, 0] for k in ('add', 'update', 'keep', 'delete', 'skip')}
+    for res in plan:
+        stats[res['action']][0] += 1
+        stats[res['action']][1] += res['bytes']
+        if res['action'] == 'keep':
+            res['status'] = 'unchanged'
+    if verbose:
+        for res in plan:
+            if res['action'] in ('add', 'update'):
+                print(res['action'] + ' ' + res['source'] + ' -> ' + res['destination'])
+            elif res['action'] == 'delete':
+                print('delete ' + res['destination'])
+            elif res['action'] == 'skip':
+                print_import_report([res])
+    if dry_run:
+        return stats
+
+    copy_results = [r for r in plan if r['action'] in ('add', 'update')]
+    with stage('execute_endf_import'):
+        for destdir in set(os.path.dirname(r['destination']) for r in copy_results):
+            os.makedirs(destdir, exist_ok=True)
+        copy_args = [(r['source'], r['destination']) for r in copy_results]
+        copy_outcomes = _map_jobs(_copy_endf_file, copy_args, jobs)
+        for res, outcome in zip(copy_results, copy_outcomes):
+            res.update(outcome)
+            if res['status'] == 'error':
+                print(res['status'] + ': ' + res['source'] + ' (' + res['error'] + ')')
+        for res in plan:
+            if res['action'] == 'delete':
+                os.unlink(res['destination'])
+                res['status'] = 'deleted'
+    return stats
+
+
+def import_endf_files(inpdir, outdir, pattern='.*',
+                      name_template='[proj]_[matcode]_[fullsym].endf',
+                      dry_run=False, jobs=1, verbose=True, formats=ENDF_FORMATS):
+    """Bring outdir up to date with the ENDF files in inpdir.
+
+    In contrast to copy_endf_files, files whose normalized content
+    is already present in outdir are not copied again and files in
+    outdir that do not correspond to any file in inpdir are deleted.
+    Return the plan and the statistics of execute_endf_import.
+    """
+    plan = plan_endf_import(inpdir, outdir, pattern, name_template, jobs, formats)
+    stats = execute_endf_import(plan, dry_run, jobs, verbose)
+    return plan, stats
+
+
+def print_import_stats(stats, dry_run=False):
+    """Print a summary of the statistics returned by execute_endf_import"""
+    prefix = 'would be ' if dry_run else ''
+    labels = (('add', 'added'), ('update', 'updated'), ('keep', 'unchanged'),
+              ('delete', 'deleted'), ('skip', 'skipped'))
+    for kind, label in labels:
+        nfiles, nbytes = stats[kind]
+        if kind in ('add', 'update', 'delete'):
+            label = prefix + label
+        print('{:>8} files {:>16,} bytes {}'.format(nfiles, nbytes, label))
+
+
+def remove_stale_dirs(basedir, keep_dirs, dry_run=False):
+    """Delete the directories below basedir not containing any of keep_dirs.
+
+    Hidden directories are kept. Return the list of removed directories.
+    """
+    keep_dirs = [os.path.normpath(d) for d in keep_dirs]
+    removed = []
+    for root, dirs, files in os.walk(basedir):
+        subdirs = []
+        for curdir in sorted(d for d in dirs if not d.startswith('.')):
+            dirpath = os.path.normpath(os.path.join(root, curdir))
+            if any(d == dirpath or d.startswith(dirpath + os.sep) for d in keep_dirs):
+                subdirs.append(curdir)
+                continue
+            print(('would delete ' if dry_run else 'delete ') + dirpath)
+            if not dry_run:
+                shutil.rmtree(dirpath)
+            removed.append(dirpath)
+        dirs[:] = subdirs
+    return removed
+
+
+def _plan_endf_update(fpath, outdir, name_template, formats):
+    """Determine the destination of a file and whether it must be written"""
+    res = _plan_endf_file(fpath, outdir, name_template, formats)
+    res['action'] = None
+    res['hash'] = None
+    if res['status'] != 'planned':
+        return res
+    try:
+        res['hash'], res['bytes'] = hash_normalized_endf_file(fpath)
+    except Exception as exc:
+        res['status'] = 'error'
+        res['error'] = 'could not read: ' + str(exc)
+        return res
+    destpath = res['destination']
+    if not os.path.lexists(destpath):
+        res['action'] = 'add'
+    elif _get_content_hash(destpath) == res['hash']:
+        res['action'] = 'keep'
+    else:
+        res['action'] = 'update'
+    return res
+
+
+def _get_content_hash(fpath):
+    """Return the sha256 hash of a file, taken from its annex key if possible"""
+    keyhash = get_key_sha256(fpath)
+    if keyhash is not None:
+        return keyhash
+    if not os.path.isfile(fpath):
+        return None
+    count('files_opened')
+    return compute_sha256(fpath)
+
+
+def _map_jobs(func, args_list, jobs):
+    """Apply func to each tuple in args_list and keep the order"""
+    if jobs == 1 or len(args_list) < 2:
+        return [func(*args) for args in args_list]
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        return list(executor_map(executor, func, *zip(*args_list)))
+
+
+def _plan_endf_file(fpath, outdir, name_template, formats):
+    """Check the format of a file and determine its new path"""
+    res = {'source': fpath, 'destination': None, 'format': None,
+           'bytes': 0, 'status': 'planned', 'error': None}
+    try:
+        # the metadata are taken from the bytes read for the format
+        sniffed = sniff_file(fpath, with_metadata=True)
+        res['format'] = sniffed.format
+        if sniffed.format not in formats:
+            res['status'] = 'skipped'
+            return res
+        meta_dic = sniffed.metadata
+        if meta_dic is None:
+            meta_dic = get_endf_metadata(fpath)
+        naming = EndfNamingContext(meta_dic, orig_fpath=fpath)
+        fname_out = naming.render(name_template)
+    except Exception as exc:
+        res['status'] = 'error'
+        res['error'] = 'could not rename: ' + str(exc)
+        return res
+    res['destination'] = os.path.join(outdir, fname_out)
+    return res
+
+
+def _mark_collisions(results):
+    """Flag files whose new names coincide with those of other files"""
+    sources = {}
+    for res in results:
+        if res['destination'] is not None:
+            sources.setdefault(res['destination'], []).append(res['source'])
+    for res in results:
+        cursources = sources.get(res['destination'], [])
+        if len(cursources) > 1:
+            others = [s for s in cursources if s != res['source']]
+            res['status'] = 'collision'
+            res['error'] = 'same destination as ' + ', '.join(others)
+
+
+def _copy_endf_file(fpath, fpath_out):
+    """Copy and normalize an ENDF file and report the outcome"""
+    try:
+        if os.path.islink(fpath_out):
+            os.unlink(fpath_out)
+        nbytes = normalize_endf_file(fpath, fpath_out)
+    except Exception as exc:
+        return {'status': 'error', 'error': 'could not copy: ' + str(exc)}
+    return {'status': 'copied', 'bytes': nbytes}
+
+
+# whitespace characters matched by [[:space:]] in sed
+_SPACE_CHARS = b' \t\n\v\f\r'
+_UTF8_BOM = b'\xef\xbb\xbf'
+
+
+def _iter_normalized_blocks(fin, chunksize=2**20):
+    """Yield the normalized content of an open binary file in blocks"""
+    pending = fin.read(len(_UTF8_BOM))
+    if pending == _UTF8_BOM:
+        pending = b''
+    while True:
+        chunk = fin.read(chunksize)
+        if chunk:
+            pending += chunk
+        lines = pending.split(b'\n')
+        # the last element is an incomplete line
+        pending = lines.pop()
+        outlines = []
+        for curline in lines:
+            if curline.endswith(b'\r'):
+                curline = curline[:-1]
+            if curline.strip(_SPACE_CHARS):
+                outlines.append(curline)
+        if outlines:
+            outlines.append(b'')
+            yield b'\n'.join(outlines)
+        if not chunk:
+            break
+    # sed keeps a missing newline at the end of the file
+    if pending.strip(_SPACE_CHARS):
+        yield pending
+
+
+def hash_normalized_endf_file(inpath, chunksize=2**20):
+    """Return the sha256 hash and size of the content normalize_endf_file writes"""
+    hasher = hashlib.sha256()
+    nbytes = 0
+    count('files_opened')
+    with open(inpath, 'rb') as fin:
+        for block in _iter_normalized_blocks(fin, chunksize):
+            hasher.update(block)
+            nbytes += len(block)
+    count('bytes_read', os.path.getsize(inpath))
+    return hasher.hexdigest(), nbytes
+
+
+def normalize_endf_file(inpath, outpath, chunksize=2**20):
+    """Copy a file converting CRLF to LF and removing blank lines.
 
-        fpath_out = os.path.join(outdir, fname_out)
-        print('copying ' + fpath + ' to ' + fpath_out)
-        if not dry_run: 
-            if os.path.islink(fpath_out):
-                os.unlink(fpath_out)
-            shutil.copy(fpath, fpath_out, follow_symlinks=False)
-            subprocess.run(['dos2unix', fpath_out])
-            print('removing empty lines from ' + fpath_out)
-            subprocess.run(['sed', '-i', '/^[[:space:]]*$/d', fpath_out])
+    The result is the same as the one of the previous pipeline
+    'cp', 'dos2unix' and "sed -i '/^[[:space:]]*$/d'":
+    a byte order mark at the beginning is removed, CRLF is replaced
+    by LF, and lines containing only whitespace are dropped.
+    The file is processed in chunks of chunksize bytes and written to
+    a temporary file in the destination directory, which is renamed
+    to outpath at the end. The permission bits of inpath are copied.
+    Return the number of bytes written.
+    """
+    outdir = os.path.dirname(os.path.abspath(outpath))
+    fd, tmppath = tempfile.mkstemp(dir=outdir, prefix='.tmp_endf_')
+    nbytes = 0
+    try:
+        count('files_opened', 2)
+        with open(inpath, 'rb') as fin, os.fdopen(fd, 'wb') as fout:
+            for block in _iter_normalized_blocks(fin, chunksize):
+                nbytes += fout.write(block)
+        shutil.copymode(inpath, tmppath)
+        os.replace(tmppath, outpath)
+        count('bytes_read', os.path.getsize(inpath))
+        count('bytes_written', nbytes)
+    except BaseException:
+        os.unlink(tmppath)
+        raise
+    return nbytes
@@ -0,0 +1,244 @@
+############################################################
+#
+# Date:         2026/10/17
+# Institution:  IAEA
+#
+# Instrumentation of the scripts with a JSON run report.
+# The report contains the wall time of each stage, counters
+# such as bytes read and written, opened files and cache
+# hits, and the number and duration of the subprocesses
+# launched, e.g., git and git-annex, grouped by command.
+# Stages can be nested and are then reported with the
+# names of the enclosing stages, e.g.,
+# create_sublib_html/get_endf_metadata.
+#
+# The instrumentation is enabled with enable_instrumentation
+# or if the environment variable FENDL_RUN_REPORT contains
+# the path of the report file. If this path is a directory,
+# the report is written to <script>-<time>-<pid>.json in it
+# so that several scripts of a pipeline can share it. The
+# report is written when the program exits. As long as the
+# instrumentation is disabled, stage returns a shared empty
+# context manager and count returns immediately.
+#
+# Worker processes record into their own reports. Functions
+# run with executor_map send what they recorded back to the
+# main process, where it is added to the active report.
+#
+############################################################
+
+import atexit
+import contextlib
+import itertools
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+
+class RunReport(object):
+    """Timers, counters and subprocess statistics of a run."""
+
+    def __init__(self, path=None):
+        self.path = path
+        self.started = time.time()
+        self.stages = {}
+        self.counters = {}
+        self.subprocesses = {}
+        self._stack = []
+        self._starttime = time.perf_counter()
+        self._owner_pid = os.getpid()
+
+    def current_stage(self):
+        """Return the name of the innermost stage including its parents"""
+        return '/'.join(self._stack)
+
+    def add_stage(self, name, seconds, calls=1):
+        entry = self.stages.setdefault(name, {'calls': 0, 'seconds': 0.0})
+        entry['calls'] += calls
+        entry['seconds'] += seconds
+
+    def add(self, name, value=1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def add_subprocess(self, command, seconds, failed=0, calls=1):
+        # failed is the number of calls with a non-zero exit status
+        entry = self.subprocesses.setdefault(
+            command, {'calls': 0, 'seconds': 0.0, 'failed': 0})
+        entry['calls'] += calls
+        entry['seconds'] += seconds
+        entry['failed'] += int(failed)
+
+    def merge(self, recorded):
+        """Add stages, counters and subprocesses returned by to_dict.
+
+        The stages are put below the stage currently running.
+        """
+        prefix = self.current_stage()
+        for name, entry in recorded['stages'].items():
+            fullname = prefix + '/' + name if prefix else name
+            self.add_stage(fullname, entry['seconds'], entry['calls'])
+        for name, value in recorded['counters'].items():
+            self.add(name, value)
+        for command, entry in recorded['subprocesses'].items():
+            self.add_subprocess(command, entry['seconds'], entry['failed'],
+                                entry['calls'])
+
+    def to_dict(self):
+        # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+        unit = 1 if sys.platform == 'darwin' else 1024
+        return {'command': sys.argv,
+                'started': time.strftime('%Y-%m-%dT%H:%M:%S',
+                                         time.localtime(self.started)),
+                'wall_time': time.perf_counter() - self._starttime,
+                'peak_rss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * unit,
+                'stages': self.stages,
+                'counters': self.counters,
+                'subprocesses': self.subprocesses}
+
+    def get_report_path(self):
+        """Return the path of the report file"""
+        if not os.path.isdir(self.path):
+            return self.path
+        script = os.path.splitext(os.path.basename(sys.argv[0] or 'python'))[0]
+        fname = '{}-{}-{}.json'.format(script, time.strftime(
+                '%Y%m%dT%H%M%S', time.localtime(self.started)), os.getpid())
+        return os.path.join(self.path, fname)
+
+    def save(self):
+        """Write the report to its file"""
+        outpath = self.get_report_path()
+        outdir = os.path.dirname(os.path.abspath(outpath))
+        fd, tmppath = tempfile.mkstemp(dir=outdir, prefix='.tmp-report-')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(self.to_dict(), f, indent=2)
+            os.replace(tmppath, outpath)
+        except BaseException:
+            os.unlink(tmppath)
+            raise
+        return outpath
+
+
+class _Stage(object):
+    """Context manager adding its wall time to a stage of the report"""
+
+    def __init__(self, report, name):
+        self.report = report
+        self.name = name
+
+    def __enter__(self):
+        self.report._stack.append(self.name)
+        self.fullname = self.report.current_stage()
+        self.starttime = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.report.add_stage(self.fullname, time.perf_counter() - self.starttime)
+        self.report._stack.pop()
+
+
+_active_report = None
+_NULL_STAGE = contextlib.nullcontext()
+
+
+def enable_instrumentation(path=None):
+    """Record a run report, written to path at exit if given"""
+    global _active_report
+    _active_report = RunReport(path)
+    return _active_report
+
+
+def disable_instrumentation():
+    """Stop recording and discard the report"""
+    global _active_report
+    _active_report = None
+
+
+def get_active_report():
+    """Return the report currently recorded or None"""
+    return _active_report
+
+
+def stage(name):
+    """Return a context manager measuring the wall time of a stage"""
+    if _active_report is None:
+        return _NULL_STAGE
+    return _Stage(_active_report, name)
+
+
+def count(name, value=1):
+    """Add value to a counter, e.g., bytes_read"""
+    if _active_report is not None:
+        _active_report.add(name, value)
+
+
+def get_command_name(args):
+    """Return the name a command is reported with, e.g., git annex"""
+    if isinstance(args, str):
+        args = args.split()
+    name = os.path.basename(args[0])
+    if name == 'git' and len(args) > 1:
+        name += ' ' + args[1]
+        if args[1] == 'annex' and len(args) > 2:
+            name += ' ' + args[2]
+    return name
+
+
+def record_subprocess(args, seconds, failed=False):
+    """Record the duration of a subprocess started elsewhere"""
+    if _active_report is not None:
+        _active_report.add_subprocess(get_command_name(args), seconds, failed)
+
+
+def run_subprocess(args, **kwargs):
+    """Call subprocess.run and record the duration of the command"""
+    if _active_report is None:
+        return subprocess.run(args, **kwargs)
+    starttime = time.perf_counter()
+    failed = True
+    try:
+        proc = subprocess.run(args, **kwargs)
+        failed = proc.returncode != 0
+        return proc
+    finally:
+        record_subprocess(args, time.perf_counter() - starttime, failed)
+
+
+def call_and_collect(func, *args):
+    """Call func in a worker process and return its result and records"""
+    global _active_report
+    _active_report = RunReport()
+    result = func(*args)
+    return result, _active_report.to_dict()
+
+
+def _merge_worker_results(pairs):
+    for result, recorded in pairs:
+        if _active_report is not None:
+            _active_report.merge(recorded)
+        yield result
+
+
+def executor_map(executor, func, *iterables, chunksize=1):
+    """Like executor.map, with the records of the workers added to the report"""
+    if _active_report is None:
+        return executor.map(func, *iterables, chunksize=chunksize)
+    pairs = executor.map(call_and_collect, itertools.repeat(func),
+                         *iterables, chunksize=chunksize)
+    return _merge_worker_results(pairs)
+
+
+@atexit.register
+def _save_active_report():
+    if (_active_report is not None and _active_report.path is not None and
+            _active_report._owner_pid == os.getpid()):
+        outpath = _active_report.save()
+        print('run report written to ' + outpath)
+
+
+if os.environ.get('FENDL_RUN_REPORT'):
+    enable_instrumentation(os.environ['FENDL_RUN_REPORT'])
@@ -0,0 +1,217 @@
+############################################################
+#
+# Date:         2026/10/17
+# Institution:  IAEA
+#
+# Persistent cache for the metadata extracted from the
+# headers of ENDF files. The cache is stored in a local
+# SQLite file. Entries of regular files are identified by
+# their path and invalidated as soon as size, modification
+# time or inode change. Entries of git-annex symbolic links
+# are identified by the annex key (e.g., SHA256E-s...--<hash>)
+# so that they remain valid across checkouts and copies
+# of the repository.
+#
+# The cache is used by get_endf_metadata in endf_metadata.py
+# if it has been enabled with enable_metadata_cache or
+# if the environment variable FENDL_METADATA_CACHE contains
+# the path to the cache file. The database is opened in WAL
+# mode and every change is committed in a short transaction,
+# so that several processes can use the cache at the same time.
+#
+############################################################
+
+import atexit
+import json
+import os
+import re
+import sqlite3
+import time
+
+
+ANNEX_KEY_REGEX = re.compile(r'^SHA256E?-s[0-9]+--[0-9a-f]{64}')
+
+
+def get_annex_key(fpath):
+    """Return the git-annex key of a symbolic link or None"""
+    if not os.path.islink(fpath):
+        return None
+    target = os.path.basename(os.readlink(fpath))
+    m = ANNEX_KEY_REGEX.match(target)
+    return target if m else None
+
+
+def get_file_signature(fpath):
+    """Return a string with size, modification time and inode of a file"""
+    st = os.stat(fpath)
+    return '{}:{}:{}'.format(st.st_size, st.st_mtime_ns, st.st_ino)
+
+
+class MetadataCache(object):
+    """Cache for the metadata of ENDF files in an SQLite database."""
+
+    def __init__(self, dbpath, commit_interval=1):
+        self.dbpath = dbpath
+        self.commit_interval = commit_interval
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._conn = None
+        self._pid = None
+        self._pending = 0
+        self._owner_pid = os.getpid()
+
+    def _connect(self):
+        # each process needs its own connection
+        if self._conn is None or self._pid != os.getpid():
+            self._conn = sqlite3.connect(self.dbpath, timeout=60)
+            self._pid = os.getpid()
+            # readers do not wait for writers and commits do not sync
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS metadata ('
+                'cachekey TEXT PRIMARY KEY, '
+                'signature TEXT NOT NULL, '
+                'metadata TEXT NOT NULL, '
+                'stored_at REAL NOT NULL)')
+            self._conn.commit()
+        return self._conn
+
+    def _get_cachekey(self, fpath):
+        """Return the key and signature of the cache entry of a file"""
+        annex_key = get_annex_key(fpath)
+        if annex_key is not None:
+            return 'annex:' + annex_key, ''
+        return 'path:' + os.path.abspath(fpath), get_file_signature(fpath)
+
+    def lookup(self, fpath):
+        """Retrieve the metadata of a file from the cache.
+
+        Return a tuple (found, metadata). A stale entry of
+        a file that has been modified is deleted.
+        """
+        cachekey, signature = self._get_cachekey(fpath)
+        conn = self._connect()
+        row = conn.execute('SELECT signature, metadata FROM metadata '
+                           'WHERE cachekey = ?', (cachekey,)).fetchone()
+        if row is not None and row[0] == signature:
+            self.hits += 1
+            return True, json.loads(row[1])
+        if row is not None:
+            conn.execute('DELETE FROM metadata WHERE cachekey = ?',
+                         (cachekey,))
+            self.evictions += 1
+            self._register_change()
+        self.misses += 1
+        return False, None
+
+    def store(self, fpath, meta_dic):
+        """Store the metadata of a file in the cache"""
+        self.store_many([(fpath, meta_dic)])
+
+    def store_many(self, items):
+        """Store the metadata of several files in one transaction"""
+        rows = []
+        for fpath, meta_dic in items:
+            cachekey, signature = self._get_cachekey(fpath)
+            rows.append((cachekey, signature, json.dumps(meta_dic), time.time()))
+        conn = self._connect()
+        conn.executemany('INSERT OR REPLACE INTO metadata VALUES (?, ?, ?, ?)', rows)
+        self._register_change()
+
+    def purge(self, max_age=None):
+        """Remove stale entries from the cache.
+
+        Entries of regular files are removed if the file does not
+        exist anymore or has been modified. If max_age is given,
+        also entries of annex keys not stored within the last
+        max_age seconds are removed. Return the number of
+        removed entries.
+        """
+        conn = self._connect()
+        stale = []
+        rows = conn.execute('SELECT cachekey, signature, stored_at '
+                            'FROM metadata').fetchall()
+        for cachekey, signature, stored_at in rows:
+            if cachekey.startswith('path:'):
+                fpath = cachekey[len('path:'):]
+                try:
+                    is_stale = get_file_signature(fpath) != signature
+                except OSError:
+                    is_stale = True
+            else:
+                is_stale = (max_age is not None and
+                            time.time() - stored_at > max_age)
+            if is_stale:
+                stale.append((cachekey,))
+        conn.executemany('DELETE FROM metadata WHERE cachekey = ?', stale)
+        conn.commit()
+        self.evictions += len(stale)
+        return len(stale)
+
+    def _register_change(self):
+        self._pending += 1
+        # an open write transaction blocks the other processes,
+        # e.g., forked worker processes, that use the cache
+        if (self._pending >= self.commit_interval or
+                os.getpid() != self._owner_pid):
+            self.commit()
+
+    def commit(self):
+        """Write pending changes to the cache file"""
+        if self._conn is not None and self._pid == os.getpid():
+            self._conn.commit()
+        self._pending = 0
+
+    def close(self):
+        """Commit pending changes and close the cache file"""
+        self.commit()
+        if self._conn is not None and self._pid == os.getpid():
+            self._conn.close()
+        self._conn = None
+
+    def get_stats(self):
+        """Return a dictionary with hit, miss and eviction counts"""
+        return {'hits': self.hits, 'misses': self.misses,
+                'evictions': self.evictions}
+
+    def print_stats(self):
+        """Print the hit and miss counts"""
+        print('metadata cache {}: {} hits, {} misses, {} evictions'.format(
+              self.dbpath, self.hits, self.misses, self.evictions))
+
+
+_active_cache = None
+
+
+def enable_metadata_cache(dbpath):
+    """Use the cache in dbpath for all calls of get_endf_metadata"""
+    global _active_cache
+    if _active_cache is not None:
+        _active_cache.close()
+    _active_cache = MetadataCache(dbpath)
+    return _active_cache
+
+
+def disable_metadata_cache():
+    """Stop using the cache for calls of get_endf_metadata"""
+    global _active_cache
+    if _active_cache is not None:
+        _active_cache.close()
+    _active_cache = None
+
+
+def get_active_cache():
+    """Return the metadata cache currently in use or None"""
+    return _active_cache
+
+
+@atexit.register
+def _close_active_cache():
+    if _active_cache is not None:
+        _active_cache.close()
+
+
+if os.environ.get('FENDL_METADATA_CACHE'):
+    enable_metadata_cache(os.environ['FENDL_METADATA_CACHE'])
@@ -0,0 +1,128 @@
+############################################################
+#
+# Date:         2026/10/17
+# Institution:  IAEA
+#
+# Functions to create the html files with the differences
+# of the files that changed between two commits of a
+# git-annex repository in parallel. The changes are
+# determined by get_tree_changes in git_changes.py.
+#
+############################################################
+
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from .endf_diff import write_diff_html
+from .git_changes import read_blobs
+
+
+SYMLINK_MODE = '120000'
+
+
+def _materialize_version(filename, mode, content, cwd=None):
+    """Return a path to the content of a file version.
+
+    content is the content of the blob of the version. For
+    git-annex symbolic links, the path is the object in the local
+    annex. Regular files are written to a temporary file. The second
+    return value tells whether the path must be deleted afterwards.
+    """
+    rootdir = cwd if cwd is not None else '.'
+    if mode == SYMLINK_MODE:
+        linkdir = os.path.dirname(os.path.join(rootdir, filename))
+        truefile = os.path.join(linkdir, content.decode('utf-8'))
+        if not os.path.isfile(truefile):
+            raise FileNotFoundError('content of ' + filename + ' not available,'
+                                    ' use git annex get')
+        return truefile, False
+    fd, tmppath = tempfile.mkstemp(suffix='.endf')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(content)
+    return tmppath, True
+
+
+def create_difffile(change, diffdir, contents, cwd=None):
+    """Create the html file with the differences of a modified file.
+
+    contents is a tuple with the contents of the blobs of both
+    versions as returned by read_blobs. Return a dictionary with
+    the filename, the elapsed time, the number of changed sections
+    and an error message or None.
+    """
+    starttime = time.time()
+    res = {'filename': change['filename'], 'nchanged': 0, 'error': None}
+    tmppaths = []
+    try:
+        fpath1, istmp1 = _materialize_version(change['filename'],
+                                              change['mode1'], contents[0], cwd)
+        if istmp1:
+            tmppaths.append(fpath1)
+        fpath2, istmp2 = _materialize_version(change['filename'],
+                                              change['mode2'], contents[1], cwd)
+        if istmp2:
+            tmppaths.append(fpath2)
+        difffile = os.path.join(diffdir, change['filename'] + '.diff.html')
+        os.makedirs(os.path.dirname(difffile), exist_ok=True)
+        results = write_diff_html(fpath1, fpath2, difffile,
+                                  title=change['filename'])
+        res['nchanged'] = sum(1 for r in results if r['status'] != 'identical')
+    except Exception as exc:
+        res['error'] = str(exc)
+    finally:
+        for tmppath in tmppaths:
+            os.unlink(tmppath)
+    res['elapsed'] = time.time() - starttime
+    return res
+
+
+def create_difffiles(changes, diffdir, jobs=1, cwd=None, verbose=True):
+    """Create the html files of all modified files with a pool of processes.
+
+    Return the list with the results of create_difffile in the
+    order of completion. Progress is printed if verbose is true.
+    """
+    modified = [c for c in changes if c['status'] == 'M']
+    results = []
+    if not modified:
+        return results
+    # the blobs of all versions are read by a single git process
+    blobs = read_blobs([c[k] for c in modified for k in ('blob1', 'blob2')], cwd)
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [executor.submit(create_difffile, c, diffdir,
+                                   (blobs[c['blob1']], blobs[c['blob2']]), cwd)
+                   for c in modified]
+        for i, future in enumerate(as_completed(futures), start=1):
+            res = future.result()
+            results.append(res)
+            if not verbose:
+                continue
+            if res['error'] is None:
+                print('[{}/{}] {} ({} sections changed, {:.2f} s)'.format(
+                      i, len(modified), res['filename'], res['nchanged'],
+                      res['elapsed']))
+            else:
+                print('[{}/{}] {} failed: {}'.format(
+                      i, len(modified), res['filename'], res['error']))
+    return results
+
+
+def group_by_directory(changes):
+    """Return a dictionary mapping directories to their changed files"""
+    groups = {}
+    for change in changes:
+        dirname = os.path.dirname(change['filename'])
+        groups.setdefault(dirname, []).append(change)
+    return groups
+
+
+def write_changes_file(changes, outfile):
+    """Write the changes in the format of 'git diff --name-status'"""
+    with open(outfile, 'w') as f:
+        for change in changes:
+            if change['status'] == 'R':
+                f.write('R\t' + change['oldfilename'] + '\t' +
+                        change['filename'] + '\n')
+            else:
+                f.write(change['status'] + '\t' + change['filename'] + '\n')
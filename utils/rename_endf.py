@@ -41,17 +41,18 @@ NLIB_DIC = {
 }
 
 
-def rename_endf_files(filenames,
-                      name_template='[proj]_[matcode]_[fullsym].endf',
-                      name_only=False):
-
-    """Rename one or more endf files according to metadata."""
-    for orig_fpath in filenames:
-        meta_data = get_endf_metadata(orig_fpath)
-
-        orig_fdir, orig_fname = os.path.split(orig_fpath)
-        orig_fname_noext, orig_ext = os.path.splitext(orig_fname)
-
+class EndfNamingContext(object):
+    """Names derived from the metadata of an ENDF file.
+
+    The context is built once from the metadata and renders
+    any number of filename templates without reading the file again.
+    Available placeholders are [fullsym], [iaeasym], [iaeasym_nomass],
+    [elem], [charge], [mass], [proj], [matcode], [libname] and,
+    if the path of the original file is given, [filename], [ext]
+    and [fbase].
+    """
+
+    def __init__(self, meta_data, orig_fpath=None):
         # get material code
         m = re.search('([0-9]+)', meta_data['HSUB_MAT'])
         if m:
@@ -105,19 +106,56 @@ def rename_endf_files(filenames,
         else:
             raise ValueError('ERROR: Unknown sublibrary type (NSUB=' + str(NSUB) + ')')
 
-        # create filename from template
-        new_fname = name_template.replace('[fullsym]', sym_name)
-        new_fname = new_fname.replace('[iaeasym]', sym_name_iaea)
-        new_fname = new_fname.replace('[iaeasym_nomass]', sym_name_iaea_nomass)
-        new_fname = new_fname.replace('[elem]', elem)
-        new_fname = new_fname.replace('[charge]', charge)
-        new_fname = new_fname.replace('[mass]', mass)
-        new_fname = new_fname.replace('[proj]', inc_part)
-        new_fname = new_fname.replace('[matcode]', mat_code_str)
-        new_fname = new_fname.replace('[filename]', orig_fname)
-        new_fname = new_fname.replace('[ext]', orig_ext)
-        new_fname = new_fname.replace('[fbase]', orig_fname_noext)
-        new_fname = new_fname.replace('[libname]', libname)
+        self.fullsym = sym_name
+        self.iaeasym = sym_name_iaea
+        self.iaeasym_nomass = sym_name_iaea_nomass
+        self.elem = elem
+        self.charge = charge
+        self.mass = mass
+        self.proj = inc_part
+        self.matcode = mat_code_str
+        self.libname = libname
+        self.filename = None
+        self.ext = None
+        self.fbase = None
+        if orig_fpath is not None:
+            orig_fdir, orig_fname = os.path.split(orig_fpath)
+            orig_fname_noext, orig_ext = os.path.splitext(orig_fname)
+            self.filename = orig_fname
+            self.ext = orig_ext
+            self.fbase = orig_fname_noext
+
+    @classmethod
+    def from_file(cls, fpath):
+        """Create the naming context from the header of an ENDF file"""
+        return cls(get_endf_metadata(fpath), orig_fpath=fpath)
+
+    def render(self, name_template):
+        """Create a filename from a template"""
+        # the replacements are applied in this order
+        placeholders = ('fullsym', 'iaeasym', 'iaeasym_nomass', 'elem',
+                        'charge', 'mass', 'proj', 'matcode', 'filename',
+                        'ext', 'fbase', 'libname')
+        new_fname = name_template
+        for curname in placeholders:
+            value = getattr(self, curname)
+            if value is None:
+                if '[' + curname + ']' in new_fname:
+                    raise ValueError('ERROR: [' + curname + '] requires ' +
+                                     'the path of the original file')
+                continue
+            new_fname = new_fname.replace('[' + curname + ']', value)
+        return new_fname
+
+
+def rename_endf_files(filenames,
+                      name_template='[proj]_[matcode]_[fullsym].endf',
+                      name_only=False):
+
+    """Rename one or more endf files according to metadata."""
+    for orig_fpath in filenames:
+        naming = EndfNamingContext.from_file(orig_fpath)
+        new_fname = naming.render(name_template)
 
         if name_only:
             return new_fname
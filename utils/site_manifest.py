@@ -0,0 +1,95 @@
+############################################################
+#
+# Date:         2026/10/17
+# Institution:  IAEA
+#
+# Helpers for a manifest file that records fingerprints
+# of the inputs used to create the pages of the FENDL
+# website. By comparing the fingerprints of the current
+# inputs with those in the manifest, only the pages whose
+# inputs changed need to be recreated. Manifests and other
+# state files are kept outside the website data directory,
+# by default in FENDL_STATE_DIR or $XDG_CACHE_HOME/fendl-code.
+#
+############################################################
+
+import hashlib
+import json
+import os
+import tempfile
+from .metadata_cache import get_annex_key
+
+
+MANIFEST_VERSION = 1
+
+
+def get_state_dir():
+    """Return the directory for state files of the scripts"""
+    if os.environ.get('FENDL_STATE_DIR'):
+        return os.environ['FENDL_STATE_DIR']
+    cache_dir = os.environ.get('XDG_CACHE_HOME') or \
+        os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(cache_dir, 'fendl-code')
+
+
+def get_state_path(path, suffix):
+    """Return the path of a state file belonging to path.
+
+    The file is located in the directory of get_state_dir and
+    its name contains a hash of the absolute path, so that
+    different data directories do not share their state.
+    """
+    path = os.path.abspath(path)
+    pathhash = hashlib.sha1(path.encode('utf-8')).hexdigest()[:16]
+    fname = os.path.basename(path) + '-' + pathhash + suffix
+    return os.path.join(get_state_dir(), fname)
+
+
+def get_entry_signature(fpath):
+    """Return a string identifying the content of a file.
+
+    For git-annex symbolic links this is the annex key,
+    otherwise size and modification time of the file.
+    """
+    annex_key = get_annex_key(fpath)
+    if annex_key is not None:
+        return annex_key
+    st = os.stat(fpath)
+    return '{}:{}'.format(st.st_size, st.st_mtime_ns)
+
+
+def hash_items(items):
+    """Return the sha1 hash of an iterable with strings"""
+    hasher = hashlib.sha1()
+    for item in items:
+        hasher.update(item.encode('utf-8'))
+        hasher.update(b'\0')
+    return hasher.hexdigest()
+
+
+def load_manifest(fpath):
+    """Return the manifest stored in fpath or an empty one"""
+    try:
+        with open(fpath, 'r') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {'version': MANIFEST_VERSION}
+    if manifest.get('version') != MANIFEST_VERSION:
+        return {'version': MANIFEST_VERSION}
+    return manifest
+
+
+def save_manifest(fpath, manifest):
+    """Write the manifest to fpath by replacing the file atomically"""
+    manifest['version'] = MANIFEST_VERSION
+    outdir = os.path.dirname(os.path.abspath(fpath))
+    os.makedirs(outdir, exist_ok=True)
+    fd, tmppath = tempfile.mkstemp(prefix='.tmp-', dir=outdir)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+        os.chmod(tmppath, 0o644)
+        os.replace(tmppath, fpath)
+    except BaseException:
+        os.unlink(tmppath)
+        raise
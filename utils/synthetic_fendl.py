@@ -0,0 +1,356 @@
+############################################################
+#
+# Date:         2026/10/17
+# Institution:  IAEA
+#
+# Generator of synthetic FENDL trees for benchmarks. The
+# ENDF files have a valid MF1/MT451 header and TAB1
+# sections with random cross sections whose number of
+# points is chosen to reach a given file size. The tree
+# contains the evaluated files as received (with CRLF line
+# endings, blank lines and files that are not ENDF files),
+# the data directory of the website with the normalized
+# ENDF files and the derived ace, group, njoy and plot
+# files, and html tables in the layout of the website of
+# the previous library version. All content is derived
+# from a seed so that the same parameters produce the
+# same tree.
+#
+############################################################
+
+import json
+import math
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from .endf_metadata import get_endf_metadata
+from .endf_records import EndfRecordWriter
+from .rename_endf import EndfNamingContext
+
+
+SYNTHETIC_INFO_FILE = 'synthetic.json'
+
+# element symbols for Z = 1, ..., 99
+ELEMENTS = (
+    'H', 'He', 'Li', 'Be', 'B', 'C', 'N', 'O', 'F', 'Ne',
+    'Na', 'Mg', 'Al', 'Si', 'P', 'S', 'Cl', 'Ar', 'K', 'Ca',
+    'Sc', 'Ti', 'V', 'Cr', 'Mn', 'Fe', 'Co', 'Ni', 'Cu', 'Zn',
+    'Ga', 'Ge', 'As', 'Se', 'Br', 'Kr', 'Rb', 'Sr', 'Y', 'Zr',
+    'Nb', 'Mo', 'Tc', 'Ru', 'Rh', 'Pd', 'Ag', 'Cd', 'In', 'Sn',
+    'Sb', 'Te', 'I', 'Xe', 'Cs', 'Ba', 'La', 'Ce', 'Pr', 'Nd',
+    'Pm', 'Sm', 'Eu', 'Gd', 'Tb', 'Dy', 'Ho', 'Er', 'Tm', 'Yb',
+    'Lu', 'Hf', 'Ta', 'W', 'Re', 'Os', 'Ir', 'Pt', 'Au', 'Hg',
+    'Tl', 'Pb', 'Bi', 'Po', 'At', 'Rn', 'Fr', 'Ra', 'Ac', 'Th',
+    'Pa', 'U', 'Np', 'Pu', 'Am', 'Cm', 'Bk', 'Cf', 'Es'
+)
+
+# header fields and sections of the sublibraries
+SUBLIB_SPECS = {
+    'neutron': {'NSUB': 10, 'AWI': 1.0, 'MF': 3, 'name': 'INCIDENT NEUTRON DATA',
+                'MTS': (1, 2, 4, 16, 102, 103, 107)},
+    'proton': {'NSUB': 10010, 'AWI': 0.99862, 'MF': 3, 'name': 'INCIDENT PROTON DATA',
+               'MTS': (2, 5)},
+    'deuteron': {'NSUB': 10020, 'AWI': 1.99626, 'MF': 3, 'name': 'INCIDENT DEUTERON DATA',
+                 'MTS': (2, 5)},
+    'atom': {'NSUB': 3, 'AWI': 0.0, 'MF': 23, 'name': 'PHOTO-ATOMIC INTERACTION DATA',
+             'MTS': (501, 502, 504, 516, 522)}
+}
+
+# derived files of the website, see sublib_dic
+# in create_sublib_table_websites.py
+DERIVED_FILES = {
+    'neutron': ('ace/[iaeasym]', 'ace/[iaeasym].xsd', 'group/[iaeasym].g',
+                'group/[iaeasym].m', 'plot/[iaeasym]_ace.pdf',
+                'plot/[iaeasym]_htr.pdf', 'njoy/[iaeasym].nji',
+                'njoy/[iaeasym].out'),
+    'proton': ('ace/[iaeasym]', 'ace/[iaeasym].xsd', 'plot/[iaeasym]_ace.ps',
+               'njoy/[iaeasym].nji', 'njoy/[iaeasym].out'),
+    'deuteron': ('ace/[iaeasym]', 'ace/[iaeasym].xsd'),
+    'atom': ('group/[iaeasym].gam',)
+}
+
+ENDF_NAME_TEMPLATE = '[proj]_[matcode]_[fullsym].endf'
+
+_LABS = ('IAEA', 'ORNL', 'LANL', 'JAEA', 'CEA', 'KIT', 'BNL', 'PSI')
+_AUTHORS = ('A. Trkov', 'M. Herman', 'R. Capote', 'D. Brown', 'A. Koning',
+            'G. Schnabel', 'K. Shibata', 'S. Kunieda', 'D. Rochman')
+_MONTHS = ('JAN', 'FEB', 'MAR', 'APR', 'MAY', 'JUN',
+           'JUL', 'AUG', 'SEP', 'OCT', 'NOV', 'DEC')
+_EMAX_CHOICES = (2.0e7, 3.0e7, 6.0e7, 1.5e8, 2.0e8)
+# lines of MF1/MT451 besides comments and directory
+_NUM_STANDARD_TEXT_LINES = 5
+
+
+def parse_size(text):
+    """Convert a size such as 200M, 64k or 1.5G to bytes"""
+    text = str(text).strip()
+    factors = {'k': 2**10, 'm': 2**20, 'g': 2**30}
+    factor = factors.get(text[-1:].lower(), 1)
+    if factor != 1:
+        text = text[:-1]
+    return int(float(text) * factor)
+
+
+def get_synthetic_materials(sublib, count):
+    """Return count materials of a sublibrary sorted by MAT.
+
+    Each material is a dictionary with Z, A, MAT, ZA, AWR and
+    ZSYMAM. Photo-atomic materials are elements and limited
+    to 99, otherwise up to 25 isotopes per element are used.
+    """
+    if sublib == 'atom':
+        if count > len(ELEMENTS):
+            raise ValueError('at most {} photo-atomic materials'.format(len(ELEMENTS)))
+    elif count > 25 * len(ELEMENTS):
+        raise ValueError('at most {} materials'.format(25 * len(ELEMENTS)))
+    materials = []
+    for k in range(count):
+        z = 1 + k % len(ELEMENTS)
+        iso = k // len(ELEMENTS)
+        if sublib == 'atom':
+            a = 0
+            awr = 2.0 * z
+            zsymam = '{:>3}-{:<2}'.format(z, ELEMENTS[z-1])
+        else:
+            a = max(z, int(round(2.2 * z))) + iso
+            awr = 0.99167 * a
+            zsymam = '{:>3}-{:<2}-{:>3}'.format(z, ELEMENTS[z-1], a)
+        materials.append({'Z': z, 'A': a, 'MAT': z * 100 + 25 + 3 * iso,
+                          'ZA': z * 1000 + a, 'AWR': awr, 'ZSYMAM': zsymam})
+    return sorted(materials, key=lambda m: m['MAT'])
+
+
+def _write_end_record(fobj, mat):
+    """Write a FEND record, or MEND for mat=0 and TEND for mat=-1"""
+    line = ' 0.000000+0 0.000000+0          0          0          0          0'
+    fobj.write('{}{:4d}{:2d}{:3d}{:5d}\n'.format(line, mat, 0, 0, 0).encode('ascii'))
+
+
+def write_synthetic_endf(fobj, material, sublib, size, version='3.2',
+                         comment_lines=20, seed=0):
+    """Write a synthetic ENDF file of about size bytes to a binary file object.
+
+    The file contains a tape identification, a MF1/MT451 section
+    and TAB1 sections in MF3 (MF23 for photo-atomic data) whose
+    number of points is chosen to reach the given size.
+    """
+    spec = SUBLIB_SPECS[sublib]
+    rng = np.random.default_rng([seed, material['MAT']])
+    mat = material['MAT']
+    mf = spec['MF']
+    mts = spec['MTS']
+    emax = float(rng.choice(_EMAX_CHOICES)) if sublib != 'atom' else 1.0e11
+    nwd = _NUM_STANDARD_TEXT_LINES + comment_lines
+    nxc = 1 + len(mts)
+    # distribute the remaining lines over the sections, a TAB1
+    # section consists of HEAD, TAB1, interpolation and data lines
+    nlines = size // 81
+    nheader = 5 + nwd + nxc
+    ndata = max((nlines - nheader - 3) // len(mts) - 4, 1)
+    npoints = max(3 * ndata, 2)
+    nc_data = 3 + -(-npoints // 3)
+
+    edate = 'EVAL-{}{:02d}'.format(_MONTHS[rng.integers(12)], rng.integers(90, 120) % 100)
+    auth = ' and '.join(rng.choice(_AUTHORS, size=2, replace=False))
+    texts = [
+        '{:<11}{:<11}{:<10} {:<33}'.format(material['ZSYMAM'], rng.choice(_LABS),
+                                           edate, auth),
+        ' {:<21}{:<10} {:<10}{:12}{:<8}'.format('FENDL-' + version, 'DIST-DEC21',
+                                                 'REV0-DEC21', '', '20211215'),
+        '----{:<18}{:<22}{:<11}'.format('FENDL-' + version, 'MATERIAL {}'.format(mat),
+                                        'REVISION 0'),
+        '-----' + spec['name'],
+        '------ENDF-6 FORMAT'
+    ]
+    texts.extend(' synthetic evaluation for benchmarks, comment line {}'.format(i+1)
+                 for i in range(comment_lines))
+
+    fobj.write('{:<66}{:4d}{:2d}{:3d}{:5d}\n'.format(
+               ' synthetic FENDL-' + version + ' tape', 1, 0, 0, 0).encode('ascii'))
+    writer = EndfRecordWriter(fobj, mat, 1, 451)
+    writer.write_cont(material['ZA'], material['AWR'], -1, 0, 33, 0)
+    writer.write_cont(0.0, 0.0, 0, 0, 0, 6)
+    writer.write_cont(spec['AWI'], emax, 0, 0, spec['NSUB'], 6)
+    writer.write_cont(0.0, 0.0, 0, 0, nwd, nxc)
+    for text in texts:
+        writer.write_text(text)
+    writer.write_text('{:22}{:11d}{:11d}{:11d}{:11d}'.format('', 1, 451, 4 + nwd + nxc, 0))
+    for mt in mts:
+        writer.write_text('{:22}{:11d}{:11d}{:11d}{:11d}'.format('', mf, mt, nc_data, 0))
+    writer.write_send()
+    _write_end_record(fobj, mat)
+
+    energies = np.geomspace(1.0e-5, emax, npoints)
+    for mt in mts:
+        writer = EndfRecordWriter(fobj, mat, mf, mt)
+        writer.write_cont(material['ZA'], material['AWR'], 0, 0, 0, 0)
+        xs = rng.lognormal(0.0, 1.0, npoints)
+        writer.write_tab1(0.0, 0.0, 0, 0, [npoints], [2], energies, xs)
+        writer.write_send()
+    _write_end_record(fobj, mat)
+    _write_end_record(fobj, 0)
+    _write_end_record(fobj, -1)
+
+
+def copy_with_noise(srcpath, destpath, crlf=False, blank_every=0, chunksize=2**20):
+    """Copy a file and add CRLF line endings and blank lines.
+
+    If blank_every is positive, an empty line is inserted
+    after every blank_every lines.
+    """
+    eol = b'\r\n' if crlf else b'\n'
+    nlines = 0
+    rest = b''
+    with open(srcpath, 'rb') as fin, open(destpath, 'wb') as fout:
+        for chunk in iter(lambda: fin.read(chunksize), b''):
+            chunk = rest + chunk
+            end = chunk.rfind(b'\n') + 1
+            rest = chunk[end:]
+            lines = chunk[:end].split(b'\n')[:-1]
+            if blank_every > 0:
+                first = (blank_every - nlines % blank_every) - 1
+                for i in range(first, len(lines), blank_every):
+                    lines[i] += eol
+            nlines += len(lines)
+            fout.write(eol.join(lines) + eol)
+        fout.write(rest)
+
+
+def _write_derived_file(fpath, size, seed):
+    """Write a derived file with size bytes of random text"""
+    rng = np.random.default_rng([seed, len(fpath)])
+    line = np.frombuffer(b' 1.0000E+00 2.0000E+00 3.0000E+00 4.0000E+00\n', dtype=np.uint8)
+    data = np.resize(line, size)
+    # vary the digits so that the files do not compress too well
+    digits = np.flatnonzero(data == ord('0'))
+    data[digits] = ord('0') + rng.integers(0, 10, len(digits), dtype=np.uint8)
+    with open(fpath, 'wb') as f:
+        f.write(data.tobytes())
+
+
+def write_legacy_table(fpath, entries, version='3.2'):
+    """Write an html table of a sublibrary as on the previous website.
+
+    entries are dictionaries with the keys MAT, ZSYMAM, ALAB,
+    EDATE, AUTH, HSUB_LIB, EMAX and filename.
+    """
+    rows = []
+    for idx, entry in enumerate(sorted(entries, key=lambda e: int(e['MAT']))):
+        rows.append('\n'.join((
+            "    <tr bgcolor='#ccffcc'>",
+            '        <td>{}</td>'.format(idx),
+            '        <td>{}</td>'.format(entry['MAT']),
+            '        <td>{}</td>'.format(entry['ZSYMAM']),
+            '        <td>{}</td>'.format(entry['ALAB']),
+            '        <td>{}</td>'.format(entry['EDATE']),
+            '        <td>{}</td>'.format(entry['AUTH']),
+            '        <td>{}</td>'.format(entry['HSUB_LIB']),
+            '        <td>{:.2e}</td>'.format(entry['EMAX']),
+            '        <td>[<a href="endf/{}">endf</a>]</td>'.format(entry['filename']),
+            '        <td></td>',
+            '    </tr>')))
+    with open(fpath, 'w') as f:
+        f.write('<html>\n<head>\n<title>FENDL-{}</title>\n</head>\n<body>\n'.format(version))
+        f.write('<table summary="zipped" class="tab-color" align="center">\n<thead>\n')
+        f.write('<tr bgcolor="#ccffff"><th>#</th><th>Mat</th><th>Material</th>'
+                '<th>Lab.</th><th>Date</th><th>Authors</th><th>Source</th>'
+                '<th>Emax (eV)</th><th colspan="11">File</th></tr>\n</thead>\n<tbody>\n')
+        f.write('\n'.join(rows))
+        f.write('\n</tbody>\n</table>\n</body>\n</html>\n')
+
+
+def _create_material_files(root, sublib, material, size, noise, params):
+    """Create the raw, normalized and derived files of a material"""
+    endf_dir = os.path.join(root, 'data', sublib, 'endf')
+    raw_dir = os.path.join(root, 'raw', sublib)
+    tmppath = os.path.join(endf_dir, '.tmp-{}'.format(material['MAT']))
+    with open(tmppath, 'wb') as f:
+        write_synthetic_endf(f, material, sublib, size, params['version'],
+                             params['comment_lines'], params['seed'])
+    naming = EndfNamingContext.from_file(tmppath)
+    endf_name = naming.render(ENDF_NAME_TEMPLATE)
+    endf_path = os.path.join(endf_dir, endf_name)
+    os.replace(tmppath, endf_path)
+    raw_name = '{}{}.txt'.format(naming.elem, naming.mass)
+    crlf, blank_every = noise
+    copy_with_noise(endf_path, os.path.join(raw_dir, raw_name), crlf, blank_every)
+    for template in DERIVED_FILES[sublib]:
+        fpath = os.path.join(root, 'data', sublib, naming.render(template))
+        _write_derived_file(fpath, params['derived_size'], params['seed'])
+    return {'MAT': str(material['MAT']), 'filename': endf_name, 'raw': raw_name,
+            'size': os.path.getsize(endf_path)}
+
+
+def create_synthetic_fendl(root, materials=10, sublibs=tuple(SUBLIB_SPECS),
+                           min_size=2**16, max_size=2**20, derived_size=2**12,
+                           crlf_fraction=0.25, blank_fraction=0.25, junk_files=2,
+                           comment_lines=20, version='3.2', seed=0, jobs=1):
+    """Create a synthetic FENDL tree in root.
+
+    The tree consists of
+
+        raw/<sublib>/        ENDF files as received, a fraction of
+                             them with CRLF line endings or blank
+                             lines, and junk_files files that are
+                             not ENDF files
+        data/<sublib>/endf/  normalized ENDF files named as in the
+                             repository, and the derived files in
+                             data/<sublib>/{ace,group,njoy,plot}
+        legacy/<sublib>.html tables of the previous website
+
+    The file sizes are distributed log-uniformly between min_size
+    and max_size. The parameters and the created files are stored
+    in synthetic.json in root. Return the content of this file.
+    """
+    params = {'materials': materials, 'sublibs': list(sublibs),
+              'min_size': min_size, 'max_size': max_size,
+              'derived_size': derived_size, 'crlf_fraction': crlf_fraction,
+              'blank_fraction': blank_fraction, 'junk_files': junk_files,
+              'comment_lines': comment_lines, 'version': version, 'seed': seed}
+    if min_size > max_size:
+        raise ValueError('min_size must not exceed max_size')
+    rng = np.random.default_rng(seed)
+    tasks = []
+    for sublib in sublibs:
+        if sublib not in SUBLIB_SPECS:
+            raise ValueError('unknown sublibrary ' + sublib)
+        os.makedirs(os.path.join(root, 'raw', sublib), exist_ok=True)
+        os.makedirs(os.path.join(root, 'data', sublib, 'endf'), exist_ok=True)
+        for template in DERIVED_FILES[sublib]:
+            os.makedirs(os.path.join(root, 'data', sublib, os.path.dirname(template)),
+                        exist_ok=True)
+        for material in get_synthetic_materials(sublib, materials):
+            size = int(math.exp(rng.uniform(math.log(min_size), math.log(max_size))))
+            crlf = bool(rng.random() < crlf_fraction)
+            blank_every = int(rng.integers(50, 500)) if rng.random() < blank_fraction else 0
+            tasks.append((root, sublib, material, size, (crlf, blank_every), params))
+
+    if jobs == 1:
+        results = [_create_material_files(*args) for args in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = [executor.submit(_create_material_files, *args) for args in tasks]
+            results = [f.result() for f in futures]
+
+    info = {'params': params, 'sublibs': {}}
+    for sublib in sublibs:
+        files = [res for args, res in zip(tasks, results) if args[1] == sublib]
+        raw_dir = os.path.join(root, 'raw', sublib)
+        for i in range(junk_files):
+            with open(os.path.join(raw_dir, 'README{}.txt'.format(i)), 'w') as f:
+                f.write('Synthetic {} sublibrary of FENDL-{}\n'.format(sublib, version) * 40)
+        info['sublibs'][sublib] = {'files': files}
+
+    os.makedirs(os.path.join(root, 'legacy'), exist_ok=True)
+    for sublib in sublibs:
+        entries = []
+        endf_dir = os.path.join(root, 'data', sublib, 'endf')
+        for res in info['sublibs'][sublib]['files']:
+            entry = get_endf_metadata(os.path.join(endf_dir, res['filename']))
+            entry['filename'] = res['filename']
+            entries.append(entry)
+        write_legacy_table(os.path.join(root, 'legacy', sublib + '.html'), entries, version)
+
+    with open(os.path.join(root, SYNTHETIC_INFO_FILE), 'w') as f:
+        json.dump(info, f, indent=2)
+    return info
@@ -0,0 +1,233 @@
+############################################################
+#
+# Date:         2026/10/17
+# Institution:  IAEA
+#
+# Synchronization of the ENDF and derived files in the
+# repository with the data directory of the FENDL website.
+# The directory mapping is taken from FENDL_WEB_DIRS.
+# For each destination file, the annex key (or size and
+# modification time) of its source file is recorded in a
+# state file outside of the data directory (see
+# get_state_path in site_manifest). Only files whose
+# source changed are transferred and only files that are no
+# longer in the repository are deleted. Files without a
+# recorded state (e.g., from a previous rsync) are kept if
+# their content matches the source.
+#
+############################################################
+
+import errno
+import fcntl
+import filecmp
+import os
+import shutil
+import tempfile
+from .fendl_layout import FENDL_WEB_DIRS, list_dir_files
+from .hashstore import compute_sha256, get_key_sha256
+from .site_manifest import (get_entry_signature, get_state_path,
+                            load_manifest, save_manifest)
+
+
+SYNC_STATE_FILE = '.website_sync.json'
+SYNC_METHODS = ('copy', 'hardlink', 'reflink')
+
+# ioctl request to clone a file on btrfs, xfs and similar
+_FICLONE = 0x40049409
+
+
+def _is_current(srcpath, signature, destpath, state):
+    """Check whether destpath already contains the content of srcpath"""
+    try:
+        st = os.stat(destpath)
+    except FileNotFoundError:
+        return False
+    recorded = state.get(destpath)
+    if recorded is not None:
+        return recorded == [signature, st.st_size, st.st_mtime_ns]
+    if st.st_size != os.path.getsize(srcpath):
+        return False
+    keyhash = get_key_sha256(srcpath)
+    if keyhash is not None:
+        return compute_sha256(destpath) == keyhash
+    return filecmp.cmp(srcpath, destpath, shallow=False)
+
+
+def plan_website_sync(repo_dir, data_dir, state=None, web_dirs=FENDL_WEB_DIRS):
+    """Return the actions to bring data_dir up to date with repo_dir.
+
+    Each action is a dictionary with the keys action (transfer,
+    keep, delete or missing), source, dest, size and signature.
+    Actions of type missing refer to git-annex files whose content
+    is not present in the repository; their destination is kept.
+    The state maps destination paths to the lists [signature, size,
+    mtime_ns] recorded at the time of the last transfer.
+    """
+    state = state if state is not None else {}
+    plan = []
+    for repo_subdir, web_subdir in web_dirs:
+        srcdir = os.path.join(repo_dir, repo_subdir)
+        destdir = os.path.join(data_dir, web_subdir)
+        if not os.path.isdir(srcdir):
+            print('WARNING: directory ' + srcdir + ' does not exist')
+            continue
+        src_names = list_dir_files(srcdir)
+        dest_names = list_dir_files(destdir) if os.path.isdir(destdir) else []
+        for fname in src_names:
+            srcpath = os.path.join(srcdir, fname)
+            destpath = os.path.join(destdir, fname)
+            action = {'source': srcpath, 'dest': destpath,
+                      'size': 0, 'signature': None}
+            if not os.path.exists(srcpath):
+                action['action'] = 'missing'
+            else:
+                action['size'] = os.path.getsize(srcpath)
+                action['signature'] = get_entry_signature(srcpath)
+                if _is_current(srcpath, action['signature'], destpath, state):
+                    action['action'] = 'keep'
+                else:
+                    action['action'] = 'transfer'
+            plan.append(action)
+        src_set = set(src_names)
+        for fname in dest_names:
+            if fname not in src_set:
+                destpath = os.path.join(destdir, fname)
+                plan.append({'action': 'delete', 'source': None,
+                             'dest': destpath, 'signature': None,
+                             'size': os.lstat(destpath).st_size})
+    return plan
+
+
+def _clone_file(srcpath, tmppath):
+    """Create tmppath as a reflink of srcpath"""
+    with open(srcpath, 'rb') as fsrc, open(tmppath, 'wb') as fdest:
+        fcntl.ioctl(fdest.fileno(), _FICLONE, fsrc.fileno())
+
+
+def transfer_file(srcpath, destpath, method='copy'):
+    """Replace destpath by the content of srcpath.
+
+    The methods hardlink and reflink fall back to a copy if
+    they are not supported for the two paths. Return the
+    method that has been used.
+    """
+    srcpath = os.path.realpath(srcpath)
+    destdir = os.path.dirname(destpath)
+    fd, tmppath = tempfile.mkstemp(prefix='.tmp-', dir=destdir)
+    os.close(fd)
+    try:
+        used_method = 'copy'
+        if method == 'hardlink':
+            os.unlink(tmppath)
+            try:
+                os.link(srcpath, tmppath)
+                used_method = 'hardlink'
+            except OSError as exc:
+                if exc.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK):
+                    raise
+        elif method == 'reflink':
+            try:
+                _clone_file(srcpath, tmppath)
+                used_method = 'reflink'
+            except OSError as exc:
+                if exc.errno not in (errno.EXDEV, errno.EOPNOTSUPP,
+                                     errno.ENOTTY, errno.EINVAL):
+                    raise
+        if used_method == 'copy':
+            shutil.copyfile(srcpath, tmppath)
+        if used_method != 'hardlink':
+            os.chmod(tmppath, 0o644)
+        os.replace(tmppath, destpath)
+    except BaseException:
+        if os.path.lexists(tmppath):
+            os.unlink(tmppath)
+        raise
+    return used_method
+
+
+def execute_website_sync(plan, state, method='copy', dry_run=False):
+    """Carry out the actions of a plan and update the state.
+
+    Return a dictionary with the number of files and bytes for
+    each type of action.
+    """
+    if method not in SYNC_METHODS:
+        raise ValueError('method must be one of ' + ', '.join(SYNC_METHODS))
+    stats = {'transfer': [0, 0], 'keep': [0, 0],
+             'delete': [0, 0], 'missing': [0, 0]}
+    created_dirs = set()
+    for action in plan:
+        kind = action['action']
+        destpath = action['dest']
+        stats[kind][0] += 1
+        stats[kind][1] += action['size']
+        if dry_run:
+            if kind == 'transfer':
+                print('transfer {} -> {} ({} bytes)'.format(
+                      action['source'], destpath, action['size']))
+            elif kind == 'delete':
+                print('delete ' + destpath)
+            elif kind == 'missing':
+                print('missing ' + action['source'] + ' (content not present)')
+            continue
+        if kind == 'transfer':
+            destdir = os.path.dirname(destpath)
+            if destdir not in created_dirs:
+                os.makedirs(destdir, exist_ok=True)
+                created_dirs.add(destdir)
+            transfer_file(action['source'], destpath, method)
+            st = os.stat(destpath)
+            state[destpath] = [action['signature'], st.st_size, st.st_mtime_ns]
+        elif kind == 'keep' and destpath not in state:
+            # record files whose content has been compared
+            st = os.stat(destpath)
+            state[destpath] = [action['signature'], st.st_size, st.st_mtime_ns]
+        elif kind == 'delete':
+            os.unlink(destpath)
+            state.pop(destpath, None)
+        elif kind == 'missing':
+            print('WARNING: content of ' + action['source'] + ' not present')
+    if not dry_run:
+        # forget destinations that have disappeared otherwise
+        for destpath in [p for p in state if not os.path.lexists(p)]:
+            del state[destpath]
+    return stats
+
+
+def sync_website_data(repo_dir, data_dir, method='copy', dry_run=False):
+    """Synchronize the website data directory with the repository.
+
+    The state file is stored outside of data_dir and updated
+    after the transfer unless dry_run is true. A state file left
+    in data_dir by earlier versions is read once and removed.
+    Return the statistics of execute_website_sync.
+    """
+    state_path = get_state_path(data_dir, SYNC_STATE_FILE)
+    old_state_path = os.path.join(data_dir, SYNC_STATE_FILE)
+    if os.path.isfile(state_path) or not os.path.isfile(old_state_path):
+        old_state_path = None
+    manifest = load_manifest(state_path if old_state_path is None else old_state_path)
+    # the state is stored with paths relative to data_dir
+    state = {os.path.join(data_dir, k): v
+             for k, v in manifest.get('files', {}).items()}
+    plan = plan_website_sync(repo_dir, data_dir, state)
+    stats = execute_website_sync(plan, state, method, dry_run)
+    if not dry_run:
+        manifest['files'] = {os.path.relpath(k, data_dir): v
+                             for k, v in state.items()}
+        save_manifest(state_path, manifest)
+        if old_state_path is not None:
+            os.unlink(old_state_path)
+    return stats
+
+
+def print_sync_stats(stats, dry_run=False):
+    """Print a summary of the statistics returned by sync_website_data"""
+    prefix = 'would be ' if dry_run else ''
+    labels = (('transfer', 'transferred'), ('keep', 'unchanged'),
+              ('delete', 'deleted'), ('missing', 'missing'))
+    for kind, label in labels:
+        count, nbytes = stats[kind]
+        if kind != 'keep' and kind != 'missing':
+            label = prefix + label
+        print('{:>8} files {:>16,} bytes {}'.format(count, nbytes, label))
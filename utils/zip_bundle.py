@@ -0,0 +1,232 @@
+############################################################
+#
+# Date:         2026/10/17
+# Institution:  IAEA
+#
+# Creation of deterministic zip archives from files that
+# are read directly from their location and stored under
+# a possibly different path (arcname) in the archive.
+# The members are compressed in parallel by a pool of
+# threads into spooled temporary files, which are only kept
+# in memory if they are small, and written in the order of
+# their arcnames with fixed timestamps and permissions, so
+# that the same input always results in the same archive.
+# Directory entries are written like those of zip -r and the
+# zip64 extensions are used for large archives. A small manifest with
+# the names, sizes and modification times of the members
+# is stored in the state directory of site_manifest (not
+# next to the archive where it would be served with the
+# website), so that an archive whose members did not
+# change is not created again.
+#
+############################################################
+
+import collections
+import json
+import os
+import shutil
+import struct
+import tempfile
+import zipfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from .site_manifest import get_state_path
+
+
+# 1980-01-01 00:00:00, the earliest date representable in zip files
+FIXED_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+_DOS_TIME = 0
+_DOS_DATE = (1 << 5) | 1
+_FILE_ATTR = (0o100644 << 16)
+_DIR_ATTR = (0o40755 << 16) | 0x10
+_MADE_BY = (3 << 8) | 20
+_VERSION_NEEDED = 20
+_VERSION_ZIP64 = 45
+_UTF8_FLAG = 0x800
+
+_LOCAL_HEADER = struct.Struct('<IHHHHHIIIHH')
+_CENTRAL_HEADER = struct.Struct('<IHHHHHHIIIHHHHHII')
+_END_RECORD = struct.Struct('<IHHHHIIH')
+_ZIP64_LOCAL_EXTRA = struct.Struct('<HHQQ')
+_ZIP64_CENTRAL_EXTRA = struct.Struct('<HHQQQ')
+_ZIP64_END_RECORD = struct.Struct('<IQHHIIQQQQ')
+_ZIP64_END_LOCATOR = struct.Struct('<IIQI')
+# beyond these limits, zip64 extensions are needed
+_ZIP32_LIMIT = 0xFFFFFFFF - 2**24
+_MAX_ENTRIES = 0xFFFF
+# compressed members up to this size are kept in memory,
+# larger ones are spilled to a temporary file
+_SPILL_SIZE = 2**22
+
+
+def _compress_member(srcpath, level, chunksize=2**20):
+    """Compress a file to a spooled temporary file.
+
+    Return crc, size, compression method, compressed size and
+    the temporary file, which is None for stored members that
+    are copied from srcpath when they are written.
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    crc = 0
+    size = 0
+    spill = tempfile.SpooledTemporaryFile(max_size=_SPILL_SIZE)
+    try:
+        with open(srcpath, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunksize), b''):
+                crc = zlib.crc32(chunk, crc)
+                size += len(chunk)
+                spill.write(compressor.compress(chunk))
+        spill.write(compressor.flush())
+        csize = spill.tell()
+    except BaseException:
+        spill.close()
+        raise
+    if csize >= size:
+        # store incompressible files as they are, like zip does
+        spill.close()
+        return crc, size, zipfile.ZIP_STORED, size, None
+    spill.seek(0)
+    return crc, size, zipfile.ZIP_DEFLATED, csize, spill
+
+
+def _write_zip(fout, members, level, jobs, zip64=False):
+    """Write the members with compression on a pool of threads.
+
+    Members whose arcname ends with a slash are written as
+    directory entries. If zip64 is true, the zip64 extensions
+    are used for all entries.
+    """
+    entries = []
+    offset = 0
+    version = _VERSION_ZIP64 if zip64 else _VERSION_NEEDED
+
+    def write_entry(srcpath, arcname, crc, size, method, csize, spill,
+                    attr=_FILE_ATTR):
+        nonlocal offset
+        name = arcname.encode('utf-8')
+        flags = 0 if name.isascii() else _UTF8_FLAG
+        if zip64:
+            extra = _ZIP64_LOCAL_EXTRA.pack(1, 16, size, csize)
+            fout.write(_LOCAL_HEADER.pack(0x04034b50, version, flags, method,
+                                          _DOS_TIME, _DOS_DATE, crc,
+                                          0xFFFFFFFF, 0xFFFFFFFF,
+                                          len(name), len(extra)))
+        else:
+            extra = b''
+            fout.write(_LOCAL_HEADER.pack(0x04034b50, version, flags, method,
+                                          _DOS_TIME, _DOS_DATE, crc, csize,
+                                          size, len(name), 0))
+        fout.write(name)
+        fout.write(extra)
+        if spill is not None:
+            with spill:
+                shutil.copyfileobj(spill, fout, 2**20)
+        elif size > 0:
+            with open(srcpath, 'rb') as fin:
+                shutil.copyfileobj(fin, fout, 2**20)
+        entries.append((name, flags, method, crc, csize, size, attr, offset))
+        offset += _LOCAL_HEADER.size + len(name) + len(extra) + csize
+
+    def write_next():
+        srcpath, arcname, future = pending.popleft()
+        if future is None:
+            write_entry(srcpath, arcname, 0, 0, zipfile.ZIP_STORED, 0, None,
+                        _DIR_ATTR)
+        else:
+            write_entry(srcpath, arcname, *future.result())
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        # keep a bounded number of compressed members pending
+        pending = collections.deque()
+        for srcpath, arcname in members:
+            if arcname.endswith('/'):
+                pending.append((srcpath, arcname, None))
+            else:
+                pending.append((srcpath, arcname, executor.submit(
+                                _compress_member, srcpath, level)))
+            while len(pending) > jobs:
+                write_next()
+        while pending:
+            write_next()
+
+    cd_start = offset
+    for name, flags, method, crc, csize, size, attr, hoffset in entries:
+        if zip64:
+            extra = _ZIP64_CENTRAL_EXTRA.pack(1, 24, size, csize, hoffset)
+            csize = size = hoffset = 0xFFFFFFFF
+        else:
+            extra = b''
+        fout.write(_CENTRAL_HEADER.pack(0x02014b50, _MADE_BY, version,
+                                        flags, method, _DOS_TIME, _DOS_DATE,
+                                        crc, csize, size, len(name),
+                                        len(extra), 0, 0, 0, attr, hoffset))
+        fout.write(name)
+        fout.write(extra)
+        offset += _CENTRAL_HEADER.size + len(name) + len(extra)
+    cd_size = offset - cd_start
+    nentries = len(entries)
+    if zip64:
+        fout.write(_ZIP64_END_RECORD.pack(0x06064b50,
+                                          _ZIP64_END_RECORD.size - 12,
+                                          _MADE_BY, version, 0, 0, nentries,
+                                          nentries, cd_size, cd_start))
+        fout.write(_ZIP64_END_LOCATOR.pack(0x07064b50, 0, offset, 1))
+        nentries = min(nentries, 0xFFFF)
+        cd_size = cd_start = 0xFFFFFFFF
+    fout.write(_END_RECORD.pack(0x06054b50, 0, 0, nentries, nentries,
+                                cd_size, cd_start, 0))
+
+
+def get_member_manifest(members, level):
+    """Return a description of the members used to detect changes"""
+    manifest = {'level': level, 'members': []}
+    for srcpath, arcname in members:
+        if arcname.endswith('/'):
+            manifest['members'].append([arcname, 0, 0])
+            continue
+        st = os.stat(srcpath)
+        manifest['members'].append([arcname, st.st_size, st.st_mtime_ns])
+    return manifest
+
+
+def get_manifest_path(zippath):
+    """Return the path of the file with the member manifest"""
+    return get_state_path(zippath, '.manifest')
+
+
+def build_zip(zippath, members, level=6, jobs=4, force=False):
+    """Create a deterministic zip archive.
+
+    members is a list of tuples (source path, arcname), where an
+    arcname ending with a slash denotes a directory. The archive
+    is only created if it does not exist or its member manifest
+    changed, unless force is true. Return True if the archive
+    has been created and False if the existing one was kept.
+    """
+    members = sorted(members, key=lambda m: m[1])
+    manifest = get_member_manifest(members, level)
+    manifest_path = get_manifest_path(zippath)
+    if not force and os.path.isfile(zippath):
+        try:
+            with open(manifest_path, 'r') as f:
+                if json.load(f) == manifest:
+                    return False
+        except (OSError, ValueError):
+            pass
+
+    total_size = sum(m[1] for m in manifest['members'])
+    outdir = os.path.dirname(os.path.abspath(zippath))
+    fd, tmppath = tempfile.mkstemp(prefix='.tmp-', suffix='.zip', dir=outdir)
+    try:
+        with os.fdopen(fd, 'wb') as fout:
+            zip64 = total_size >= _ZIP32_LIMIT or len(members) >= _MAX_ENTRIES
+            _write_zip(fout, members, level, jobs, zip64)
+        os.chmod(tmppath, 0o644)
+        os.replace(tmppath, zippath)
+    except BaseException:
+        os.unlink(tmppath)
+        raise
+    os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f)
+    return True